@@ -0,0 +1,15 @@
+"""Encoding throughput benchmarks
+
+Benchmarks run against app services built with synthetic scripts and without
+database, so no Postgres is needed:
+
+    python -m benchmarks.run --output base.json
+    python -m benchmarks.run --output head.json
+    python -m benchmarks.compare base.json head.json
+
+Run `python -m benchmarks.run --help` to narrow down script sizes, extra
+params sizes, concurrency levels and encode types. Concurrency per worker of
+sync and async generate paths is compared with
+
+    python -m benchmarks.concurrency
+"""
@@ -0,0 +1,95 @@
+"""Compares two benchmark result files
+
+Cases are matched by target, encode type, script and extra params sizes and
+concurrency. Case regresses if its throughput dropped or p95 latency grew by
+more than `--threshold`. Exits with status 1 if any case regressed
+"""
+import argparse
+import json
+import sys
+
+CASE_FIELDS = (
+    'target',
+    'encode_type',
+    'script_bytes',
+    'extra_params_bytes',
+    'concurrency',
+)
+
+
+def load_results(path: str) -> dict[tuple, dict]:
+    with open(path) as f:
+        report = json.load(f)
+    return {
+        tuple(result[name] for name in CASE_FIELDS): result
+        for result in report['results']
+    }
+
+
+def relative_change(base: float, head: float) -> float:
+    if base == 0:
+        return 0.
+    return (head - base) / base
+
+
+def compare(
+    base: dict[tuple, dict],
+    head: dict[tuple, dict],
+    threshold: float,
+) -> list[tuple]:
+    """Returns rows of matched cases with regression flag"""
+    rows = []
+    for case, base_result in base.items():
+        head_result = head.get(case)
+        if head_result is None:
+            continue
+        throughput = relative_change(
+            base_result['ops_per_sec'], head_result['ops_per_sec']
+        )
+        latency = relative_change(base_result['p95_ms'], head_result['p95_ms'])
+        memory = relative_change(
+            base_result['peak_memory_bytes'], head_result['peak_memory_bytes']
+        )
+        regressed = throughput < -threshold or latency > threshold
+        rows.append((case, throughput, latency, memory, regressed))
+    return rows
+
+
+def main(argv: None | list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.compare',
+        description='Compares benchmark results of two runs',
+    )
+    parser.add_argument('base', help='Results of baseline run')
+    parser.add_argument('head', help='Results of run to check')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='Relative change treated as regression, 0.1 by default',
+    )
+    args = parser.parse_args(argv)
+
+    base = load_results(args.base)
+    head = load_results(args.head)
+    rows = compare(base, head, args.threshold)
+    for case, throughput, latency, memory, regressed in rows:
+        target, encode_type, script_bytes, extra_params_bytes, threads = case
+        print(
+            f'{"REGRESSED" if regressed else "ok":<10}'
+            f'{target:<16} {encode_type or "-":<15} '
+            f'script={script_bytes:<9} extra={extra_params_bytes:<7} '
+            f'threads={threads:<3} '
+            f'ops/s {throughput:+.1%}  p95 {latency:+.1%}  '
+            f'peak memory {memory:+.1%}'
+        )
+    unmatched = len(base.keys() ^ head.keys())
+    if unmatched:
+        print(f'{unmatched} cases are present in one of runs only')
+    regressions = sum(1 for *_, regressed in rows if regressed)
+    print(f'{regressions} of {len(rows)} cases regressed')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Compares concurrency per app worker of WSGI and ASGI generate paths
+
+A single worker is simulated in-process against license manager stub server
+answering after `--lm-latency` seconds, both paths get the same budget of
+`--concurrency` requests in flight:
+ - `wsgi`: `--concurrency` threads (uwsgi `threads` per process) call
+   `ScriptLicenseManagerService.generate_script`
+ - `asgi`: one event loop runs up to `--concurrency` concurrent
+   `ScriptLicenseManagerService.agenerate_script` calls
+
+Every request uses a new license key, so each one waits for license manager
+lookup, which dominates generation of small scripts. Encoding is done inline
+with cached template and issued licenses are not stored. License manager
+client is synchronous, so the async path offloads its lookups to a pool of
+`--concurrency` threads as well: the benchmark compares overhead of both
+paths at equal concurrency rather than shows extra concurrency of the async
+one. Concurrency is the mean number of requests in flight (throughput times
+mean latency)
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.run import percentile
+from benchmarks.services import (
+    SyntheticRepoService,
+    make_encoding_service,
+    make_executor,
+    make_slm_service,
+)
+from scripts.lm_stub import StubLicenseManager, make_server
+from scripts.services.license_key_service import (
+    CircuitBreaker,
+    LicenseKeyService,
+    LicenseManagerClient,
+    LocalTTLCache,
+)
+from scripts.services.script_license_manager_service.structures import (
+    Script,
+    ScriptLicenseConfig,
+)
+
+MODES = ('wsgi', 'asgi')
+
+
+def make_service(lm_url: str, script_bytes: int, pool_maxsize: int):
+    lk_service = LicenseKeyService(
+        client=LicenseManagerClient(
+            base_url=lm_url,
+            connect_timeout=5,
+            read_timeout=30,
+            retries=0,
+            backoff=.1,
+            backoff_max=1,
+            pool_maxsize=pool_maxsize,
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=1_000_000, reset_timeout=1
+            ),
+        ),
+        local_cache=LocalTTLCache(max_entries=1_000_000),
+        shared_cache=None,
+        positive_ttl=3600,
+        negative_ttl=3600,
+        local_ttl=3600,
+    )
+    slm_service = make_slm_service(
+        SyntheticRepoService(script_bytes),
+        make_encoding_service(make_executor('inline', workers=1)),
+        lk_service=lk_service,
+    )
+    license_keys = (f'0x{i:08x}' for i in itertools.count())
+    script = Script(id='bench')
+
+    def make_config() -> ScriptLicenseConfig:
+        return ScriptLicenseConfig(
+            encode=True, license_key=next(license_keys)
+        )
+
+    return slm_service, script, make_config
+
+
+def run_wsgi(slm_service, script, make_config, args) -> list[float]:
+    latencies = []
+    counter = itertools.count()
+
+    def worker():
+        while next(counter) < args.requests:
+            started = time.perf_counter()
+            slm_service.generate_script(script, make_config())
+            latencies.append(time.perf_counter() - started)
+
+    threads = [
+        threading.Thread(target=worker) for _ in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+async def run_asgi(slm_service, script, make_config, args) -> list[float]:
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=args.concurrency)
+    )
+    latencies = []
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def request():
+        async with slots:
+            started = time.perf_counter()
+            await slm_service.agenerate_script(script, make_config())
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(request() for _ in range(args.requests)))
+    return latencies
+
+
+def run_mode(mode: str, lm_url: str, args) -> dict:
+    slm_service, script, make_config = make_service(
+        lm_url, args.script_bytes, args.concurrency
+    )
+    # warm up: encoding template, LM connections
+    slm_service.generate_script(script, make_config())
+    started = time.perf_counter()
+    if mode == 'wsgi':
+        latencies = run_wsgi(slm_service, script, make_config, args)
+    else:
+        latencies = asyncio.run(
+            run_asgi(slm_service, script, make_config, args)
+        )
+    seconds = time.perf_counter() - started
+    latencies.sort()
+    ops_per_sec = len(latencies) / seconds
+    return dict(
+        mode=mode,
+        ops=len(latencies),
+        seconds=round(seconds, 6),
+        ops_per_sec=round(ops_per_sec, 3),
+        concurrency=round(ops_per_sec * sum(latencies) / len(latencies), 2),
+        p50_ms=round(percentile(latencies, 50) * 1000, 4),
+        p95_ms=round(percentile(latencies, 95) * 1000, 4),
+    )
+
+
+def parse_args(argv: None | list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.concurrency',
+        description=(
+            'Compares concurrency per worker of WSGI and ASGI generate paths'
+        ),
+    )
+    parser.add_argument(
+        '--output', help='Path to save json results to, stdout by default'
+    )
+    parser.add_argument('--lm-latency', type=float, default=.05)
+    parser.add_argument(
+        '--requests', type=int, default=400, help='Requests per mode'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=16,
+        help='Max concurrent requests of a worker: threads of WSGI worker, '
+             'in-flight requests and offload threads of ASGI worker',
+    )
+    parser.add_argument('--script-bytes', type=int, default=1024)
+    return parser.parse_args(argv)
+
+
+def main(argv: None | list[str] = None) -> None:
+    args = parse_args(argv)
+    server = make_server(
+        '127.0.0.1', 0, StubLicenseManager(latency=args.lm_latency)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    lm_url = f'http://127.0.0.1:{server.server_address[1]}'
+    results = []
+    try:
+        for mode in MODES:
+            result = run_mode(mode, lm_url, args)
+            results.append(result)
+            print(
+                f'{mode:<5} {result["ops_per_sec"]:>9.1f} ops/s '
+                f'concurrency={result["concurrency"]:<7} '
+                f'p50={result["p50_ms"]:.1f}ms p95={result["p95_ms"]:.1f}ms',
+                file=sys.stderr,
+            )
+    finally:
+        server.shutdown()
+    report = dict(
+        meta=dict(
+            lm_latency=args.lm_latency,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            script_bytes=args.script_bytes,
+        ),
+        results=results,
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+"""Runs encoding throughput benchmarks and saves results as json
+
+Benchmarked targets:
+ - `build_template`: license independent encoding of script revision
+   (`ScriptEncodingService.get_template` with template cache disabled)
+ - `encode_script`: per request encoding with cached template
+   (`ScriptEncodingService.encode_script`)
+ - `generate_script`: full generation pipeline with artifact cache disabled
+   (`ScriptLicenseManagerService.generate_script`)
+
+Every case is run by `concurrency` threads until `iterations` operations are
+done or `max_seconds` passed. Peak memory is traced separately for a single
+round of `concurrency` simultaneous operations, allocations of encoding
+worker processes are not included
+"""
+import argparse
+import itertools
+import json
+import math
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks.services import (
+    SyntheticRepoService,
+    make_encoding_service,
+    make_executor,
+    make_slm_service,
+    synthetic_extra_params,
+)
+from scripts.services.script_license_manager_service.structures import (
+    EncodeType,
+    Script,
+    ScriptLicenseConfig,
+)
+
+TARGETS = ('build_template', 'encode_script', 'generate_script')
+SIZE_UNITS = {'K': 1024, 'M': 1024 * 1024}
+
+
+@dataclass
+class Case:
+    target: str
+    encode_type: None | str
+    script_bytes: int
+    extra_params_bytes: int
+    concurrency: int
+
+
+@dataclass
+class CaseResult(Case):
+    ops: int
+    seconds: float
+    ops_per_sec: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    peak_memory_bytes: int
+
+
+def parse_size(value: str) -> int:
+    """Parses size like `512`, `1K` or `10M` into bytes"""
+    value = value.strip().upper()
+    multiplier = SIZE_UNITS.get(value[-1:], 1)
+    if multiplier != 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def license_params(encode_type: EncodeType) -> tuple[None | str, None | date]:
+    with_key = encode_type in (EncodeType.ENCODED_LK, EncodeType.ENCODED_EXP_LK)
+    with_exp = encode_type in (
+        EncodeType.ENCODED_EXP, EncodeType.ENCODED_EXP_LK
+    )
+    return (
+        '0x12345678' if with_key else None,
+        date.today() + timedelta(days=30) if with_exp else None,
+    )
+
+
+def make_operation(case: Case, executor) -> Callable[[], object]:
+    repo_service = SyntheticRepoService(case.script_bytes)
+    source = repo_service.get_source('bench')
+    extra_params = synthetic_extra_params(case.extra_params_bytes)
+    if case.target == 'build_template':
+        encoding_service = make_encoding_service(
+            executor, template_cache=False
+        )
+        return lambda: encoding_service.get_template(source)
+
+    encode_type = EncodeType(case.encode_type)
+    license_key, expires = license_params(encode_type)
+    encoding_service = make_encoding_service(executor)
+    if case.target == 'encode_script':
+        return lambda: encoding_service.encode_script(
+            source, license_key, expires, extra_params
+        )
+
+    slm_service = make_slm_service(repo_service, encoding_service)
+    script = Script(id='bench')
+    return lambda: slm_service.generate_script(
+        script,
+        ScriptLicenseConfig(
+            encode=encode_type != EncodeType.PLAIN,
+            license_key=license_key,
+            expires=expires,
+            extra_params=extra_params,
+        ),
+    )
+
+
+def measure(
+    operation: Callable[[], object],
+    concurrency: int,
+    iterations: int,
+    max_seconds: float,
+) -> tuple[list[float], float]:
+    """Runs operation in threads, returns latencies and wall time"""
+    latencies = []
+    counter = itertools.count()
+    barrier = threading.Barrier(concurrency + 1)
+    deadline = None
+
+    def worker():
+        barrier.wait()
+        while next(counter) < iterations:
+            started = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - started)
+            if time.perf_counter() > deadline:
+                break
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    deadline = started + max_seconds
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+
+def trace_peak_memory(
+    operation: Callable[[], object],
+    concurrency: int
+) -> int:
+    tracemalloc.start()
+    try:
+        measure(operation, concurrency, iterations=concurrency, max_seconds=0)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(case: Case, executor, iterations: int, max_seconds: float):
+    operation = make_operation(case, executor)
+    operation()  # warm up: templates, imports, worker processes
+    latencies, seconds = measure(
+        operation, case.concurrency, iterations, max_seconds
+    )
+    latencies.sort()
+    return CaseResult(
+        **asdict(case),
+        ops=len(latencies),
+        seconds=round(seconds, 6),
+        ops_per_sec=round(len(latencies) / seconds, 3),
+        p50_ms=round(percentile(latencies, 50) * 1000, 4),
+        p95_ms=round(percentile(latencies, 95) * 1000, 4),
+        p99_ms=round(percentile(latencies, 99) * 1000, 4),
+        peak_memory_bytes=trace_peak_memory(operation, case.concurrency),
+    )
+
+
+def iter_cases(args) -> list[Case]:
+    cases = []
+    for target in args.targets:
+        if target == 'build_template':
+            encode_types = [None]
+            extra_params_sizes = [0]
+        else:
+            encode_types = [
+                encode_type for encode_type in args.encode_types
+                if not (
+                    target == 'encode_script'
+                    and encode_type == EncodeType.PLAIN.value
+                )
+            ]
+            extra_params_sizes = args.extra_params_sizes
+        for encode_type, script_bytes, extra_params_bytes, concurrency in (
+            itertools.product(
+                encode_types,
+                args.sizes,
+                extra_params_sizes,
+                args.concurrency,
+            )
+        ):
+            cases.append(Case(
+                target=target,
+                encode_type=encode_type,
+                script_bytes=script_bytes,
+                extra_params_bytes=extra_params_bytes,
+                concurrency=concurrency,
+            ))
+    return cases
+
+
+def git_revision() -> None | str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, check=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: None | list[str] = None) -> argparse.Namespace:
+    def size_list(value: str) -> list[int]:
+        return [parse_size(v) for v in value.split(',')]
+
+    def int_list(value: str) -> list[int]:
+        return [int(v) for v in value.split(',')]
+
+    def choice_list(choices):
+        def parse(value: str) -> list[str]:
+            values = value.split(',')
+            unknown = set(values) - set(choices)
+            if unknown:
+                raise argparse.ArgumentTypeError(
+                    f'unknown values: {", ".join(sorted(unknown))}'
+                )
+            return values
+        return parse
+
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.run',
+        description='Benchmarks script encoding throughput',
+    )
+    parser.add_argument(
+        '--output', help='Path to save json results to, stdout by default'
+    )
+    parser.add_argument(
+        '--targets', type=choice_list(TARGETS), default=list(TARGETS)
+    )
+    parser.add_argument(
+        '--encode-types',
+        type=choice_list([e.value for e in EncodeType]),
+        default=[e.value for e in EncodeType],
+    )
+    parser.add_argument(
+        '--sizes',
+        type=size_list,
+        default=size_list('1K,100K,1M,10M'),
+        help='Script sizes, e.g. 1K,10M',
+    )
+    parser.add_argument(
+        '--extra-params-sizes',
+        type=size_list,
+        default=size_list('0,10K'),
+        help='Approximate json sizes of extra params',
+    )
+    parser.add_argument(
+        '--concurrency', type=int_list, default=int_list('1,4')
+    )
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=200,
+        help='Max operations per case',
+    )
+    parser.add_argument(
+        '--max-seconds',
+        type=float,
+        default=2.,
+        help='Max time per case, every thread completes at least one op',
+    )
+    parser.add_argument(
+        '--executor', choices=('inline', 'process'), default='inline'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Encoding worker processes for process executor',
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: None | list[str] = None) -> None:
+    args = parse_args(argv)
+    executor = make_executor(args.executor, args.workers)
+    results = []
+    try:
+        for case in iter_cases(args):
+            result = run_case(case, executor, args.iterations, args.max_seconds)
+            results.append(result)
+            print(
+                f'{case.target:<16} {case.encode_type or "-":<15} '
+                f'script={case.script_bytes:<9} '
+                f'extra={case.extra_params_bytes:<7} '
+                f'threads={case.concurrency:<3} '
+                f'{result.ops_per_sec:>10.1f} ops/s '
+                f'p50={result.p50_ms:.3f}ms p95={result.p95_ms:.3f}ms '
+                f'p99={result.p99_ms:.3f}ms '
+                f'peak={result.peak_memory_bytes}B',
+                file=sys.stderr,
+            )
+    finally:
+        executor.shutdown()
+    report = dict(
+        meta=dict(
+            created_at=datetime.now(timezone.utc).isoformat(),
+            git_revision=git_revision(),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            executor=args.executor,
+            workers=args.workers if args.executor == 'process' else None,
+            iterations=args.iterations,
+            max_seconds=args.max_seconds,
+        ),
+        results=[asdict(result) for result in results],
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""App services wired for benchmarking
+
+Django is set up with project settings, but services are built from scratch:
+script sources are synthetic, license keys are classified locally and issued
+licenses are not stored
+"""
+import os
+
+import django
+
+os.environ.setdefault(
+    'DJANGO_SETTINGS_MODULE', 'script_license_manager.settings'
+)
+django.setup()
+
+from scripts.services.app_settings import AppSettings  # noqa: E402
+from scripts.services.artifact_cache import (  # noqa: E402
+    ArtifactCache,
+    MemoryArtifactStorage,
+)
+from scripts.services.encoding_service import (  # noqa: E402
+    InlineEncodingExecutor,
+    ProcessPoolEncodingExecutor,
+    ScriptEncodingService,
+)
+from scripts.services.license_key_service import (  # noqa: E402
+    LicenseKeyService,
+)
+from scripts.services.repo_service import (  # noqa: E402
+    RepoService,
+    ScriptSource,
+)
+from scripts.services.script_license_manager_service import (  # noqa: E402
+    ScriptLicenseManagerService,
+)
+
+
+def synthetic_source(size: int) -> bytes:
+    """Builds python source of whole lines at least `size` bytes long"""
+    lines = []
+    total = 0
+    i = 0
+    while total < size:
+        line = f'value_{i} = {i * 7919 % 100003}  # synthetic line\n'
+        lines.append(line.encode())
+        total += len(line)
+        i += 1
+    return b''.join(lines)
+
+
+def synthetic_extra_params(size: int) -> None | dict:
+    """Builds extra params which json representation is about `size` bytes"""
+    if size <= 0:
+        return None
+    value = 'x' * 32
+    # Each entry adds key, value, quotes and separators: ~50 bytes
+    return {f'param_{i:08d}': value for i in range(max(1, size // 50))}
+
+
+class SyntheticRepoService(RepoService):
+    """Repo serving synthetic script of given size for any script id"""
+
+    def __init__(self, size: int, revision: str = 'bench'):
+        super().__init__()
+        self._source = synthetic_source(size)
+        self._revision = revision
+
+    def get_revision(self, script_id: str) -> str:
+        return self._revision
+
+    def get_source(self, script_id: str) -> ScriptSource:
+        return ScriptSource(
+            script_id=script_id,
+            revision=self._revision,
+            filename='script.py',
+            data=self._source,
+        )
+
+
+class StaticLicenseKeyService:
+    """Classifies every license key the same way without upstream calls"""
+
+    def __init__(self, demo: bool = False):
+        self._demo = demo
+
+    def is_demo_key(self, license_key: str) -> bool:
+        return self._demo
+
+    async def ais_demo_key(self, license_key: str) -> bool:
+        return self._demo
+
+
+class NoAuditScriptLicenseManagerService(ScriptLicenseManagerService):
+    """Service which does not store issued licenses"""
+
+    def _finalize(self, script, config, action, demo) -> None:
+        pass
+
+    async def _afinalize(self, script, config, action, demo) -> None:
+        pass
+
+
+def make_executor(
+    kind: str,
+    workers: int,
+) -> InlineEncodingExecutor | ProcessPoolEncodingExecutor:
+    if kind == 'process':
+        return ProcessPoolEncodingExecutor(
+            workers=workers,
+            max_pending=workers * 64,
+            max_jobs_per_worker=1_000_000,
+        )
+    return InlineEncodingExecutor()
+
+
+def make_encoding_service(
+    executor: InlineEncodingExecutor | ProcessPoolEncodingExecutor,
+    template_cache: bool = True,
+) -> ScriptEncodingService:
+    """Builds encoding service, template cache can be disabled"""
+    return ScriptEncodingService(
+        executor=executor,
+        template_cache=make_cache(enabled=template_cache),
+        timeout=600,
+    )
+
+
+def make_slm_service(
+    repo_service: RepoService,
+    encoding_service: ScriptEncodingService,
+    lk_service: None | LicenseKeyService = None,
+) -> NoAuditScriptLicenseManagerService:
+    """Builds script license manager service with artifact cache disabled,
+    license keys are classified locally unless `lk_service` is given
+    """
+    return NoAuditScriptLicenseManagerService(
+        lk_service=lk_service or StaticLicenseKeyService(),
+        repo_service=repo_service,
+        encoding_service=encoding_service,
+        artifact_cache=make_cache(enabled=False),
+        app_settings=AppSettings(
+            demo_key_default_expiration_days=30,
+            demo_key_max_expiration_days=30,
+            user_key_max_expiration_days=365,
+            batch_generation_workers=1,
+            audit_not_modified=False,
+            artifact_content_encodings=(),
+            artifact_compression_min_bytes=0,
+        ),
+    )
+
+
+def make_cache(enabled: bool) -> ArtifactCache:
+    if not enabled:
+        return ArtifactCache(
+            memory=MemoryArtifactStorage(max_entries=0, max_bytes=0)
+        )
+    return ArtifactCache(
+        memory=MemoryArtifactStorage(
+            max_entries=1024, max_bytes=1024 * 1024 * 1024
+        )
+    )
@@ -11,4 +11,19 @@ then
     echo "PostgreSQL started"
 fi
 
+# Issued license partitions are created ahead of time, command is idempotent,
+# runs once at a time across replicas and should also be run periodically
+# (see README). App starts anyway, new records land in default partition
+if ! python manage.py manage_issued_license_partitions
+then
+    echo "Issued license partitions were not managed, see error above" >&2
+fi
+
+# Artifacts are shared with app processes through disk cache tiers
+# (ARTIFACT_CACHE_DIR, TEMPLATE_CACHE_DIR)
+if [ "$PREWARM_ARTIFACTS" = "TRUE" ]
+then
+    python manage.py prewarm_artifacts
+fi
+
 exec "$@"
\ No newline at end of file
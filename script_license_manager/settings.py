@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -145,5 +146,210 @@ DEMO_KEY_MAX_EXPIRATION_DAYS = int(os.environ.get(
 USER_KEY_MAX_EXPIRATION_DAYS = int(os.environ.get(
     'USER_KEY_MAX_EXPIRATION_DAYS', '30'
 ))
+BATCH_MAX_SCRIPTS = int(os.environ.get('BATCH_MAX_SCRIPTS', '50'))
+BATCH_GENERATION_WORKERS = int(os.environ.get(
+    'BATCH_GENERATION_WORKERS', '4'
+))
+# Record issued license when client already has actual script (304 response)
+AUDIT_NOT_MODIFIED = os.environ.get('AUDIT_NOT_MODIFIED', 'TRUE') == 'TRUE'
+# Write issued licenses behind requests: background thread inserts them in
+# batches of batch size or every flush interval, records are written
+# synchronously when queue is full. Permanent grants are always written at
+# once, queue is flushed at worker shutdown
+AUDIT_WRITE_BEHIND = os.environ.get('AUDIT_WRITE_BEHIND', 'FALSE') == 'TRUE'
+AUDIT_QUEUE_MAX_SIZE = int(os.environ.get('AUDIT_QUEUE_MAX_SIZE', '10000'))
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '500'))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.environ.get(
+    'AUDIT_FLUSH_INTERVAL_SECONDS', '1'
+))
+# Issued licenses table is partitioned by month with
+# `python manage.py manage_issued_license_partitions`, it is run on app start
+# and should be run periodically as well, e.g. with cron. Partitions are
+# created N months ahead, partitions older than retention months (including
+# records left in default partition) are detached and kept as archive tables
+# (all partitions are kept if retention is not set)
+ISSUED_LICENSE_PARTITIONS_AHEAD_MONTHS = int(os.environ.get(
+    'ISSUED_LICENSE_PARTITIONS_AHEAD_MONTHS', '3'
+))
+ISSUED_LICENSE_RETENTION_MONTHS = int(
+    os.environ.get('ISSUED_LICENSE_RETENTION_MONTHS') or 0
+) or None
+
+# License manager service, every license key is considered demo without it
+LM_SERVICE_URL = os.environ.get('LM_SERVICE_URL') or None
+LM_CONNECT_TIMEOUT_SECONDS = float(os.environ.get(
+    'LM_CONNECT_TIMEOUT_SECONDS', '1'
+))
+LM_READ_TIMEOUT_SECONDS = float(os.environ.get('LM_READ_TIMEOUT_SECONDS', '2'))
+LM_RETRIES = int(os.environ.get('LM_RETRIES', '2'))
+LM_RETRY_BACKOFF_SECONDS = float(os.environ.get(
+    'LM_RETRY_BACKOFF_SECONDS', '0.1'
+))
+LM_RETRY_BACKOFF_MAX_SECONDS = float(os.environ.get(
+    'LM_RETRY_BACKOFF_MAX_SECONDS', '1'
+))
+LM_POOL_MAXSIZE = int(os.environ.get('LM_POOL_MAXSIZE', '10'))
+# Max license keys classified by a single LM service request
+LM_CLASSIFY_BATCH_SIZE = int(os.environ.get('LM_CLASSIFY_BATCH_SIZE', '100'))
+# Circuit opens after this number of consecutive failed requests
+LM_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get(
+    'LM_CIRCUIT_FAILURE_THRESHOLD', '5'
+))
+LM_CIRCUIT_RESET_SECONDS = float(os.environ.get(
+    'LM_CIRCUIT_RESET_SECONDS', '30'
+))
+
+# Shared cache, local memory one is used if Redis is not configured
+REDIS_URL = os.environ.get('REDIS_URL') or None
+if REDIS_URL is not None:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Max license keys classified by a single classification API request
+LICENSE_KEY_CLASSIFY_MAX_KEYS = int(os.environ.get(
+    'LICENSE_KEY_CLASSIFY_MAX_KEYS', '500'
+))
+# License key classification cache settings, positive TTL is applied to demo
+# keys and negative one to non demo keys
+LICENSE_KEY_CACHE_ALIAS = os.environ.get('LICENSE_KEY_CACHE_ALIAS', 'default')
+LICENSE_KEY_CACHE_POSITIVE_TTL_SECONDS = int(os.environ.get(
+    'LICENSE_KEY_CACHE_POSITIVE_TTL_SECONDS', str(24 * 60 * 60)
+))
+LICENSE_KEY_CACHE_NEGATIVE_TTL_SECONDS = int(os.environ.get(
+    'LICENSE_KEY_CACHE_NEGATIVE_TTL_SECONDS', str(10 * 60)
+))
+LICENSE_KEY_CACHE_LOCAL_TTL_SECONDS = int(os.environ.get(
+    'LICENSE_KEY_CACHE_LOCAL_TTL_SECONDS', '60'
+))
+LICENSE_KEY_CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get(
+    'LICENSE_KEY_CACHE_LOCAL_MAX_ENTRIES', '10000'
+))
+# Shared entries are refreshed in background starting refresh-ahead seconds
+# before expiry, expired entries are served while refreshed for stale TTL
+# seconds, e.g. when LM service is unavailable
+LICENSE_KEY_CACHE_REFRESH_AHEAD_SECONDS = int(os.environ.get(
+    'LICENSE_KEY_CACHE_REFRESH_AHEAD_SECONDS', '60'
+))
+LICENSE_KEY_CACHE_STALE_TTL_SECONDS = int(os.environ.get(
+    'LICENSE_KEY_CACHE_STALE_TTL_SECONDS', str(60 * 60)
+))
+LICENSE_KEY_REFRESH_WORKERS = int(os.environ.get(
+    'LICENSE_KEY_REFRESH_WORKERS', '2'
+))
+# Lock coordinating license key lookups across processes expires after N
+# seconds, it should cover LM service request with retries
+LICENSE_KEY_LOOKUP_LOCK_TIMEOUT_SECONDS = float(os.environ.get(
+    'LICENSE_KEY_LOOKUP_LOCK_TIMEOUT_SECONDS', '8'
+))
+# Max time request waits for lookup done by other process before looking key
+# up itself, it should cover a typical LM service request
+LICENSE_KEY_LOOKUP_LOCK_WAIT_SECONDS = float(os.environ.get(
+    'LICENSE_KEY_LOOKUP_LOCK_WAIT_SECONDS', '0.5'
+))
+# Demo key ranges are synced from LM service every N seconds (0 disables the
+# range index), index not synced for max age is not used
+LICENSE_KEY_DEMO_RANGES_SYNC_SECONDS = float(os.environ.get(
+    'LICENSE_KEY_DEMO_RANGES_SYNC_SECONDS', '60'
+))
+LICENSE_KEY_DEMO_RANGES_MAX_AGE_SECONDS = float(os.environ.get(
+    'LICENSE_KEY_DEMO_RANGES_MAX_AGE_SECONDS', '600'
+))
+# Bloom filter of valid demo keys shared by app processes, it is built with
+# `python manage.py build_demo_key_filter` and should be rebuilt more often
+# than max age, older filter is not used
+LICENSE_KEY_DEMO_FILTER_PATH = (
+    os.environ.get('LICENSE_KEY_DEMO_FILTER_PATH') or None
+)
+LICENSE_KEY_DEMO_FILTER_FPR = float(os.environ.get(
+    'LICENSE_KEY_DEMO_FILTER_FPR', '0.001'
+))
+LICENSE_KEY_DEMO_FILTER_MAX_BYTES = int(os.environ.get(
+    'LICENSE_KEY_DEMO_FILTER_MAX_BYTES', str(64 * 1024 * 1024)
+))
+LICENSE_KEY_DEMO_FILTER_CHECK_SECONDS = float(os.environ.get(
+    'LICENSE_KEY_DEMO_FILTER_CHECK_SECONDS', '10'
+))
+LICENSE_KEY_DEMO_FILTER_MAX_AGE_SECONDS = float(os.environ.get(
+    'LICENSE_KEY_DEMO_FILTER_MAX_AGE_SECONDS', str(2 * 60 * 60)
+))
+
+# Artifact cache settings
+ARTIFACT_CACHE_MEMORY_MAX_ENTRIES = int(os.environ.get(
+    'ARTIFACT_CACHE_MEMORY_MAX_ENTRIES', '256'
+))
+ARTIFACT_CACHE_MEMORY_MAX_BYTES = int(os.environ.get(
+    'ARTIFACT_CACHE_MEMORY_MAX_BYTES', str(64 * 1024 * 1024)
+))
+ARTIFACT_CACHE_MEMORY_MAX_ITEM_BYTES = int(os.environ.get(
+    'ARTIFACT_CACHE_MEMORY_MAX_ITEM_BYTES', str(4 * 1024 * 1024)
+))
+ARTIFACT_CACHE_DIR = os.environ.get('ARTIFACT_CACHE_DIR') or None
+ARTIFACT_CACHE_DISK_MAX_BYTES = int(os.environ.get(
+    'ARTIFACT_CACHE_DISK_MAX_BYTES', str(1024 * 1024 * 1024)
+))
+# Compressed variants cached next to generated artifacts, in server preference
+# order. Artifacts smaller than min bytes are served uncompressed only
+ARTIFACT_CONTENT_ENCODINGS = tuple(
+    encoding.strip()
+    for encoding in os.environ.get(
+        'ARTIFACT_CONTENT_ENCODINGS', 'gzip,deflate'
+    ).split(',')
+    if encoding.strip()
+)
+ARTIFACT_COMPRESSION_MIN_BYTES = int(os.environ.get(
+    'ARTIFACT_COMPRESSION_MIN_BYTES', '1024'
+))
+
+# Encoding settings
+# `inline` encodes scripts in request thread, `process` - in worker processes
+ENCODING_EXECUTOR = os.environ.get('ENCODING_EXECUTOR', 'inline')
+ENCODING_WORKERS = int(os.environ.get('ENCODING_WORKERS', '2'))
+ENCODING_MAX_PENDING = int(os.environ.get('ENCODING_MAX_PENDING', '16'))
+ENCODING_MAX_JOBS_PER_WORKER = int(os.environ.get(
+    'ENCODING_MAX_JOBS_PER_WORKER', '100'
+))
+ENCODING_TIMEOUT_SECONDS = float(os.environ.get(
+    'ENCODING_TIMEOUT_SECONDS', '30'
+))
+# `spawn` runs sys.executable, it is set to python interpreter in uwsgi.ini
+ENCODING_START_METHOD = os.environ.get('ENCODING_START_METHOD', 'spawn')
 
-LM_SERVICE_URL = os.environ.get('LM_SERVICE_URL')
+# Encoded templates cache settings, disk tier lets uwsgi workers share them
+TEMPLATE_CACHE_MEMORY_MAX_ENTRIES = int(os.environ.get(
+    'TEMPLATE_CACHE_MEMORY_MAX_ENTRIES', '128'
+))
+TEMPLATE_CACHE_MEMORY_MAX_BYTES = int(os.environ.get(
+    'TEMPLATE_CACHE_MEMORY_MAX_BYTES', str(128 * 1024 * 1024)
+))
+TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR') or None
+TEMPLATE_CACHE_DISK_MAX_BYTES = int(os.environ.get(
+    'TEMPLATE_CACHE_DISK_MAX_BYTES', str(1024 * 1024 * 1024)
+))
+
+# Background generation jobs settings, 0 workers disables async mode
+GENERATION_JOBS_WORKERS = int(os.environ.get('GENERATION_JOBS_WORKERS', '2'))
+GENERATION_JOBS_DIR = os.environ.get(
+    'GENERATION_JOBS_DIR',
+    os.path.join(tempfile.gettempdir(), 'slm_generation_jobs')
+)
+GENERATION_JOBS_DISK_MAX_BYTES = int(os.environ.get(
+    'GENERATION_JOBS_DISK_MAX_BYTES', str(1024 * 1024 * 1024)
+))
+# Jobs queued or running per process, the rest are rejected with 503
+GENERATION_JOBS_MAX_PENDING = int(os.environ.get(
+    'GENERATION_JOBS_MAX_PENDING', '64'
+))
+# Jobs left unfinished for longer (e.g. by a dead worker) are failed
+GENERATION_JOBS_TIMEOUT_SECONDS = float(os.environ.get(
+    'GENERATION_JOBS_TIMEOUT_SECONDS', '600'
+))
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Category, IssuedLicense, Script, Tag
+from .models import Category, IssuedLicense, PermanentLicense, Script, Tag
 
 
 class ReadOnlyModelAdmin(admin.ModelAdmin):
@@ -46,6 +46,12 @@ class IssuedLicenseAdmin(ReadOnlyModelAdmin):
     ]
 
 
+class PermanentLicenseAdmin(ReadOnlyModelAdmin):
+    list_display = ['script_id', 'license_key', 'granted_at', 'last_issued_at']
+    list_filter = ['script']
+    search_fields = ['license_key']
+
+
 class TagAdmin(ReadOnlyModelAdmin):
     list_display = ['id', 'name', 'description']
     search_fields = ['name', 'description']
@@ -58,5 +64,6 @@ class CategoryAdmin(ReadOnlyModelAdmin):
 
 admin.site.register(Script, ScriptAdmin)
 admin.site.register(IssuedLicense, IssuedLicenseAdmin)
+admin.site.register(PermanentLicense, PermanentLicenseAdmin)
 admin.site.register(Tag, TagAdmin)
 admin.site.register(Category, CategoryAdmin)
@@ -0,0 +1,273 @@
+"""Async variants of `ScriptViewSet` generate actions
+
+Views are meant for ASGI deployment: license manager lookups and encoding
+jobs are awaited, so a worker keeps serving other requests while they are in
+progress. DRF views are synchronous, so these are Django async views reusing
+DRF request parsing, authentication, permissions and serializers. Script is
+fetched and issued license is stored with async ORM, authentication and
+permission checks are run in a thread as DRF authenticators and Django
+permission backends are synchronous. Asynchronous processing
+(`Prefer: respond-async`) is not supported, sync endpoints handle it
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import classonlymethod
+from django.utils.http import content_disposition_header, parse_etags
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import Script as ScriptModel
+from .permissions import (
+    CanForceIssueEncodedScript,
+    CanForceIssuePlainScript,
+    CanIssueEncodedScript,
+    CanIssuePlainScript,
+    IsDownloadableScript,
+)
+from .serializers import (
+    GenerateDemoEncodedRequestSerializer,
+    GenerateEncodedRequestSerializer,
+    GeneratePlainRequestSerializer,
+)
+from .services import lk_service, script_license_manager_service
+from .services.encoding_service import EncodingUnavailableError
+from .services.license_key_service import LicenseManagerUnavailableError
+from .services.script_license_manager_service import ArtifactNotModified
+from .services.script_license_manager_service.structures import (
+    GeneratedScript,
+    Script,
+    ScriptLicenseConfig,
+)
+from .views import ScriptFileResponseMixin
+
+
+class AsyncGenerateScriptView(ScriptFileResponseMixin, View):
+    """Generates script for `POST` request without blocking the event loop
+
+    Subclasses set request serializer, permissions and whether script is
+    encoded
+    """
+
+    http_method_names = ['post']
+    serializer_class = None
+    permission_classes = []
+    encode = False
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # CSRF is enforced by DRF session authentication, as in DRF views
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def post(self, request: HttpRequest, pk: str, *args, **kwargs):
+        request = Request(
+            request,
+            parsers=[
+                parser() for parser in api_settings.DEFAULT_PARSER_CLASSES
+            ],
+            authenticators=[
+                authenticator()
+                for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+            ],
+        )
+        try:
+            await sync_to_async(self._check_permissions)(request)
+            try:
+                script = await ScriptModel.objects.aget(pk=pk)
+            except ScriptModel.DoesNotExist:
+                raise exceptions.NotFound()
+            # User permissions are cached by the check above
+            self._check_object_permissions(request, script)
+            serializer = self.serializer_class(
+                data=request.data, context=script
+            )
+            valid = serializer.is_valid()
+        except exceptions.APIException as e:
+            return self._prepare_exception_response(request, e)
+        if not valid:
+            return JsonResponse(
+                serializer.errors, status=status.HTTP_400_BAD_REQUEST
+            )
+        return await self._issue_script(
+            request,
+            script=Script(id=script.id),
+            config=ScriptLicenseConfig(
+                encode=self.encode,
+                user_id=request.user.id,
+                **serializer.validated_data,
+            ),
+        )
+
+    async def _issue_script(
+        self,
+        request: Request,
+        script: Script,
+        config: ScriptLicenseConfig,
+    ) -> HttpResponse:
+        try:
+            generated = await script_license_manager_service.agenerate_script(
+                script=script,
+                config=config,
+                if_none_match=parse_etags(
+                    request.headers.get('If-None-Match', '')
+                ),
+                accept_encodings=self._get_accept_encodings(request),
+            )
+        except ArtifactNotModified as e:
+            return HttpResponse(
+                status=status.HTTP_304_NOT_MODIFIED,
+                headers={'ETag': e.etag, 'Vary': 'Accept-Encoding'},
+            )
+        except PermissionError as e:
+            return JsonResponse(
+                str(e), status=status.HTTP_403_FORBIDDEN, safe=False
+            )
+        except (
+            EncodingUnavailableError, LicenseManagerUnavailableError
+        ) as e:
+            return JsonResponse(
+                str(e), status=status.HTTP_503_SERVICE_UNAVAILABLE, safe=False
+            )
+        return await self._prepare_async_python_file_response(generated)
+
+    async def _prepare_async_python_file_response(
+        self,
+        generated: GeneratedScript
+    ) -> HttpResponse:
+        """Responds with generated script read into memory
+
+        ASGI handler reads synchronous streaming content into memory anyway,
+        so file backed artifact is read at once in a thread
+        """
+        data = generated.data
+        if data is None:
+            data = await asyncio.to_thread(b''.join, generated.iter_chunks())
+        response = HttpResponse(
+            data,
+            content_type='text/x-python',
+            headers={
+                **self._python_file_headers(generated),
+                'Content-Length': str(len(data)),
+                'Content-Disposition': content_disposition_header(
+                    True, generated.filename
+                ),
+            },
+        )
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def _check_permissions(self, request: Request) -> None:
+        """Authenticates request and checks view permissions as DRF does"""
+        for permission in self._get_permissions():
+            if not permission.has_permission(request, self):
+                self._permission_denied(request, permission)
+
+    def _check_object_permissions(
+        self,
+        request: Request,
+        script: ScriptModel
+    ) -> None:
+        for permission in self._get_permissions():
+            if not permission.has_object_permission(request, self, script):
+                self._permission_denied(request, permission)
+
+    def _get_permissions(self) -> list:
+        return [permission() for permission in self.permission_classes]
+
+    @staticmethod
+    def _permission_denied(request: Request, permission) -> None:
+        if request.authenticators and not request.successful_authenticator:
+            raise exceptions.NotAuthenticated()
+        raise exceptions.PermissionDenied(
+            detail=getattr(permission, 'message', None),
+            code=getattr(permission, 'code', None),
+        )
+
+    @staticmethod
+    def _prepare_exception_response(
+        request: Request,
+        exc: exceptions.APIException
+    ) -> JsonResponse:
+        """Renders DRF exception the way DRF exception handler does"""
+        headers = {}
+        status_code = exc.status_code
+        if isinstance(
+            exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        ):
+            authenticate_header = None
+            if request.authenticators:
+                authenticate_header = (
+                    request.authenticators[0].authenticate_header(request)
+                )
+            if authenticate_header:
+                headers['WWW-Authenticate'] = authenticate_header
+            else:
+                status_code = status.HTTP_403_FORBIDDEN
+        data = exc.detail
+        if not isinstance(data, (list, dict)):
+            data = dict(detail=data)
+        return JsonResponse(
+            data, status=status_code, headers=headers, safe=False
+        )
+
+
+class AsyncGeneratePlainView(AsyncGenerateScriptView):
+    """Async `ScriptViewSet.generate_plain`"""
+
+    serializer_class = GeneratePlainRequestSerializer
+    permission_classes = [
+        IsAuthenticated,
+        IsDownloadableScript,
+        CanForceIssuePlainScript | CanIssuePlainScript
+    ]
+    encode = False
+
+
+class AsyncGenerateEncodedView(AsyncGenerateScriptView):
+    """Async `ScriptViewSet.generate_encoded`"""
+
+    serializer_class = GenerateEncodedRequestSerializer
+    permission_classes = [
+        IsAuthenticated,
+        IsDownloadableScript,
+        CanForceIssueEncodedScript | CanIssueEncodedScript
+    ]
+    encode = True
+
+
+class AsyncGenerateDemoEncodedView(AsyncGenerateScriptView):
+    """Async `ScriptViewSet.generate_demo_encoded`"""
+
+    serializer_class = GenerateDemoEncodedRequestSerializer
+    permission_classes = [
+        AllowAny,
+        IsDownloadableScript,
+        CanForceIssueEncodedScript | CanIssueEncodedScript
+    ]
+    encode = True
+
+    async def _issue_script(
+        self,
+        request: Request,
+        script: Script,
+        config: ScriptLicenseConfig,
+    ) -> HttpResponse:
+        try:
+            config.demo = await lk_service.ais_demo_key(config.license_key)
+        except LicenseManagerUnavailableError as e:
+            return JsonResponse(
+                str(e), status=status.HTTP_503_SERVICE_UNAVAILABLE, safe=False
+            )
+        if not config.demo:
+            return JsonResponse(
+                'Cannot issue license for not demo key',
+                status=status.HTTP_403_FORBIDDEN,
+                safe=False,
+            )
+        return await super()._issue_script(request, script, config)
@@ -0,0 +1,56 @@
+"""Script encoding routines
+
+Module is kept free of Django and app services imports, so its functions can
+be executed in encoding worker processes.
+
+Encoding is split into two phases:
+ - `build_template` does the expensive license independent work once per
+   script revision
+ - `stamp` injects license data into the template, it is cheap enough to be
+   run per request
+"""
+import os
+from datetime import date
+
+# Version of encoded output format, it is a part of template and artifact
+# cache keys, so it should be bumped whenever encoded output changes
+ENCODER_VERSION = '1'
+
+
+def build_template(source: bytes) -> bytes:
+    """Encodes script source without license data
+
+    Source is not obfuscated, template is the source as is and license data
+    is prepended to it by `stamp`
+    """
+    return source
+
+
+def stamp(
+    template: bytes,
+    license_key: None | str,
+    expires: None | date,
+    extra_params: None | dict,
+) -> bytes:
+    """Injects license data into encoded script template"""
+    license_data = dict(
+        license_key=license_key,
+        expires=None if expires is None else expires.isoformat(),
+        extra_params=extra_params,
+    )
+    return b''.join((f'__license__ = {license_data!r}\n'.encode(), template))
+
+
+def encode(
+    source: bytes,
+    license_key: None | str,
+    expires: None | date,
+    extra_params: None | dict,
+) -> bytes:
+    """Encodes script source with given license params"""
+    return stamp(build_template(source), license_key, expires, extra_params)
+
+
+def report_worker_pid(pids) -> None:
+    """Initializer of encoding worker, puts its pid to `pids` queue"""
+    pids.put(os.getpid())
@@ -1,7 +1,11 @@
-from django_filters import CharFilter
+from django_filters import (
+    CharFilter,
+    DateFromToRangeFilter,
+    IsoDateTimeFromToRangeFilter,
+)
 from django_filters.rest_framework import FilterSet
 
-from .models import Script
+from .models import IssuedLicense, Script
 
 
 class ScriptFilter(FilterSet):
@@ -13,3 +17,24 @@ class ScriptFilter(FilterSet):
     class Meta:
         model = Script
         fields = ['category', 'enabled', 'is_active', 'tag', 'without_tag']
+
+
+class IssuedLicenseFilter(FilterSet):
+    """Filtering issued licenses requests with get params
+
+    Ranges are given with `_after` and `_before` suffixes, e.g.
+    `issued_at_after`, bounds are inclusive. Script and user are filtered by
+    id and username the list shows, without looking them up
+    """
+
+    script = CharFilter(field_name='script_id')
+    issued_by = CharFilter(field_name='issued_by__username')
+    issued_at = IsoDateTimeFromToRangeFilter()
+    expires = DateFromToRangeFilter()
+
+    class Meta:
+        model = IssuedLicense
+        fields = [
+            'script', 'license_key', 'issue_type', 'action', 'demo_lk',
+            'issued_by', 'issued_at', 'expires',
+        ]
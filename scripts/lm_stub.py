@@ -0,0 +1,245 @@
+"""Local stub of license manager service
+
+Stub implements license manager API used by the app, so license key lookups
+can be tested and load-tested offline:
+ - `GET /license_keys/<license_key>/` responds with `{"license_key": ...,
+   "demo": ...}`, keys listed as unknown get 404
+ - `POST /license_keys/classify/` with `{"license_keys": [...]}` responds
+   with `{"demo": {<license_key>: ...}}`, unknown keys are omitted
+ - `GET /demo_ranges/?since=<version>` responds with demo key ranges added
+   and removed after version, full list of ranges is returned without
+   `since`
+ - `GET /demo_keys/?after=<license_key>&limit=<n>` responds with page of
+   keys within demo ranges `{"license_keys": [...], "next": ..., "total":
+   ...}`
+
+Demo keys are the ones within `demo_ranges`, by default all USB keys
+(`0x00000000`) are demo and serial keys (`0000-0000-0000-0000`) are not.
+Every response is delayed by `latency` plus random `jitter` seconds and
+fails with 503 with `error_rate` probability. Module is kept free of Django
+imports, run it with `python manage.py run_lm_stub`
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class StubLicenseManager:
+    """Stub behaviour, settings can be changed while server is running"""
+
+    def __init__(
+        self,
+        latency: float = 0.,
+        jitter: float = 0.,
+        error_rate: float = 0.,
+        unknown_keys: frozenset[str] = frozenset(),
+        demo_ranges: tuple[tuple[str, str], ...] = (
+            ('0x00000000', '0xffffffff'),
+        ),
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.unknown_keys = unknown_keys
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._demo_ranges = set(demo_ranges)
+        # Changed ranges, ranges version is the log length
+        self._range_log: list[tuple[str, str]] = []
+
+    @staticmethod
+    def _normalize(license_key: str) -> str:
+        """Fixed width lower case key, such keys are ordered as numbers"""
+        license_key = license_key.lower()
+        if len(license_key) == 8:
+            return f'0x{license_key}'
+        if len(license_key) == 10:
+            return f'0x{license_key[2:]}'
+        return license_key
+
+    def is_demo_key(self, license_key: str) -> bool:
+        license_key = self._normalize(license_key)
+        with self._lock:
+            return any(
+                len(first) == len(license_key)
+                and first <= license_key <= last
+                for first, last in self._demo_ranges
+            )
+
+    def add_demo_range(self, first: str, last: str) -> None:
+        self._change_demo_range((first, last), added=True)
+
+    def remove_demo_range(self, first: str, last: str) -> None:
+        self._change_demo_range((first, last), added=False)
+
+    def _change_demo_range(self, demo_range: tuple[str, str], added: bool):
+        with self._lock:
+            if added:
+                self._demo_ranges.add(demo_range)
+            else:
+                self._demo_ranges.discard(demo_range)
+            self._range_log.append(demo_range)
+
+    def demo_ranges_since(self, since: None | int) -> dict:
+        with self._lock:
+            version = len(self._range_log)
+            if since is None or not 0 <= since <= version:
+                return dict(
+                    version=version,
+                    full=True,
+                    added=sorted(self._demo_ranges),
+                    removed=[],
+                )
+            changed = set(self._range_log[since:])
+            return dict(
+                version=version,
+                full=False,
+                added=sorted(changed & self._demo_ranges),
+                removed=sorted(changed - self._demo_ranges),
+            )
+
+    def demo_keys_page(self, after: None | str, limit: int) -> dict:
+        """Lists keys within demo ranges, USB keys go before serial ones"""
+        after = None if after is None else self._normalize(after)
+        with self._lock:
+            ranges = self._merged_demo_ranges()
+        total = sum(last - first + 1 for _, first, last in ranges)
+        license_keys = []
+        has_more = False
+        for i, (width, first, last) in enumerate(ranges):
+            if after is not None:
+                if width < len(after):
+                    continue
+                if width == len(after):
+                    first = max(first, self._key_value(after) + 1)
+            value = first
+            while value <= last and len(license_keys) < limit:
+                license_keys.append(self._format_key(width, value))
+                value += 1
+            if len(license_keys) == limit:
+                has_more = value <= last or i < len(ranges) - 1
+                break
+        return dict(
+            license_keys=license_keys,
+            next=license_keys[-1] if has_more else None,
+            total=total,
+        )
+
+    def _merged_demo_ranges(self) -> list[tuple[int, int, int]]:
+        """Disjoint demo ranges as sorted (key width, first, last) values"""
+        ranges = sorted(
+            (len(first), self._key_value(first), self._key_value(last))
+            for first, last in self._demo_ranges
+        )
+        merged = []
+        for width, first, last in ranges:
+            if merged and merged[-1][0] == width and first <= merged[-1][2] + 1:
+                merged[-1] = (width, merged[-1][1], max(merged[-1][2], last))
+            else:
+                merged.append((width, first, last))
+        return merged
+
+    @staticmethod
+    def _key_value(license_key: str) -> int:
+        return int(license_key.removeprefix('0x').replace('-', ''), 16)
+
+    @staticmethod
+    def _format_key(width: int, value: int) -> str:
+        if width == 10:
+            return f'0x{value:08x}'
+        digits = f'{value:016x}'
+        return '-'.join(digits[i:i + 4] for i in range(0, 16, 4))
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        body: None | dict = None,
+    ) -> tuple[int, None | dict]:
+        """Returns response status and json body"""
+        with self._lock:
+            self.requests += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if random.random() < self.error_rate:
+            return 503, dict(detail='Injected error')
+        url = urlsplit(path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        if method == 'GET' and len(parts) == 2 and parts[0] == 'license_keys':
+            license_key = parts[1]
+            if license_key in self.unknown_keys:
+                return 404, dict(detail='Not found')
+            return 200, dict(
+                license_key=license_key, demo=self.is_demo_key(license_key)
+            )
+        if method == 'POST' and parts == ['license_keys', 'classify']:
+            try:
+                license_keys = list(body['license_keys'])
+            except (TypeError, KeyError):
+                return 400, dict(detail='Expected `license_keys` list')
+            return 200, dict(demo={
+                license_key: self.is_demo_key(license_key)
+                for license_key in license_keys
+                if license_key not in self.unknown_keys
+            })
+        if method == 'GET' and parts == ['demo_ranges']:
+            since = parse_qs(url.query).get('since')
+            try:
+                since = None if since is None else int(since[0])
+            except ValueError:
+                return 400, dict(detail='Expected integer `since`')
+            return 200, self.demo_ranges_since(since)
+        if method == 'GET' and parts == ['demo_keys']:
+            query = parse_qs(url.query)
+            try:
+                limit = int(query.get('limit', ['1000'])[0])
+            except ValueError:
+                return 400, dict(detail='Expected integer `limit`')
+            after = query.get('after', [None])[0]
+            return 200, self.demo_keys_page(after, max(limit, 1))
+        return 404, dict(detail='Not found')
+
+
+def make_server(
+    host: str,
+    port: int,
+    stub: StubLicenseManager
+) -> ThreadingHTTPServer:
+    """Builds threaded keep-alive server, port 0 picks a free one"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self._respond(*stub.handle('GET', self.path))
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or 'null')
+            except ValueError:
+                body = None
+            self._respond(*stub.handle('POST', self.path, body))
+
+        def _respond(self, status: int, body: None | dict):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except ConnectionError:
+                # Client has given up waiting, e.g. on read timeout
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scripts.services import lk_service
+
+
+class Command(BaseCommand):
+    help = (
+        'Builds Bloom filter of valid demo keys listed by license manager '
+        'service, app processes pick it up from LICENSE_KEY_DEMO_FILTER_PATH. '
+        'Run it periodically, e.g. with cron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=settings.LICENSE_KEY_DEMO_FILTER_PATH,
+            help='Filter file, LICENSE_KEY_DEMO_FILTER_PATH by default',
+        )
+        parser.add_argument(
+            '--fpr',
+            type=float,
+            default=settings.LICENSE_KEY_DEMO_FILTER_FPR,
+            help='Target false positive rate',
+        )
+        parser.add_argument(
+            '--max-bytes',
+            type=int,
+            default=settings.LICENSE_KEY_DEMO_FILTER_MAX_BYTES,
+            help='Memory budget of the filter',
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=10000,
+            help='Number of demo keys requested from LM service at once',
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] is None:
+            raise CommandError(
+                'Filter path is not set (LICENSE_KEY_DEMO_FILTER_PATH)'
+            )
+        started = time.perf_counter()
+        try:
+            bloom_filter = lk_service.build_demo_key_filter(
+                path=options['path'],
+                fpr=options['fpr'],
+                max_bytes=options['max_bytes'],
+                page_size=options['page_size'],
+            )
+        except (RuntimeError, ValueError) as e:
+            # LM service errors are runtime ones too
+            raise CommandError(f'Failed to build demo key filter: {e}')
+        elapsed = time.perf_counter() - started
+        if (
+            bloom_filter.size >= options['max_bytes']
+            and bloom_filter.fpr > options['fpr']
+        ):
+            self.stderr.write(self.style.WARNING(
+                f'Memory budget of {options["max_bytes"]} bytes does not fit '
+                f'target false positive rate {options["fpr"]}'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Demo key filter of {bloom_filter.count} keys '
+            f'({bloom_filter.size} bytes, {bloom_filter.num_hashes} hashes, '
+            f'expected false positive rate {bloom_filter.fpr:.6f}) '
+            f'is saved to {options["path"]} in {elapsed:.1f} s'
+        ))
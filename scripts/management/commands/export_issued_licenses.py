@@ -0,0 +1,107 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import QuerySet
+from django.http import HttpRequest, QueryDict
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+from scripts.export import export_issued_licenses, gzip_chunks
+from scripts.views import IssuedLicenseViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        'Streams issued licenses to CSV or NDJSON file, optionally gzip '
+        'compressed. Records are fetched from server-side cursor, so memory '
+        'use does not depend on number of exported records'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output',
+            help='File to export issued licenses to, `-` for stdout',
+        )
+        parser.add_argument(
+            '--export-format',
+            choices=['csv', 'ndjson'],
+            default='csv',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Compress output with gzip',
+        )
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='NAME=VALUE',
+            help='Issued licenses list filter, may be given several times',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IssuedLicenseViewSet.export_chunk_size,
+            help='Number of records fetched from database at once',
+        )
+
+    def handle(self, *args, **options):
+        queryset = self._filter_queryset(options['filter'])
+        chunks = export_issued_licenses(
+            queryset,
+            options['export_format'],
+            chunk_size=options['chunk_size'],
+        )
+        if options['gzip']:
+            chunks = gzip_chunks(chunks)
+
+        started = time.perf_counter()
+        size = 0
+        if options['output'] == '-':
+            output = sys.stdout.buffer
+        else:
+            output = open(options['output'], 'wb')
+        try:
+            # Server-side cursor is not materialized within a transaction
+            with transaction.atomic():
+                for chunk in chunks:
+                    output.write(chunk)
+                    size += len(chunk)
+        finally:
+            if output is sys.stdout.buffer:
+                output.flush()
+            else:
+                output.close()
+        elapsed = time.perf_counter() - started
+        # Summary goes to stderr, as stdout may hold exported records
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {size} bytes to {options["output"]} in {elapsed:.1f} s'
+        ))
+
+    @staticmethod
+    def _filter_queryset(filters: list[str]) -> QuerySet:
+        """Filters issued licenses as list view does with query params"""
+        query_params = QueryDict(mutable=True)
+        for item in filters:
+            name, separator, value = item.partition('=')
+            if not separator:
+                raise CommandError(
+                    f'Filter should be given as NAME=VALUE, got `{item}`'
+                )
+            query_params.appendlist(name, value)
+        http_request = HttpRequest()
+        http_request.GET = query_params
+        view = IssuedLicenseViewSet(
+            request=Request(http_request),
+            format_kwarg=None,
+            action='export',
+            args=(),
+            kwargs={},
+        )
+        try:
+            return view.filter_queryset(view.get_queryset())
+        except ValidationError as e:
+            raise CommandError(f'Invalid filters: {e.detail}')
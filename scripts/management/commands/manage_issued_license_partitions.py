@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.utils import timezone
+
+from scripts.services.script_license_manager_service.storage_adapters import (
+    IssuedLicensePartitionDAO,
+)
+from scripts.services.script_license_manager_service.structures import (
+    IssuedLicensePartition,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates monthly partitions of issued licenses ahead of time and for '
+        'records stored in default partition, detaches partitions older than '
+        'retention, detached partitions are kept as archive tables unless '
+        'dropped. Permanent license registry is not affected. It is run on '
+        'app start, run it periodically as well, e.g. with cron. Concurrent '
+        'runs are skipped'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=settings.ISSUED_LICENSE_PARTITIONS_AHEAD_MONTHS,
+            help='Number of months to create partitions for ahead of the '
+                 'current one, ISSUED_LICENSE_PARTITIONS_AHEAD_MONTHS by '
+                 'default',
+        )
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=settings.ISSUED_LICENSE_RETENTION_MONTHS,
+            help='Partitions of months ended more than N months ago are '
+                 'detached, ISSUED_LICENSE_RETENTION_MONTHS by default, '
+                 'all partitions are kept if not set',
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop detached partitions older than retention instead of '
+                 'keeping them as archive tables',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only print what would be done',
+        )
+
+    def handle(self, *args, **options):
+        if options['ahead'] < 0:
+            raise CommandError('Months ahead can not be negative')
+        if options['retention_months'] is not None and (
+            options['retention_months'] < 1
+        ):
+            raise CommandError('Retention should be at least 1 month')
+        if options['drop'] and options['retention_months'] is None:
+            raise CommandError('Retention is required to drop partitions')
+
+        executor = MigrationExecutor(connection)
+        if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+            raise CommandError(
+                'Database has unapplied migrations, run `migrate` first'
+            )
+        with IssuedLicensePartitionDAO.maintenance_lock() as locked:
+            if not locked:
+                self.stdout.write(
+                    'Partitions are managed by another process, skipped'
+                )
+                return
+            self._manage_partitions(options)
+
+    def _manage_partitions(self, options):
+        dao = IssuedLicensePartitionDAO
+        current = timezone.now().date().replace(day=1)
+        partitions = dao.list_partitions()
+        existing = {p.month: p for p in partitions}
+        dry_run = options['dry_run']
+
+        # Records have landed in default partition if partitions have not
+        # been created in time, they are moved to partitions of their months
+        months = {
+            dao.shift_month(current, shift)
+            for shift in range(options['ahead'] + 1)
+        }
+        months.update(dao.default_partition_months())
+        for month in sorted(months):
+            name = dao.partition_name(month)
+            partition = existing.get(month)
+            if partition is not None and partition.attached:
+                continue
+            if partition is not None:
+                if dry_run:
+                    self.stdout.write(
+                        f'Would move records from default partition to {name}'
+                    )
+                    continue
+                moved = dao.archive_default_records(month)
+                self.stdout.write(
+                    f'Moved {moved} records from default partition to {name}'
+                )
+                continue
+            if dry_run:
+                self.stdout.write(f'Would create {name}')
+            else:
+                moved = dao.create_partition(month)
+                self.stdout.write(
+                    f'Created {name}, {moved} records moved from default '
+                    f'partition'
+                )
+            partitions.append(IssuedLicensePartition(
+                name=name, month=month, attached=True
+            ))
+
+        if options['retention_months'] is None:
+            return
+        cutoff = dao.shift_month(current, -options['retention_months'])
+        for partition in partitions:
+            if partition.month >= cutoff:
+                continue
+            if partition.attached:
+                if not dry_run:
+                    dao.detach_partition(partition.name)
+                self.stdout.write(
+                    f'{"Would detach" if dry_run else "Detached"} '
+                    f'{partition.name}'
+                )
+            if options['drop']:
+                if not dry_run:
+                    dao.drop_partition(partition.name)
+                self.stdout.write(
+                    f'{"Would drop" if dry_run else "Dropped"} '
+                    f'{partition.name}'
+                )
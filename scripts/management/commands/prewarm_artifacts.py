@@ -0,0 +1,86 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scripts.models import Script as ScriptModel
+from scripts.services import (
+    script_encoding_service,
+    script_license_manager_service,
+)
+from scripts.services.script_license_manager_service.structures import Script
+
+
+class Command(BaseCommand):
+    help = (
+        'Builds license independent artifacts (encoding template, PLAIN and '
+        'ENCODED scripts) of active and enabled scripts into caches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'script_ids',
+            nargs='*',
+            help='Scripts to pre-warm, all active and enabled by default',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of scripts pre-warmed in parallel',
+        )
+
+    def handle(self, *args, **options):
+        if not (
+            script_license_manager_service.artifact_cache.persistent
+            and script_encoding_service.template_cache.persistent
+        ):
+            self.stderr.write(self.style.WARNING(
+                'Artifact or template cache has no disk tier '
+                '(ARTIFACT_CACHE_DIR, TEMPLATE_CACHE_DIR), artifacts built '
+                'by this command are not shared with app processes'
+            ))
+        queryset = ScriptModel.objects.filter(is_active=True, enabled=True)
+        if options['script_ids']:
+            queryset = queryset.filter(id__in=options['script_ids'])
+        script_ids = list(queryset.order_by('id').values_list('id', flat=True))
+
+        started = time.perf_counter()
+        timings = {}
+        failed = []
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {
+                executor.submit(self._prewarm, script_id): script_id
+                for script_id in script_ids
+            }
+            for future in as_completed(futures):
+                script_id = futures[future]
+                try:
+                    timings[script_id] = future.result()
+                except Exception as e:
+                    failed.append(script_id)
+                    self.stderr.write(self.style.ERROR(
+                        f'{script_id}: failed: {e}'
+                    ))
+                else:
+                    self.stdout.write(
+                        f'{script_id}: {timings[script_id]:.3f}s'
+                    )
+        elapsed = time.perf_counter() - started
+
+        summary = (
+            f'Pre-warmed {len(timings)} of {len(script_ids)} scripts '
+            f'in {elapsed:.3f}s'
+        )
+        if timings:
+            slowest = max(timings, key=timings.get)
+            summary += f', slowest {slowest}: {timings[slowest]:.3f}s'
+        self.stdout.write(self.style.SUCCESS(summary))
+        if failed:
+            raise CommandError(f'Failed to pre-warm: {", ".join(failed)}')
+
+    @staticmethod
+    def _prewarm(script_id: str) -> float:
+        started = time.perf_counter()
+        script_license_manager_service.prewarm_script(Script(id=script_id))
+        return time.perf_counter() - started
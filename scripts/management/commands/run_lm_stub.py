@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from scripts.lm_stub import StubLicenseManager, make_server
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs local stub of license manager service with configurable '
+        'latency and error injection'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.,
+            help='Response delay in seconds',
+        )
+        parser.add_argument(
+            '--jitter',
+            type=float,
+            default=0.,
+            help='Max random delay in seconds added to latency',
+        )
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0.,
+            help='Probability of 503 response',
+        )
+        parser.add_argument(
+            '--unknown-key',
+            action='append',
+            default=[],
+            help='License key to respond with 404 to, can be repeated',
+        )
+        parser.add_argument(
+            '--demo-range',
+            action='append',
+            default=[],
+            metavar='FIRST:LAST',
+            help=(
+                'Inclusive range of demo keys, can be repeated, all USB keys '
+                'are demo ones by default'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        params = {}
+        if options['demo_range']:
+            demo_ranges = []
+            for demo_range in options['demo_range']:
+                try:
+                    first, last = demo_range.split(':')
+                except ValueError:
+                    raise CommandError(
+                        f'Expected `FIRST:LAST` demo range, got {demo_range}'
+                    )
+                demo_ranges.append((first, last))
+            params.update(demo_ranges=tuple(demo_ranges))
+        stub = StubLicenseManager(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            unknown_keys=frozenset(options['unknown_key']),
+            **params,
+        )
+        server = make_server(options['host'], options['port'], stub)
+        host, port = server.server_address[:2]
+        self.stdout.write(f'License manager stub is listening on {host}:{port}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:20
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('demo', models.BooleanField(default=False)),
+                ('action', models.CharField(choices=[('GENERATE', 'Generate script'), ('UPDATE', 'Update issued script license')])),
+                ('status', models.CharField(choices=[('PENDING', 'Waiting for worker'), ('RUNNING', 'Script is being generated'), ('SUCCEEDED', 'Script is ready to download'), ('FAILED', 'Script generation failed')], default='PENDING')),
+                ('created_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(null=True)),
+                ('filename', models.CharField(null=True)),
+                ('error', models.CharField(null=True)),
+                ('issued_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('script', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='scripts.script')),
+            ],
+            options={
+                'db_table': 'scripts_generation_job',
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+
+def backfill_permanent_licenses(apps, schema_editor):
+    IssuedLicense = apps.get_model('scripts', 'IssuedLicense')
+    PermanentLicense = apps.get_model('scripts', 'PermanentLicense')
+
+    permanent = (
+        IssuedLicense.objects
+        .filter(expires=None, license_key__isnull=False)
+        .order_by()
+        .values('script_id', 'license_key')
+        .annotate(
+            granted_at=Min('issued_at'), last_issued_at=Max('issued_at')
+        )
+    )
+    batch = []
+    for row in permanent.iterator(chunk_size=2000):
+        batch.append(PermanentLicense(**row))
+        if len(batch) == 2000:
+            PermanentLicense.objects.bulk_create(batch)
+            batch = []
+    PermanentLicense.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0002_generation_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PermanentLicense',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('license_key', models.CharField()),
+                ('granted_at', models.DateTimeField()),
+                ('last_issued_at', models.DateTimeField()),
+                ('script', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='scripts.script')),
+            ],
+            options={
+                'db_table': 'scripts_permanent_license',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='permanentlicense',
+            constraint=models.UniqueConstraint(fields=('script', 'license_key'), name='scripts_permanent_license_script_lk_uniq'),
+        ),
+        migrations.RunPython(
+            code=backfill_permanent_licenses,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,137 @@
+from django.db import migrations
+
+# Issued licenses table is converted to range partitions by `issued_at` month.
+# Primary key of partitioned table has to include partition key, so it is
+# (id, issued_at), and ids come from a sequence owned by the table as identity
+# columns of partitioned tables are not supported before Postgres 17. Monthly
+# partitions are created from the oldest record month to 3 months ahead,
+# records out of them go to default partition. Further partitions are managed
+# with `python manage.py manage_issued_license_partitions`
+COLUMNS = (
+    'id, issued_at, license_key, issue_type, action, demo_lk, expires, '
+    'extra_params, issued_by_id, script_id'
+)
+
+CONSTRAINTS_AND_INDEXES = '''
+ALTER TABLE scripts_issued_license
+    ADD CONSTRAINT scripts_issued_license_issued_by_id_ab716ae8_fk_auth_user_id
+    FOREIGN KEY (issued_by_id) REFERENCES auth_user (id)
+    DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE scripts_issued_license
+    ADD CONSTRAINT scripts_issued_license_script_id_0b5c0f36_fk_scripts_script_id
+    FOREIGN KEY (script_id) REFERENCES scripts_script (id)
+    DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX scripts_issued_license_issued_by_id_ab716ae8
+    ON scripts_issued_license (issued_by_id);
+CREATE INDEX scripts_issued_license_script_id_0b5c0f36
+    ON scripts_issued_license (script_id);
+CREATE INDEX scripts_issued_license_script_id_0b5c0f36_like
+    ON scripts_issued_license (script_id varchar_pattern_ops);
+'''
+
+PARTITION_SQL = f'''
+ALTER TABLE scripts_issued_license RENAME TO scripts_issued_license_unpartitioned;
+ALTER TABLE scripts_issued_license_unpartitioned ALTER COLUMN id DROP IDENTITY;
+ALTER TABLE scripts_issued_license_unpartitioned
+    DROP CONSTRAINT scripts_issued_license_issued_by_id_ab716ae8_fk_auth_user_id;
+ALTER TABLE scripts_issued_license_unpartitioned
+    DROP CONSTRAINT scripts_issued_license_script_id_0b5c0f36_fk_scripts_script_id;
+DROP INDEX scripts_issued_license_issued_by_id_ab716ae8;
+DROP INDEX scripts_issued_license_script_id_0b5c0f36;
+DROP INDEX scripts_issued_license_script_id_0b5c0f36_like;
+
+CREATE SEQUENCE scripts_issued_license_id_seq AS bigint;
+CREATE TABLE scripts_issued_license (
+    id bigint NOT NULL DEFAULT nextval('scripts_issued_license_id_seq'),
+    issued_at timestamp with time zone NOT NULL,
+    license_key varchar NULL,
+    issue_type varchar NOT NULL,
+    action varchar NOT NULL,
+    demo_lk boolean NOT NULL,
+    expires date NULL,
+    extra_params jsonb NULL,
+    issued_by_id integer NULL,
+    script_id varchar(100) NOT NULL,
+    PRIMARY KEY (id, issued_at)
+) PARTITION BY RANGE (issued_at);
+ALTER SEQUENCE scripts_issued_license_id_seq
+    OWNED BY scripts_issued_license.id;
+CREATE TABLE scripts_issued_license_default
+    PARTITION OF scripts_issued_license DEFAULT;
+
+DO $$
+DECLARE
+    month timestamp;
+    last_month timestamp :=
+        date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months';
+BEGIN
+    SELECT date_trunc(
+        'month', COALESCE(MIN(issued_at), now()) AT TIME ZONE 'UTC'
+    ) INTO month FROM scripts_issued_license_unpartitioned;
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF scripts_issued_license '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'scripts_issued_license_p' || to_char(month, 'YYYYMM'),
+            month AT TIME ZONE 'UTC',
+            (month + interval '1 month') AT TIME ZONE 'UTC'
+        );
+        month := month + interval '1 month';
+    END LOOP;
+END $$;
+
+INSERT INTO scripts_issued_license ({COLUMNS})
+    SELECT {COLUMNS} FROM scripts_issued_license_unpartitioned;
+SELECT setval(
+    'scripts_issued_license_id_seq', COALESCE(MAX(id), 0) + 1, false
+) FROM scripts_issued_license;
+DROP TABLE scripts_issued_license_unpartitioned;
+{CONSTRAINTS_AND_INDEXES}
+'''
+
+UNPARTITION_SQL = f'''
+ALTER TABLE scripts_issued_license RENAME TO scripts_issued_license_partitioned;
+ALTER INDEX scripts_issued_license_issued_by_id_ab716ae8
+    RENAME TO scripts_issued_license_partitioned_issued_by_id;
+ALTER INDEX scripts_issued_license_script_id_0b5c0f36
+    RENAME TO scripts_issued_license_partitioned_script_id;
+ALTER INDEX scripts_issued_license_script_id_0b5c0f36_like
+    RENAME TO scripts_issued_license_partitioned_script_id_like;
+ALTER TABLE scripts_issued_license_partitioned
+    DROP CONSTRAINT scripts_issued_license_issued_by_id_ab716ae8_fk_auth_user_id;
+ALTER TABLE scripts_issued_license_partitioned
+    DROP CONSTRAINT scripts_issued_license_script_id_0b5c0f36_fk_scripts_script_id;
+
+CREATE TABLE scripts_issued_license (
+    id bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    issued_at timestamp with time zone NOT NULL,
+    license_key varchar NULL,
+    issue_type varchar NOT NULL,
+    action varchar NOT NULL,
+    demo_lk boolean NOT NULL,
+    expires date NULL,
+    extra_params jsonb NULL,
+    issued_by_id integer NULL,
+    script_id varchar(100) NOT NULL
+);
+INSERT INTO scripts_issued_license ({COLUMNS})
+    SELECT {COLUMNS} FROM scripts_issued_license_partitioned;
+SELECT setval(
+    pg_get_serial_sequence('scripts_issued_license', 'id'),
+    COALESCE(MAX(id), 0) + 1,
+    false
+) FROM scripts_issued_license;
+DROP TABLE scripts_issued_license_partitioned;
+{CONSTRAINTS_AND_INDEXES}
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0003_permanent_license'),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=PARTITION_SQL, reverse_sql=UNPARTITION_SQL),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0004_issued_license_partitioning'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='issuedlicense',
+            options={'ordering': ['-issued_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='issuedlicense',
+            index=models.Index(
+                fields=['issued_at', 'id'], name='issued_license_keyset_idx'
+            ),
+        ),
+    ]
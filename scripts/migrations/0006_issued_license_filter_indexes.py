@@ -0,0 +1,67 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+DROP_SCRIPT_INDEXES = '''
+DROP INDEX scripts_issued_license_script_id_0b5c0f36;
+DROP INDEX scripts_issued_license_script_id_0b5c0f36_like;
+'''
+
+CREATE_SCRIPT_INDEXES = '''
+CREATE INDEX scripts_issued_license_script_id_0b5c0f36
+    ON scripts_issued_license (script_id);
+CREATE INDEX scripts_issued_license_script_id_0b5c0f36_like
+    ON scripts_issued_license (script_id varchar_pattern_ops);
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0005_issued_license_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issuedlicense',
+            index=models.Index(
+                condition=models.Q(('license_key__isnull', False)),
+                fields=['license_key', 'issued_at', 'id'],
+                name='issued_license_lk_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='issuedlicense',
+            index=models.Index(
+                fields=['script', 'issued_at', 'id'],
+                name='issued_license_script_idx',
+            ),
+        ),
+        # Script index above makes the single column one redundant. Indexes
+        # are dropped directly, altering the field would also re-validate
+        # the foreign key over the whole table
+        migrations.RunSQL(
+            sql=DROP_SCRIPT_INDEXES,
+            reverse_sql=CREATE_SCRIPT_INDEXES,
+            state_operations=[
+                migrations.AlterField(
+                    model_name='issuedlicense',
+                    name='script',
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='scripts.script',
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='issuedlicense',
+            index=models.Index(
+                condition=models.Q(('expires__isnull', False)),
+                fields=['expires'],
+                name='issued_license_expires_idx',
+            ),
+        ),
+    ]
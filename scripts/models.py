@@ -1,3 +1,5 @@
+import uuid
+
 from django.contrib.auth.models import User
 from django.db import models
 
@@ -79,7 +81,10 @@ class IssuedLicense(models.Model):
 
     issued_at = models.DateTimeField()
     license_key = models.CharField(null=True)
-    script = models.ForeignKey(Script, on_delete=models.CASCADE)
+    # Indexed by `issued_license_script_idx` as its leading column
+    script = models.ForeignKey(
+        Script, on_delete=models.CASCADE, db_index=False
+    )
     issued_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True)
     issue_type = models.CharField(choices=IssueType.choices)
     action = models.CharField(choices=Action.choices)
@@ -89,7 +94,82 @@ class IssuedLicense(models.Model):
 
     class Meta:
         db_table = 'scripts_issued_license'
-        ordering = ['-issued_at']
+        ordering = ['-issued_at', '-id']
+        indexes = [
+            # Keyset pagination, issued at range filter
+            models.Index(
+                fields=['issued_at', 'id'], name='issued_license_keyset_idx'
+            ),
+            # Filters listed in pagination order, license key lookups are
+            # the most frequent ones
+            models.Index(
+                fields=['license_key', 'issued_at', 'id'],
+                condition=models.Q(license_key__isnull=False),
+                name='issued_license_lk_idx',
+            ),
+            models.Index(
+                fields=['script', 'issued_at', 'id'],
+                name='issued_license_script_idx',
+            ),
+            # Expiration range filter, permanent licenses never match it
+            models.Index(
+                fields=['expires'],
+                condition=models.Q(expires__isnull=False),
+                name='issued_license_expires_idx',
+            ),
+        ]
 
     def is_permanent(self):
         return self.expires is None
+
+
+class PermanentLicense(models.Model):
+    """Registry of scripts issued permanently (without expiration) for
+    license keys
+
+    Issued licenses are append-only audit, registry keeps a single row per
+    script and license key, so permanent grant is checked with a unique
+    index lookup
+    """
+
+    script = models.ForeignKey(Script, on_delete=models.CASCADE)
+    license_key = models.CharField()
+    granted_at = models.DateTimeField()
+    last_issued_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'scripts_permanent_license'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['script', 'license_key'],
+                name='scripts_permanent_license_script_lk_uniq',
+            ),
+        ]
+
+
+class GenerationJob(models.Model):
+    """Script generation running in background
+
+    Job is visible to the user who has submitted it, demo jobs of anonymous
+    users are visible to anyone knowing job id
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Waiting for worker'
+        RUNNING = 'RUNNING', 'Script is being generated'
+        SUCCEEDED = 'SUCCEEDED', 'Script is ready to download'
+        FAILED = 'FAILED', 'Script generation failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    script = models.ForeignKey(Script, on_delete=models.CASCADE)
+    issued_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True)
+    demo = models.BooleanField(default=False)
+    action = models.CharField(choices=IssuedLicense.Action.choices)
+    status = models.CharField(choices=Status.choices, default=Status.PENDING)
+    created_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True)
+    filename = models.CharField(null=True)
+    error = models.CharField(null=True)
+
+    class Meta:
+        db_table = 'scripts_generation_job'
@@ -0,0 +1,141 @@
+import json
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """Returns estimate of number of records in queryset
+
+    Records of the whole table are counted with `pg_class.reltuples` of the
+    table or its partitions (autovacuum does not analyze partitioned table
+    itself), filtered ones are estimated by query planner.
+    Estimates are as accurate as the last `ANALYZE` of the table, which
+    autovacuum runs
+    """
+    with connection.cursor() as cursor:
+        if not queryset.query.has_filters():
+            cursor.execute(
+                'SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0) '
+                "FROM pg_class WHERE relkind = 'r' AND ("
+                'oid = %s::regclass OR oid IN ('
+                'SELECT inhrelid FROM pg_inherits '
+                'WHERE inhparent = %s::regclass))',
+                [queryset.model._meta.db_table] * 2,
+            )
+            return int(cursor.fetchone()[0])
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class IssuedLicensePagination(CursorPagination):
+    """Keyset pagination of issued licenses, newest first
+
+    Page is selected by `(issued_at, id)` position of the last record of
+    previous page instead of offset, so deep pages are as cheap as the
+    first one with `(issued_at, id)` index, and records inserted while
+    paging do not shift pages. Total count is not queried, its estimate is
+    returned with `?count=approximate`
+    """
+
+    ordering = ('-issued_at', '-id')
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = 'limit'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+        self.count = None
+        if request.query_params.get(self.count_query_param) == 'approximate':
+            self.count = estimate_count(queryset)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self._after_position(self.cursor.position, reverse)
+            )
+        ordering = ('issued_at', 'id') if reverse else self.ordering
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_next_link(self) -> None | str:
+        if not self.has_next:
+            return None
+        position = (
+            self._get_position(self.page[-1]) if self.page
+            else self.cursor.position
+        )
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position)
+        )
+
+    def get_previous_link(self) -> None | str:
+        if not self.has_previous:
+            return None
+        position = (
+            self._get_position(self.page[0]) if self.page
+            else self.cursor.position
+        )
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position)
+        )
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = dict(count=self.count) | response.data
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties'] = dict(
+            count={
+                'type': 'integer',
+                'description': 'Estimated count, with `count=approximate`',
+            },
+        ) | response_schema['properties']
+        return response_schema
+
+    @staticmethod
+    def _get_position(issued) -> str:
+        return f'{issued.issued_at.isoformat()}_{issued.id}'
+
+    def _after_position(self, position: None | str, reverse: bool) -> Q:
+        """Returns condition of records after position in pagination order
+
+        Condition on `issued_at` alone bounds index scan (and partitions
+        scanned), condition on `id` resolves records issued at the same time
+        """
+        try:
+            issued_at, pk = position.rsplit('_', 1)
+            issued_at, pk = parse_datetime(issued_at), int(pk)
+        except (AttributeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if issued_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        if reverse:
+            return Q(issued_at__gte=issued_at) & (
+                Q(issued_at__gt=issued_at) | Q(id__gt=pk)
+            )
+        return Q(issued_at__lte=issued_at) & (
+            Q(issued_at__lt=issued_at) | Q(id__lt=pk)
+        )
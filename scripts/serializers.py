@@ -2,9 +2,11 @@ import re
 from datetime import date
 
 import jsonschema
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
-from .models import IssuedLicense, Script, Tag
+from .models import GenerationJob, IssuedLicense, Script, Tag
 
 
 class LicenseKeyField(serializers.CharField):
@@ -49,6 +51,24 @@ class RequestWithExpirationSerializer(serializers.Serializer):
         return value
 
 
+def validate_extra_params(script: Script, extra_params: None | dict) -> None:
+    """Checks extra params against script schema"""
+    schema = script.extra_params_schema
+    if schema is not None:
+        if extra_params is None:
+            raise serializers.ValidationError(
+                f'`extra_params` is required for {script.name}. '
+                f'Check schema: {schema}',
+            )
+        try:
+            jsonschema.validate(instance=extra_params, schema=schema)
+        except jsonschema.exceptions.ValidationError:
+            raise serializers.ValidationError(
+                f'Invalid `extra_params` for {script.name}. '
+                f'Check schema: {schema}'
+            )
+
+
 class RequestWithExtraParamsSerializer(serializers.Serializer):
     extra_params = serializers.JSONField(
         binary=True, required=False, allow_null=True
@@ -59,21 +79,7 @@ class RequestWithExtraParamsSerializer(serializers.Serializer):
             raise RuntimeError(
                 'Pass script ctx to validate extra_params'
             )
-        schema = self.context.extra_params_schema
-        if schema is not None:
-            extra_params = attrs.get('extra_params')
-            if extra_params is None:
-                raise serializers.ValidationError(
-                    f'`extra_params` is required for {self.context.name}. '
-                    f'Check schema: {schema}',
-                )
-            try:
-                jsonschema.validate(instance=extra_params, schema=schema)
-            except jsonschema.exceptions.ValidationError:
-                raise serializers.ValidationError(
-                    f'Invalid `extra_params` for {self.context.name}. '
-                    f'Check schema: {schema}'
-                )
+        validate_extra_params(self.context, attrs.get('extra_params'))
         return attrs
 
 
@@ -103,6 +109,60 @@ class UpdateIssuedRequestSerializer(GenerateDemoEncodedRequestSerializer):
     pass
 
 
+class GenerateBatchRequestSerializer(RequestWithExpirationSerializer):
+    """Serializer for incoming `generate_batch` requests
+
+    `extra_params` maps script id to its extra params, they are checked
+    against script schemas with `validate_extra_params` once scripts are
+    fetched
+    """
+    scripts = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        allow_empty=False,
+        max_length=settings.BATCH_MAX_SCRIPTS,
+    )
+    license_key = LicenseKeyField(required=False, allow_null=True)
+    extra_params = serializers.DictField(
+        child=serializers.JSONField(allow_null=True),
+        required=False,
+        allow_null=True,
+    )
+
+    def validate_scripts(self, value):
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError('Script ids should be unique')
+        return value
+
+    def validate(self, attrs):
+        unknown = set(attrs.get('extra_params') or {}) - set(attrs['scripts'])
+        if unknown:
+            raise serializers.ValidationError(
+                f'`extra_params` given for not requested scripts: '
+                f'{sorted(unknown)}'
+            )
+        return attrs
+
+
+class ClassifyLicenseKeysRequestSerializer(serializers.Serializer):
+    """Serializer for incoming license key classification requests"""
+    license_keys = serializers.ListField(
+        child=LicenseKeyField(),
+        allow_empty=False,
+        max_length=settings.LICENSE_KEY_CLASSIFY_MAX_KEYS,
+    )
+
+
+class ExportIssuedLicensesRequestSerializer(serializers.Serializer):
+    """Serializer for issued licenses export query params
+
+    `format` query param is reserved by DRF for renderer selection
+    """
+    export_format = serializers.ChoiceField(
+        choices=['csv', 'ndjson'], default='csv'
+    )
+    gzip = serializers.BooleanField(default=False)
+
+
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
@@ -135,3 +195,24 @@ class IssuedLicenseSerializer(serializers.ModelSerializer):
             'id', 'issued_at', 'license_key', 'script', 'issued_by',
             'issue_type', 'action', 'demo_lk', 'expires', 'extra_params',
         ]
+
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    """Serializer for Generation Job model"""
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GenerationJob
+        fields = [
+            'id', 'script', 'action', 'status', 'created_at', 'finished_at',
+            'error', 'download',
+        ]
+
+    def get_download(self, obj: GenerationJob) -> None | str:
+        if obj.status != GenerationJob.Status.SUCCEEDED:
+            return None
+        return reverse(
+            'scripts:generation_job-download',
+            kwargs=dict(pk=obj.pk),
+            request=self.context.get('request'),
+        )
@@ -1,10 +1,31 @@
 from django.conf import settings as sett
+from django.core.cache import caches
 
 from .app_settings import AppSettings
-from .encoding_service import ScriptEncodingService
-from .license_key_service import LicenseKeyService
+from .artifact_cache import (
+    ArtifactCache,
+    DiskArtifactStorage,
+    MemoryArtifactStorage,
+)
+from .encoding_service import (
+    InlineEncodingExecutor,
+    ProcessPoolEncodingExecutor,
+    ScriptEncodingService,
+)
+from .generation_job_service import GenerationJobService
+from .license_key_service import (
+    CircuitBreaker,
+    LicenseKeyService,
+    LicenseManagerClient,
+    LocalTTLCache,
+    MappedBloomFilter,
+)
 from .repo_service import RepoService
-from .script_license_manager_service import ScriptLicenseManagerService
+from .script_license_manager_service import (
+    BufferedAuditWriter,
+    ScriptLicenseManagerService,
+)
+from .script_license_manager_service.storage_adapters import IssuedLicenseDAO
 
 
 def init_services():
@@ -13,18 +34,122 @@ def init_services():
         demo_key_default_expiration_days=sett.DEMO_KEY_DEFAULT_EXPIRATION_DAYS,
         demo_key_max_expiration_days=sett.DEMO_KEY_MAX_EXPIRATION_DAYS,
         user_key_max_expiration_days=sett.USER_KEY_MAX_EXPIRATION_DAYS,
+        batch_generation_workers=sett.BATCH_GENERATION_WORKERS,
+        audit_not_modified=sett.AUDIT_NOT_MODIFIED,
+        artifact_content_encodings=sett.ARTIFACT_CONTENT_ENCODINGS,
+        artifact_compression_min_bytes=sett.ARTIFACT_COMPRESSION_MIN_BYTES,
+    )
+    lm_client = None
+    if sett.LM_SERVICE_URL is not None:
+        lm_client = LicenseManagerClient(
+            base_url=sett.LM_SERVICE_URL,
+            connect_timeout=sett.LM_CONNECT_TIMEOUT_SECONDS,
+            read_timeout=sett.LM_READ_TIMEOUT_SECONDS,
+            retries=sett.LM_RETRIES,
+            backoff=sett.LM_RETRY_BACKOFF_SECONDS,
+            backoff_max=sett.LM_RETRY_BACKOFF_MAX_SECONDS,
+            pool_maxsize=sett.LM_POOL_MAXSIZE,
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=sett.LM_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=sett.LM_CIRCUIT_RESET_SECONDS,
+            ),
+        )
+    demo_key_filter = None
+    if sett.LICENSE_KEY_DEMO_FILTER_PATH is not None:
+        demo_key_filter = MappedBloomFilter(
+            path=sett.LICENSE_KEY_DEMO_FILTER_PATH,
+            check_interval=sett.LICENSE_KEY_DEMO_FILTER_CHECK_SECONDS,
+            max_age=sett.LICENSE_KEY_DEMO_FILTER_MAX_AGE_SECONDS,
+        )
+    lic_key_service = LicenseKeyService(
+        client=lm_client,
+        local_cache=LocalTTLCache(
+            max_entries=sett.LICENSE_KEY_CACHE_LOCAL_MAX_ENTRIES
+        ),
+        shared_cache=caches[sett.LICENSE_KEY_CACHE_ALIAS],
+        positive_ttl=sett.LICENSE_KEY_CACHE_POSITIVE_TTL_SECONDS,
+        negative_ttl=sett.LICENSE_KEY_CACHE_NEGATIVE_TTL_SECONDS,
+        local_ttl=sett.LICENSE_KEY_CACHE_LOCAL_TTL_SECONDS,
+        lock_timeout=sett.LICENSE_KEY_LOOKUP_LOCK_TIMEOUT_SECONDS,
+        lock_wait=sett.LICENSE_KEY_LOOKUP_LOCK_WAIT_SECONDS,
+        lookup_batch_size=sett.LM_CLASSIFY_BATCH_SIZE,
+        range_sync_interval=sett.LICENSE_KEY_DEMO_RANGES_SYNC_SECONDS,
+        range_max_age=sett.LICENSE_KEY_DEMO_RANGES_MAX_AGE_SECONDS,
+        demo_key_filter=demo_key_filter,
+        stale_ttl=sett.LICENSE_KEY_CACHE_STALE_TTL_SECONDS,
+        refresh_ahead=sett.LICENSE_KEY_CACHE_REFRESH_AHEAD_SECONDS,
+        refresh_workers=sett.LICENSE_KEY_REFRESH_WORKERS,
+    )
+    if sett.ENCODING_EXECUTOR == 'process':
+        encoding_executor = ProcessPoolEncodingExecutor(
+            workers=sett.ENCODING_WORKERS,
+            max_pending=sett.ENCODING_MAX_PENDING,
+            max_jobs_per_worker=sett.ENCODING_MAX_JOBS_PER_WORKER,
+            start_method=sett.ENCODING_START_METHOD,
+        )
+    else:
+        encoding_executor = InlineEncodingExecutor()
+    template_cache = ArtifactCache(
+        memory=MemoryArtifactStorage(
+            max_entries=sett.TEMPLATE_CACHE_MEMORY_MAX_ENTRIES,
+            max_bytes=sett.TEMPLATE_CACHE_MEMORY_MAX_BYTES,
+        ),
+        disk=None if sett.TEMPLATE_CACHE_DIR is None else DiskArtifactStorage(
+            directory=sett.TEMPLATE_CACHE_DIR,
+            max_bytes=sett.TEMPLATE_CACHE_DISK_MAX_BYTES,
+        ),
+    )
+    se_service = ScriptEncodingService(
+        executor=encoding_executor,
+        template_cache=template_cache,
+        timeout=sett.ENCODING_TIMEOUT_SECONDS,
     )
-    lic_key_service = LicenseKeyService()
-    se_service = ScriptEncodingService()
     rs_service = RepoService()
+    artifact_cache = ArtifactCache(
+        memory=MemoryArtifactStorage(
+            max_entries=sett.ARTIFACT_CACHE_MEMORY_MAX_ENTRIES,
+            max_bytes=sett.ARTIFACT_CACHE_MEMORY_MAX_BYTES,
+            max_item_bytes=sett.ARTIFACT_CACHE_MEMORY_MAX_ITEM_BYTES,
+        ),
+        disk=None if sett.ARTIFACT_CACHE_DIR is None else DiskArtifactStorage(
+            directory=sett.ARTIFACT_CACHE_DIR,
+            max_bytes=sett.ARTIFACT_CACHE_DISK_MAX_BYTES,
+        ),
+    )
+    audit_writer = None
+    if sett.AUDIT_WRITE_BEHIND:
+        audit_writer = BufferedAuditWriter(
+            write=IssuedLicenseDAO.add_many,
+            max_size=sett.AUDIT_QUEUE_MAX_SIZE,
+            batch_size=sett.AUDIT_BATCH_SIZE,
+            flush_interval=sett.AUDIT_FLUSH_INTERVAL_SECONDS,
+        )
     slm_service = ScriptLicenseManagerService(
         lk_service=lic_key_service,
-        app_settings=settings
+        repo_service=rs_service,
+        encoding_service=se_service,
+        artifact_cache=artifact_cache,
+        app_settings=settings,
+        audit_writer=audit_writer,
+    )
+    gj_results = None
+    if sett.GENERATION_JOBS_WORKERS > 0:
+        gj_results = DiskArtifactStorage(
+            directory=sett.GENERATION_JOBS_DIR,
+            max_bytes=sett.GENERATION_JOBS_DISK_MAX_BYTES,
+        )
+    gj_service = GenerationJobService(
+        slm_service=slm_service,
+        results=gj_results,
+        workers=sett.GENERATION_JOBS_WORKERS,
+        max_pending=sett.GENERATION_JOBS_MAX_PENDING,
+        timeout=sett.GENERATION_JOBS_TIMEOUT_SECONDS,
     )
-    return lic_key_service, se_service, rs_service, slm_service
+    return lic_key_service, se_service, rs_service, slm_service, gj_service
 
 
 (
     lk_service, script_encoding_service,
-    repo_script_service, script_license_manager_service
+    repo_script_service, script_license_manager_service,
+    generation_job_service,
 ) = init_services()
@@ -7,3 +7,7 @@ class AppSettings:
     demo_key_default_expiration_days: int
     demo_key_max_expiration_days: int
     user_key_max_expiration_days: int
+    batch_generation_workers: int
+    audit_not_modified: bool
+    artifact_content_encodings: tuple[str, ...]
+    artifact_compression_min_bytes: int
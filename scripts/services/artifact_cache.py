@@ -0,0 +1,340 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+
+from scripts.services.common import StatsCounterMixin
+
+# HTTP content codings artifacts can be pre-compressed with. `deflate` is zlib
+# wrapped stream as defined by RFC 9110, gzip header has fixed mtime so the
+# same content always gives the same variant
+CONTENT_ENCODINGS = {
+    'gzip': lambda data: gzip.compress(data, mtime=0),
+    'deflate': zlib.compress,
+}
+
+
+def compress(data: bytes, content_encoding: str) -> bytes:
+    """Compresses artifact payload with given HTTP content coding"""
+    try:
+        compressor = CONTENT_ENCODINGS[content_encoding]
+    except KeyError:
+        raise ValueError(f'Unsupported content encoding: {content_encoding}')
+    return compressor(data)
+
+
+@dataclass
+class CachedArtifact:
+    """Artifact payload with its metadata as stored in cache
+
+    Payload is either kept in memory (`data`) or in an open `file` when it
+    is served from disk tier. File stays readable even if it is evicted or
+    replaced by another process meanwhile
+    """
+    data: None | bytes = None
+    meta: dict = field(default_factory=dict)
+    file: None | BinaryIO = None
+
+    @property
+    def size(self) -> int:
+        if self.data is not None:
+            return len(self.data)
+        return os.fstat(self.file.fileno()).st_size
+
+    def read(self) -> bytes:
+        """Returns payload, file is closed once it is read into memory"""
+        if self.data is None:
+            with self.file:
+                self.data = self.file.read()
+            self.file = None
+        return self.data
+
+    def close(self) -> None:
+        """Closes file of payload which is not going to be read"""
+        if self.file is not None:
+            self.file.close()
+
+
+@dataclass
+class ArtifactCacheStats:
+    """Artifact cache counters"""
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    memory_evictions: int = 0
+    disk_evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.
+
+    def as_dict(self) -> dict:
+        return dict(
+            asdict(self), hits=self.hits, hit_ratio=round(self.hit_ratio, 4)
+        )
+
+
+class MemoryArtifactStorage:
+    """Bounded in-process LRU storage
+
+    Keeps at most `max_entries` artifacts with total size up to `max_bytes`.
+    Artifacts larger than `max_item_bytes` are not kept in memory at all
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        max_item_bytes: None | int = None,
+    ):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._max_item_bytes = max_item_bytes or max_bytes
+        self._items: OrderedDict[str, CachedArtifact] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def accepts(self, size: int) -> bool:
+        """Checks if artifact of given size can be kept in memory"""
+        return self._max_entries > 0 and size <= self._max_item_bytes
+
+    def get(self, key: str) -> None | CachedArtifact:
+        with self._lock:
+            artifact = self._items.get(key)
+            if artifact is not None:
+                self._items.move_to_end(key)
+            return artifact
+
+    def put(self, key: str, artifact: CachedArtifact) -> int:
+        """Stores artifact and returns number of evicted entries"""
+        if artifact.data is None or not self.accepts(artifact.size):
+            return 0
+        evicted = 0
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+            self._items[key] = artifact
+            self._size += artifact.size
+            while (
+                len(self._items) > self._max_entries
+                or self._size > self._max_bytes
+            ):
+                _, dropped = self._items.popitem(last=False)
+                self._size -= dropped.size
+                evicted += 1
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+
+class DiskArtifactStorage:
+    """Artifact storage on local disk with size budget eviction
+
+    Every artifact is stored as two files: `<key>.bin` with payload and
+    `<key>.json` with metadata. The directory can be shared by several
+    processes: files are replaced atomically and the least recently used
+    artifacts (by modification time, refreshed on every hit) are evicted
+    once total payload size exceeds `max_bytes`
+    """
+
+    _DATA_SUFFIX = '.bin'
+    _META_SUFFIX = '.json'
+
+    def __init__(self, directory: str | Path, max_bytes: int):
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = sum(size for _, _, size in self._scan())
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> None | CachedArtifact:
+        """Returns artifact with opened payload file without reading it"""
+        data_path = self._data_path(key)
+        try:
+            meta = json.loads(self._meta_path(key).read_text())
+            file = open(data_path, 'rb')
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(file.fileno())
+        except OSError:
+            pass
+        return CachedArtifact(meta=meta, file=file)
+
+    def accepts(self, size: int) -> bool:
+        """Checks if artifact of given size can be stored"""
+        return size <= self._max_bytes
+
+    def put(self, key: str, artifact: CachedArtifact) -> int:
+        """Stores artifact and returns number of evicted entries"""
+        if not self.accepts(artifact.size):
+            return 0
+        data_path = self._data_path(key)
+        self._write_atomic(
+            self._meta_path(key), json.dumps(artifact.meta).encode()
+        )
+        # Replaced payload (e.g. put by another process) is not counted twice
+        previous_size = self._write_atomic(data_path, artifact.read())
+        with self._lock:
+            self._size += artifact.size - previous_size
+            if self._size > self._max_bytes:
+                return self._evict()
+        return 0
+
+    def clear(self) -> None:
+        with self._lock:
+            for data_path, _, _ in self._scan():
+                self._remove(data_path)
+            self._size = 0
+
+    def _evict(self) -> int:
+        entries = sorted(self._scan(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        evicted = 0
+        for data_path, _, size in entries:
+            if total <= self._max_bytes:
+                break
+            self._remove(data_path)
+            total -= size
+            evicted += 1
+        self._size = total
+        return evicted
+
+    def _scan(self) -> list[tuple[Path, float, int]]:
+        result = []
+        with os.scandir(self._directory) as it:
+            for entry in it:
+                if not entry.name.endswith(self._DATA_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                result.append((Path(entry.path), stat.st_mtime, stat.st_size))
+        return result
+
+    def _remove(self, data_path: Path) -> None:
+        data_path.unlink(missing_ok=True)
+        data_path.with_suffix(self._META_SUFFIX).unlink(missing_ok=True)
+
+    def _write_atomic(self, path: Path, data: bytes) -> int:
+        """Replaces file content, returns size of replaced file if any"""
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            try:
+                previous_size = path.stat().st_size
+            except FileNotFoundError:
+                previous_size = 0
+            os.replace(tmp_path, path)
+            return previous_size
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _data_path(self, key: str) -> Path:
+        return self._directory / f'{key}{self._DATA_SUFFIX}'
+
+    def _meta_path(self, key: str) -> Path:
+        return self._directory / f'{key}{self._META_SUFFIX}'
+
+
+class ArtifactCache(StatsCounterMixin):
+    """Two-tier content-addressed artifact cache
+
+    Looks up artifacts in the in-process LRU first and then on disk (if disk
+    tier is configured). Disk hits small enough for memory tier are promoted
+    to memory, large ones are served by file reference
+    """
+
+    def __init__(
+        self,
+        memory: MemoryArtifactStorage,
+        disk: None | DiskArtifactStorage = None,
+    ):
+        self._memory = memory
+        self._disk = disk
+        self._stats = ArtifactCacheStats()
+        self._stats_lock = threading.Lock()
+
+    @property
+    def persistent(self) -> bool:
+        """Checks if cached artifacts outlive the process (disk tier is set)"""
+        return self._disk is not None
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Builds cache key as a hash of json serializable parts"""
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> None | CachedArtifact:
+        artifact = self._memory.get(key)
+        if artifact is not None:
+            self._count(memory_hits=1)
+            return artifact
+        if self._disk is not None:
+            artifact = self._disk.get(key)
+            if artifact is not None:
+                evicted = 0
+                if self._memory.accepts(artifact.size):
+                    artifact = CachedArtifact(
+                        data=artifact.read(), meta=artifact.meta
+                    )
+                    evicted = self._memory.put(key, artifact)
+                self._count(disk_hits=1, memory_evictions=evicted)
+                return artifact
+        self._count(misses=1)
+        return None
+
+    def put(self, key: str, artifact: CachedArtifact) -> None:
+        memory_evicted = self._memory.put(key, artifact)
+        disk_evicted = 0
+        if self._disk is not None:
+            disk_evicted = self._disk.put(key, artifact)
+        self._count(
+            memory_evictions=memory_evicted, disk_evictions=disk_evicted
+        )
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            result = self._stats.as_dict()
+        result.update(
+            memory_entries=len(self._memory),
+            memory_bytes=self._memory.size,
+            disk_bytes=None if self._disk is None else self._disk.size,
+        )
+        return result
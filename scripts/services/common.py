@@ -0,0 +1,42 @@
+"""Helpers shared by services"""
+import os
+import threading
+from collections.abc import Callable
+
+
+class StatsCounterMixin:
+    """Increments counters of `_stats` dataclass under `_stats_lock`"""
+
+    _stats: object
+    _stats_lock: threading.Lock
+
+    def _count(self, **counters: int) -> None:
+        with self._stats_lock:
+            for name, value in counters.items():
+                setattr(self._stats, name, getattr(self._stats, name) + value)
+
+
+class ProcessThread:
+    """Background daemon thread started at most once per process
+
+    Threads do not survive fork, so the thread is started again by the first
+    `ensure_started` call in a forked process, e.g. web server worker
+    """
+
+    def __init__(self, target: Callable[[], None], name: str):
+        self._target = target
+        self._name = name
+        self._pid: None | int = None
+        self._start_lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            threading.Thread(
+                target=self._target, name=self._name, daemon=True
+            ).start()
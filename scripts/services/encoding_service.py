@@ -1,16 +1,334 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
 from datetime import date
+from multiprocessing.queues import SimpleQueue
+from typing import NoReturn
 
+from scripts import encoding
+from scripts.services.artifact_cache import ArtifactCache, CachedArtifact
+from scripts.services.common import StatsCounterMixin
+from scripts.services.repo_service import ScriptSource
 
-class ScriptEncodingService:
-    """Service responsible for encoding scripts"""
 
-    def __init__(self):
+class EncodingUnavailableError(RuntimeError):
+    """Encoding job was rejected or has not been completed in time"""
+
+
+@dataclass
+class EncodingExecutorStats:
+    """Encoding executor counters"""
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    timeouts: int = 0
+    recycles: int = 0
+
+
+class InlineEncodingExecutor:
+    """Runs encoding jobs synchronously in the calling thread"""
+
+    def run(self, fn: Callable, *args, timeout: float):
+        return fn(*args)
+
+    async def arun(self, fn: Callable, *args, timeout: float):
+        """Runs job in a thread, so the event loop is not blocked"""
+        return await asyncio.to_thread(fn, *args)
+
+    def stats(self) -> dict:
+        return dict(mode='inline')
+
+    def shutdown(self, wait: bool = True) -> None:
         pass
 
-    def encode_script(
+
+class ProcessPoolEncodingExecutor(StatsCounterMixin):
+    """Runs encoding jobs in a managed pool of worker processes
+
+    Calling thread only waits for the result, so CPU-bound encoding does not
+    hold the GIL of the request worker.
+
+     - at most `max_pending` jobs are queued or running at once, the rest are
+       rejected if no slot is freed within `timeout`
+     - job not completed within `timeout`, including time waited for a slot,
+       is reported as unavailable
+     - pool is replaced with a fresh one after `workers * max_jobs_per_worker`
+       jobs, old workers exit once their current jobs are done
+     - running job can not be cancelled, so pool of a timed out job is
+       replaced and its workers are terminated, jobs running there fail.
+       Workers report their pids on start, so they can be found among child
+       processes
+     - pool is started lazily in the process which runs jobs, so it is safe to
+       create executor before web server forks its workers
+    """
+
+    def __init__(
         self,
-        license_key: str,
-        expires: date,
-        extra_params: dict
+        workers: int,
+        max_pending: int,
+        max_jobs_per_worker: int,
+        start_method: str = 'spawn',
     ):
-        pass
+        self._workers = workers
+        self._max_jobs = workers * max_jobs_per_worker
+        self._mp_context = multiprocessing.get_context(start_method)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pool: None | ProcessPoolExecutor = None
+        self._pool_pids: None | SimpleQueue = None
+        self._pool_pid: None | int = None
+        self._pool_jobs = 0
+        # Jobs holding slots, mapped to pools they run in and queues of pids
+        # reported by workers of the pools
+        self._jobs: dict[Future, tuple[ProcessPoolExecutor, SimpleQueue]] = {}
+        self._stats = EncodingExecutorStats()
+        self._stats_lock = threading.Lock()
+
+    def run(self, fn: Callable, *args, timeout: float):
+        deadline = time.monotonic() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            self._count(rejected=1)
+            raise EncodingUnavailableError('Encoding queue is full')
+        future = self._submit(fn, *args)
+        try:
+            result = future.result(timeout=_remaining(deadline))
+        except FutureTimeoutError:
+            self._timed_out(future, timeout)
+        except BrokenProcessPool:
+            self._count(failed=1)
+            raise EncodingUnavailableError('Encoding worker was terminated')
+        except Exception:
+            self._count(failed=1)
+            raise
+        self._count(completed=1)
+        return result
+
+    async def arun(self, fn: Callable, *args, timeout: float):
+        """Awaits job without blocking the event loop
+
+        Waiting for a free slot takes a thread only when the queue is full
+        """
+        deadline = time.monotonic() + timeout
+        if not self._slots.acquire(blocking=False):
+            acquiring = asyncio.ensure_future(asyncio.to_thread(
+                self._slots.acquire, timeout=timeout
+            ))
+            try:
+                acquired = await asyncio.shield(acquiring)
+            except asyncio.CancelledError:
+                # Slot acquired after caller has gone is given back
+                acquiring.add_done_callback(
+                    lambda f: f.result() and self._slots.release()
+                )
+                raise
+            if not acquired:
+                self._count(rejected=1)
+                raise EncodingUnavailableError('Encoding queue is full')
+        future = self._submit(fn, *args)
+        try:
+            result = await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout=_remaining(deadline)
+            )
+        except asyncio.TimeoutError:
+            self._timed_out(future, timeout)
+        except BrokenProcessPool:
+            self._count(failed=1)
+            raise EncodingUnavailableError('Encoding worker was terminated')
+        except Exception:
+            self._count(failed=1)
+            raise
+        self._count(completed=1)
+        return result
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(asdict(self._stats), mode='process')
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        """Submits job holding acquired slot, it is released once job is
+        done or its workers are terminated
+        """
+        try:
+            pool, pids = self._acquire_pool()
+            future = pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._jobs[future] = (pool, pids)
+        future.add_done_callback(self._release)
+        self._count(submitted=1)
+        return future
+
+    def _release(self, future: Future) -> None:
+        """Releases slot of the job, once"""
+        with self._lock:
+            if self._jobs.pop(future, None) is None:
+                return
+        self._slots.release()
+
+    def _timed_out(self, future: Future, timeout: float) -> NoReturn:
+        self._count(timeouts=1)
+        if not future.cancel():
+            self._terminate(future)
+        raise EncodingUnavailableError(
+            f'Encoding has not been completed in {timeout} seconds'
+        )
+
+    def _acquire_pool(self) -> tuple[ProcessPoolExecutor, SimpleQueue]:
+        with self._lock:
+            if self._pool is not None and self._pool_pid != os.getpid():
+                # Executor was inherited from parent process, it is not usable
+                self._pool = None
+            if self._pool is not None and self._pool_jobs >= self._max_jobs:
+                self._replace_pool()
+            if self._pool is None:
+                self._pool_pids = self._mp_context.SimpleQueue()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=self._mp_context,
+                    initializer=encoding.report_worker_pid,
+                    initargs=(self._pool_pids,),
+                )
+                self._pool_pid = os.getpid()
+                self._pool_jobs = 0
+            self._pool_jobs += 1
+            return self._pool, self._pool_pids
+
+    def _terminate(self, future: Future) -> None:
+        """Terminates workers of pool running the job"""
+        with self._lock:
+            if future not in self._jobs:
+                return
+            pool, pids = self._jobs[future]
+            if pool is self._pool:
+                self._replace_pool()
+            stuck = [
+                job for job, (job_pool, _) in self._jobs.items()
+                if job_pool is pool
+            ]
+            worker_pids = set()
+            while not pids.empty():
+                worker_pids.add(pids.get())
+        for process in multiprocessing.active_children():
+            if process.pid in worker_pids:
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        # Slots are released right away, not once broken pool is noticed
+        for job in stuck:
+            self._release(job)
+
+    def _replace_pool(self) -> None:
+        self._pool.shutdown(wait=False)
+        self._pool = None
+        self._count(recycles=1)
+
+
+def _remaining(deadline: float) -> float:
+    return max(deadline - time.monotonic(), 0)
+
+
+class ScriptEncodingService:
+    """Service responsible for encoding scripts
+
+    Encoding is done in two phases: license independent template is built
+    once per script revision in executor and cached, license data is stamped
+    into the template per request in the calling thread
+    """
+
+    def __init__(
+        self,
+        executor: InlineEncodingExecutor | ProcessPoolEncodingExecutor,
+        template_cache: ArtifactCache,
+        timeout: float,
+    ):
+        self._executor = executor
+        self._template_cache = template_cache
+        self._timeout = timeout
+
+    def encode_script(
+        self,
+        source: ScriptSource,
+        license_key: None | str,
+        expires: None | date,
+        extra_params: None | dict
+    ) -> bytes:
+        return encoding.stamp(
+            self.get_template(source), license_key, expires, extra_params
+        )
+
+    async def aencode_script(
+        self,
+        source: ScriptSource,
+        license_key: None | str,
+        expires: None | date,
+        extra_params: None | dict
+    ) -> bytes:
+        """Async `encode_script`, template build is awaited without
+        blocking the event loop
+        """
+        return encoding.stamp(
+            await self.aget_template(source),
+            license_key,
+            expires,
+            extra_params,
+        )
+
+    def get_template(self, source: ScriptSource) -> bytes:
+        """Returns license independent encoded template of script revision"""
+        key = self._template_key(source)
+        cached = self._template_cache.get(key)
+        if cached is not None:
+            return cached.read()
+        template = self._executor.run(
+            encoding.build_template, source.data, timeout=self._timeout
+        )
+        self._template_cache.put(key, CachedArtifact(data=template))
+        return template
+
+    async def aget_template(self, source: ScriptSource) -> bytes:
+        """Async `get_template`, cache disk tier is accessed in a thread"""
+        key = self._template_key(source)
+        cached = await asyncio.to_thread(self._template_cache.get, key)
+        if cached is not None:
+            return await asyncio.to_thread(cached.read)
+        template = await self._executor.arun(
+            encoding.build_template, source.data, timeout=self._timeout
+        )
+        await asyncio.to_thread(
+            self._template_cache.put, key, CachedArtifact(data=template)
+        )
+        return template
+
+    @staticmethod
+    def _template_key(source: ScriptSource) -> str:
+        return ArtifactCache.make_key(
+            'template',
+            encoding.ENCODER_VERSION,
+            source.script_id,
+            source.revision,
+        )
+
+    @property
+    def template_cache(self) -> ArtifactCache:
+        return self._template_cache
+
+    def stats(self) -> dict:
+        return dict(
+            executor=self._executor.stats(),
+            template_cache=self._template_cache.stats(),
+        )
@@ -0,0 +1,6 @@
+from .service import GenerationJobService, GenerationJobsUnavailableError
+
+__all__ = [
+    'GenerationJobService',
+    'GenerationJobsUnavailableError',
+]
@@ -0,0 +1,163 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from uuid import UUID
+
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from scripts.services.artifact_cache import CachedArtifact, DiskArtifactStorage
+from scripts.services.script_license_manager_service import (
+    ScriptLicenseManagerService,
+)
+from scripts.services.script_license_manager_service.structures import (
+    ActionType,
+    GeneratedScript,
+    Script,
+    ScriptLicenseConfig,
+)
+
+from .storage_adapters import GenerationJobDAO
+from .structures import GenerationJob, JobStatus
+
+
+class GenerationJobsUnavailableError(RuntimeError):
+    """Generation job was rejected as jobs queue is full"""
+
+
+class GenerationJobService:
+    """Service running script generation in background
+
+    Jobs are run by a local pool of worker threads, their state is kept in
+    database and results are stored on disk, so any app process can report
+    job status and serve its result.
+
+     - at most `max_pending` jobs are queued or running in the process at
+       once, the rest are rejected
+     - job not finished within `timeout` seconds since it has been submitted
+       is reported as failed once it is read, e.g. when its worker process
+       has died or has been recycled
+     - jobs are disabled if `workers` is 0 or `results` storage is not set
+    """
+
+    def __init__(
+        self,
+        slm_service: ScriptLicenseManagerService,
+        results: None | DiskArtifactStorage,
+        workers: int,
+        max_pending: int,
+        timeout: float,
+    ):
+        self._slm_service = slm_service
+        self._results = results
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._timeout = timeout
+        self._executor = None
+        if workers > 0 and results is not None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='slm-job'
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def submit(
+        self,
+        script: Script,
+        config: ScriptLicenseConfig,
+        action: ActionType,
+    ) -> GenerationJob:
+        """Enqueues script generation and returns pending job
+
+        Job is owned by the user of license config. Slot in jobs queue is
+        taken at once, so it should not be called within a transaction which
+        may be rolled back
+        """
+        if not self.enabled:
+            raise RuntimeError('Generation jobs are disabled')
+        if not self._slots.acquire(blocking=False):
+            raise GenerationJobsUnavailableError(
+                'Generation jobs queue is full'
+            )
+        try:
+            job = GenerationJobDAO.create(
+                script.id, action, config.user_id, bool(config.demo)
+            )
+            transaction.on_commit(lambda: self._executor.submit(
+                self._run, job.id, script, config, action
+            ))
+        except BaseException:
+            self._slots.release()
+            raise
+        return job
+
+    def get(self, job_id: UUID) -> None | GenerationJob:
+        return GenerationJobDAO.get(job_id)
+
+    def fail_if_stale(self, job_id: UUID) -> bool:
+        """Fails job not finished within timeout, returns whether job has
+        been failed
+        """
+        return GenerationJobDAO.fail_unfinished(
+            job_id,
+            created_before=timezone.now() - timedelta(seconds=self._timeout),
+            error=f'Job has not been finished in {self._timeout} seconds',
+        )
+
+    def get_result(self, job: GenerationJob) -> None | GeneratedScript:
+        """Returns generated script of succeeded job if it is still stored"""
+        if job.status != JobStatus.SUCCEEDED or self._results is None:
+            return None
+        result = self._results.get(str(job.id))
+        if result is None:
+            return None
+        return GeneratedScript(
+            data=result.data,
+            filename=result.meta['filename'],
+            file=result.file,
+            etag=result.meta['etag'],
+        )
+
+    def _run(
+        self,
+        job_id: UUID,
+        script: Script,
+        config: ScriptLicenseConfig,
+        action: ActionType,
+    ) -> None:
+        close_old_connections()
+        try:
+            GenerationJobDAO.start(job_id)
+            if action == ActionType.UPDATE:
+                issue = self._slm_service.update_issued
+            else:
+                issue = self._slm_service.generate_script
+            # Result is stored before license is issued, so job never fails
+            # once license has been issued
+            generated = issue(
+                script,
+                config,
+                on_generated=lambda g: self._store_result(job_id, g),
+            )
+        except Exception as e:
+            GenerationJobDAO.finish(job_id, JobStatus.FAILED, error=str(e))
+        else:
+            GenerationJobDAO.finish(
+                job_id, JobStatus.SUCCEEDED, filename=generated.filename
+            )
+        finally:
+            connection.close()
+            self._slots.release()
+
+    def _store_result(self, job_id: UUID, generated: GeneratedScript) -> None:
+        if not self._results.accepts(generated.size):
+            raise ValueError(
+                f'Generated script of {generated.size} bytes exceeds job '
+                f'results storage'
+            )
+        self._results.put(str(job_id), CachedArtifact(
+            data=generated.data,
+            file=generated.file,
+            meta=dict(filename=generated.filename, etag=generated.etag),
+        ))
@@ -0,0 +1,92 @@
+from datetime import datetime
+from uuid import UUID
+
+from django.utils import timezone
+
+from scripts.models import GenerationJob as GenerationJobModel
+from scripts.services.script_license_manager_service.structures import (
+    ActionType,
+)
+
+from .structures import GenerationJob, JobStatus
+
+
+class GenerationJobDAO:
+    """Data access object to connect with generation jobs storage"""
+
+    @staticmethod
+    def create(
+        script_id: str,
+        action: ActionType,
+        user_id: None | int,
+        demo: bool,
+    ) -> GenerationJob:
+        """Adds pending job"""
+        job = GenerationJobModel.objects.create(
+            script_id=script_id,
+            issued_by_id=user_id,
+            demo=demo,
+            action=action.name,
+            status=JobStatus.PENDING.name,
+            created_at=timezone.now(),
+        )
+        return GenerationJobDAO._to_entity(job)
+
+    @staticmethod
+    def get(job_id: UUID) -> None | GenerationJob:
+        job = GenerationJobModel.objects.filter(pk=job_id).first()
+        return None if job is None else GenerationJobDAO._to_entity(job)
+
+    @staticmethod
+    def start(job_id: UUID) -> None:
+        GenerationJobModel.objects.filter(pk=job_id).update(
+            status=JobStatus.RUNNING.name
+        )
+
+    @staticmethod
+    def finish(
+        job_id: UUID,
+        status: JobStatus,
+        filename: None | str = None,
+        error: None | str = None,
+    ) -> None:
+        GenerationJobModel.objects.filter(pk=job_id).update(
+            status=status.name,
+            finished_at=timezone.now(),
+            filename=filename,
+            error=error,
+        )
+
+    @staticmethod
+    def fail_unfinished(
+        job_id: UUID,
+        created_before: datetime,
+        error: str,
+    ) -> bool:
+        """Fails job if it is still pending or running and has been created
+        before given time, returns whether job has been failed
+        """
+        return bool(GenerationJobModel.objects.filter(
+            pk=job_id,
+            status__in=[JobStatus.PENDING.name, JobStatus.RUNNING.name],
+            created_at__lt=created_before,
+        ).update(
+            status=JobStatus.FAILED.name,
+            finished_at=timezone.now(),
+            error=error,
+        ))
+
+    @staticmethod
+    def _to_entity(job: GenerationJobModel) -> GenerationJob:
+        return GenerationJob(
+            id=job.id,
+            script_id=job.script_id,
+            action=ActionType(job.action),
+            status=JobStatus(job.status),
+            created_at=job.created_at,
+            user_id=job.issued_by_id,
+            demo=job.demo,
+            finished_at=job.finished_at,
+            filename=job.filename,
+            error=job.error,
+        )
@@ -0,0 +1,29 @@
+import enum
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from scripts.services.script_license_manager_service.structures import (
+    ActionType,
+)
+
+
+class JobStatus(enum.Enum):
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    SUCCEEDED = 'SUCCEEDED'
+    FAILED = 'FAILED'
+
+
+@dataclass
+class GenerationJob:
+    id: UUID
+    script_id: str
+    action: ActionType
+    status: JobStatus
+    created_at: datetime
+    user_id: None | int = None
+    demo: bool = False
+    finished_at: None | datetime = None
+    filename: None | str = None
+    error: None | str = None
@@ -0,0 +1,22 @@
+from .bloom import BloomFilter, MappedBloomFilter
+from .cache import LocalTTLCache
+from .client import (
+    CircuitBreaker,
+    LicenseKeyNotFoundError,
+    LicenseManagerClient,
+    LicenseManagerUnavailableError,
+)
+from .ranges import DemoKeyRangeIndex
+from .service import LicenseKeyService
+
+__all__ = [
+    'BloomFilter',
+    'CircuitBreaker',
+    'DemoKeyRangeIndex',
+    'LicenseKeyNotFoundError',
+    'LicenseKeyService',
+    'LicenseManagerClient',
+    'LicenseManagerUnavailableError',
+    'LocalTTLCache',
+    'MappedBloomFilter',
+]
@@ -0,0 +1,223 @@
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterable
+from hashlib import blake2b
+from pathlib import Path
+
+from .ranges import parse_license_key
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Bloom filter of license keys
+
+    Keys are parsed to their numeric value first, so equivalent spellings of
+    a key (e.g. with and without `0x` prefix) share bits. Bit positions are
+    derived from a single blake2b digest with double hashing. Bits are kept
+    in any writable or read-only buffer, e.g. `mmap` of a file saved with
+    `save`
+    """
+
+    _MAGIC = b'SLMBLOOM'
+    _VERSION = 1
+    _HEADER = struct.Struct('<8sIIQQd')
+
+    def __init__(
+        self,
+        bits: bytearray | memoryview | mmap.mmap,
+        num_bits: int,
+        num_hashes: int,
+        count: int = 0,
+        built_at: float = 0.,
+    ):
+        self._bits = bits
+        self._num_bits = num_bits
+        self._num_hashes = num_hashes
+        self.count = count
+        self.built_at = built_at
+
+    @classmethod
+    def create(
+        cls,
+        capacity: int,
+        fpr: float,
+        max_bytes: int,
+    ) -> 'BloomFilter':
+        """Creates empty filter sized for `capacity` keys and `fpr`
+
+        Filter is shrunk to `max_bytes` if needed, which increases its
+        false positive rate. Creation time is stored as build time
+        """
+        if not 0 < fpr < 1:
+            raise ValueError('False positive rate should be within (0, 1)')
+        capacity = max(capacity, 1)
+        num_bits = math.ceil(-capacity * math.log(fpr) / math.log(2) ** 2)
+        num_bits = max(8, min(num_bits, max_bytes * 8))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(
+            bytearray(math.ceil(num_bits / 8)),
+            num_bits,
+            num_hashes,
+            built_at=time.time(),
+        )
+
+    @classmethod
+    def load(cls, buffer: bytes | mmap.mmap) -> 'BloomFilter':
+        """Wraps buffer with serialized filter without copying bits"""
+        header = cls._HEADER.unpack_from(buffer)
+        magic, version, num_hashes, num_bits, count, built_at = header
+        if magic != cls._MAGIC or version != cls._VERSION:
+            raise ValueError('Not a license key bloom filter')
+        bits = memoryview(buffer)[cls._HEADER.size:]
+        if len(bits) * 8 < num_bits:
+            raise ValueError('Truncated license key bloom filter')
+        return cls(bits, num_bits, num_hashes, count, built_at)
+
+    @property
+    def size(self) -> int:
+        """Size of bits in bytes"""
+        return math.ceil(self._num_bits / 8)
+
+    @property
+    def num_hashes(self) -> int:
+        return self._num_hashes
+
+    @property
+    def fpr(self) -> float:
+        """Expected false positive rate for the number of added keys"""
+        fill = 1 - math.exp(-self._num_hashes * self.count / self._num_bits)
+        return fill ** self._num_hashes
+
+    def add(self, license_key: str) -> None:
+        positions = self._positions(license_key)
+        if positions is None:
+            raise ValueError(f'Unexpected license key: {license_key}')
+        for position in positions:
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def might_contain(self, license_key: str) -> None | bool:
+        """Checks if key has been added, `None` is returned for unexpected
+        keys
+
+        `False` is definite, `True` is wrong with `fpr` probability
+        """
+        positions = self._positions(license_key)
+        if positions is None:
+            return None
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in positions
+        )
+
+    def save(self, path: Path) -> None:
+        """Writes filter to file atomically, readers of the previous file
+        keep their mapping
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._HEADER.pack(
+                    self._MAGIC, self._VERSION, self._num_hashes,
+                    self._num_bits, self.count, self.built_at,
+                ))
+                f.write(self._bits)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _positions(self, license_key: str) -> None | Iterable[int]:
+        parsed = parse_license_key(license_key)
+        if parsed is None:
+            return None
+        kind, value = parsed
+        digest = blake2b(
+            f'{kind}:{value:016x}'.encode(), digest_size=16
+        ).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return (
+            (h1 + i * h2) % self._num_bits for i in range(self._num_hashes)
+        )
+
+
+class MappedBloomFilter:
+    """Bloom filter memory mapped from file shared by app processes
+
+    File is checked for replacement at most every `check_interval` seconds
+    and remapped when it has changed. Filter built more than `max_age`
+    seconds ago is not used, so keys issued after the build are not rejected
+    for long if rebuilds stop
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        check_interval: float,
+        max_age: float,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        self._path = Path(path)
+        self._check_interval = check_interval
+        self._max_age = max_age
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._lock = threading.Lock()
+        self._filter: None | BloomFilter = None
+        self._file_id: None | tuple[int, int] = None
+        self._checked_at: None | float = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def get(self) -> None | BloomFilter:
+        """Returns current filter, `None` if there is no fresh one"""
+        now = self._clock()
+        if (
+            self._checked_at is None
+            or now - self._checked_at >= self._check_interval
+        ):
+            with self._lock:
+                if (
+                    self._checked_at is None
+                    or now - self._checked_at >= self._check_interval
+                ):
+                    self._checked_at = now
+                    self._reload()
+        bloom_filter = self._filter
+        if bloom_filter is None:
+            return None
+        if self._wall_clock() - bloom_filter.built_at > self._max_age:
+            return None
+        return bloom_filter
+
+    def _reload(self) -> None:
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            self._filter = self._file_id = None
+            return
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+        if file_id == self._file_id:
+            return
+        try:
+            with open(self._path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # Previous mapping is released once it is not referenced
+            self._filter = BloomFilter.load(buffer)
+        except (OSError, ValueError, struct.error):
+            logger.exception('Failed to load bloom filter %s', self._path)
+            self._filter = None
+        self._file_id = file_id
@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+
+class LocalTTLCache:
+    """Bounded in-process LRU with expiration time per entry
+
+    Keeps at most `max_entries` entries, the least recently used ones are
+    evicted first. `None` values are not supported as `get` returns `None`
+    for missing and expired entries
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._max_entries = max_entries
+        self._clock = clock
+        self._items: OrderedDict[Hashable, tuple[float, object]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> None | object:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= self._clock():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: object, ttl: float) -> None:
+        if ttl <= 0 or self._max_entries <= 0:
+            return
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (self._clock() + ttl, value)
+            while len(self._items) > self._max_entries:
+                self._items.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
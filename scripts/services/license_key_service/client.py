@@ -0,0 +1,230 @@
+import json
+import random
+import threading
+import time
+from collections.abc import Callable
+from urllib.parse import quote
+
+import urllib3
+
+
+class LicenseManagerUnavailableError(RuntimeError):
+    """License manager service has failed or circuit breaker is open"""
+
+
+class LicenseKeyNotFoundError(LookupError):
+    """License manager service does not know license key"""
+
+
+class CircuitBreaker:
+    """Fails calls fast while upstream is considered down
+
+     - closed: calls are allowed, `failure_threshold` consecutive failures
+       open the circuit
+     - open: calls are rejected for `reset_timeout` seconds
+     - half-open: a single trial call is allowed, its success closes the
+       circuit and failure opens it again
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if (
+                self._state == self.OPEN
+                and self._clock() - self._opened_at >= self._reset_timeout
+            ):
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self._reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_running = False
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self._failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class LicenseManagerClient:
+    """HTTP client of license manager service
+
+    Connections are pooled and kept alive between requests. Connection
+    errors, timeouts and 429/5xx responses are retried up to `retries` times
+    with exponential backoff and full jitter, every failed attempt is
+    reported to the circuit breaker
+    """
+
+    _RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+    _HEADERS = {'Accept': 'application/json'}
+
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float,
+        read_timeout: float,
+        retries: int,
+        backoff: float,
+        backoff_max: float,
+        pool_maxsize: int,
+        circuit_breaker: CircuitBreaker,
+    ):
+        self._base_url = base_url.rstrip('/')
+        self._retries = retries
+        self._backoff = backoff
+        self._backoff_max = backoff_max
+        self._circuit_breaker = circuit_breaker
+        self._pool = urllib3.PoolManager(
+            maxsize=pool_maxsize,
+            timeout=urllib3.Timeout(
+                connect=connect_timeout, read=read_timeout
+            ),
+            retries=False,
+            headers=self._HEADERS,
+        )
+
+    @property
+    def circuit_state(self) -> str:
+        return self._circuit_breaker.state
+
+    def get_license_key(self, license_key: str) -> dict:
+        """Returns license key info, e.g. `{"demo": true}`"""
+        return self._request(
+            'GET', f'/license_keys/{quote(license_key, safe="")}/'
+        )
+
+    def classify_license_keys(
+        self,
+        license_keys: list[str]
+    ) -> dict[str, bool]:
+        """Classifies several license keys with a single request
+
+        Keys unknown to license manager service are missing in result
+        """
+        response = self._request(
+            'POST',
+            '/license_keys/classify/',
+            body=dict(license_keys=license_keys),
+        )
+        return {
+            license_key: bool(demo)
+            for license_key, demo in response['demo'].items()
+        }
+
+    def get_demo_ranges(self, since: None | int = None) -> dict:
+        """Returns demo key ranges changed after `since` version
+
+        Response is `{"version": ..., "full": ..., "added": [[first, last],
+        ...], "removed": [...]}`, `full` response lists all current ranges
+        in `added`, e.g. when `since` is `None` or too old
+        """
+        path = '/demo_ranges/'
+        if since is not None:
+            path = f'{path}?since={since}'
+        return self._request('GET', path)
+
+    def list_demo_keys(self, after: None | str, limit: int) -> dict:
+        """Returns page of valid demo keys ordered by value
+
+        Response is `{"license_keys": [...], "next": ..., "total": ...}`,
+        `next` is passed as `after` to get the next page, it is `null` on
+        the last one
+        """
+        path = f'/demo_keys/?limit={limit}'
+        if after is not None:
+            path = f'{path}&after={quote(after, safe="")}'
+        return self._request('GET', path)
+
+    def _request(self, method: str, path: str, body: None | dict = None):
+        url = f'{self._base_url}{path}'
+        encoded_body = None if body is None else json.dumps(body).encode()
+        headers = self._HEADERS
+        if body is not None:
+            # Request headers replace default ones of the pool
+            headers = {**headers, 'Content-Type': 'application/json'}
+        for attempt in range(self._retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, self._backoff_delay(attempt)))
+            if not self._circuit_breaker.allow():
+                raise LicenseManagerUnavailableError(
+                    'License manager service is unavailable (circuit is open)'
+                )
+            try:
+                response = self._pool.request(
+                    method, url, body=encoded_body, headers=headers
+                )
+            except urllib3.exceptions.HTTPError as e:
+                self._circuit_breaker.record_failure()
+                error = f'{type(e).__name__}: {e}'
+                continue
+            except BaseException:
+                # Half-open trial must be finished whatever has happened
+                self._circuit_breaker.record_failure()
+                raise
+            if response.status in self._RETRY_STATUSES:
+                self._circuit_breaker.record_failure()
+                error = f'HTTP {response.status}'
+                continue
+            self._circuit_breaker.record_success()
+            if response.status == 404:
+                raise LicenseKeyNotFoundError(path)
+            if response.status >= 400:
+                raise LicenseManagerUnavailableError(
+                    f'License manager service rejected request: '
+                    f'HTTP {response.status}'
+                )
+            try:
+                return json.loads(response.data)
+            except ValueError:
+                raise LicenseManagerUnavailableError(
+                    'License manager service returned invalid json'
+                )
+        raise LicenseManagerUnavailableError(
+            f'License manager service has failed '
+            f'{self._retries + 1} attempts: {error}'
+        )
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Upper bound of delay before retry attempt"""
+        return min(self._backoff_max, self._backoff * 2 ** (attempt - 1))
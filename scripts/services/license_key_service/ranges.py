@@ -0,0 +1,74 @@
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable
+
+USB = 'usb'
+SRL = 'srl'
+
+_HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+
+
+def parse_license_key(license_key: str) -> None | tuple[str, int]:
+    """Returns license key kind and numeric value
+
+    USB keys are `0x` followed by 8 hex digits (prefix may be omitted), serial
+    keys are 4 groups of 4 hex digits separated with `-`. `None` is returned
+    for unexpected keys
+    """
+    if len(license_key) == 8:
+        kind, digits = USB, license_key
+    elif len(license_key) == 10:
+        kind, digits = USB, license_key[2:]
+    elif len(license_key) == 19 and license_key[4::5] == '---':
+        kind, digits = SRL, license_key.replace('-', '')
+    else:
+        return None
+    if len(digits) != (8 if kind == USB else 16):
+        return None
+    if not _HEX_DIGITS.issuperset(digits):
+        return None
+    return kind, int(digits, 16)
+
+
+class DemoKeyRangeIndex:
+    """Immutable index of demo license key ranges
+
+    Ranges are inclusive `(first key, last key)` pairs of the same kind.
+    Overlapping and adjacent ranges are merged, starts and ends of the
+    resulting disjoint ranges are kept in sorted unsigned 64-bit arrays per
+    key kind, so lookup is a single binary search
+    """
+
+    def __init__(self, ranges: Iterable[tuple[str, str]] = ()):
+        bounds: dict[str, list[tuple[int, int]]] = {USB: [], SRL: []}
+        for first, last in ranges:
+            start, end = parse_license_key(first), parse_license_key(last)
+            if start is None or end is None or start[0] != end[0]:
+                raise ValueError(f'Invalid demo key range: {first}..{last}')
+            if start[1] > end[1]:
+                raise ValueError(f'Empty demo key range: {first}..{last}')
+            bounds[start[0]].append((start[1], end[1]))
+        self._starts: dict[str, array] = {}
+        self._ends: dict[str, array] = {}
+        for kind, kind_bounds in bounds.items():
+            starts, ends = array('Q'), array('Q')
+            for start, end in sorted(kind_bounds):
+                if ends and start <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._starts[kind] = starts
+            self._ends[kind] = ends
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts in self._starts.values())
+
+    def contains(self, license_key: str) -> None | bool:
+        """Checks if key is demo, `None` is returned for unexpected keys"""
+        parsed = parse_license_key(license_key)
+        if parsed is None:
+            return None
+        kind, value = parsed
+        i = bisect_right(self._starts[kind], value) - 1
+        return i >= 0 and value <= self._ends[kind][i]
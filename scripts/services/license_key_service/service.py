@@ -0,0 +1,564 @@
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.core.cache.backends.base import BaseCache
+
+from scripts.services.common import ProcessThread, StatsCounterMixin
+
+from .bloom import BloomFilter, MappedBloomFilter
+from .cache import LocalTTLCache
+from .client import LicenseKeyNotFoundError, LicenseManagerClient
+from .ranges import DemoKeyRangeIndex
+from .single_flight import SingleFlight
+from .structures import LicenseKeyCacheStats
+
+logger = logging.getLogger(__name__)
+
+
+class LicenseKeyService(StatsCounterMixin):
+    """Service for checking if license key is demo
+
+    Key is classified in memory by demo key filter and synced range index,
+    then by local and shared (Django cache framework) caches, and by license
+    manager service on miss. Shared entries are refreshed in background ahead
+    of expiry and served stale while the service is unavailable. Lookups of
+    the same key are coalesced within a process and, for up to `lock_wait`
+    seconds, across processes. Without `client` every key is demo
+    """
+
+    _SHARED_KEY_PREFIX = 'slm:lk:entry:'
+    _LOCK_KEY_PREFIX = 'slm:lk:lock:'
+
+    def __init__(
+        self,
+        client: None | LicenseManagerClient,
+        local_cache: LocalTTLCache,
+        shared_cache: None | BaseCache,
+        positive_ttl: float,
+        negative_ttl: float,
+        local_ttl: float,
+        lock_timeout: float = 5.,
+        lock_wait: float = .5,
+        lock_poll_interval: float = .05,
+        lookup_batch_size: int = 100,
+        range_sync_interval: float = 0.,
+        range_max_age: float = 600.,
+        clock: Callable[[], float] = time.monotonic,
+        demo_key_filter: None | MappedBloomFilter = None,
+        stale_ttl: float = 0.,
+        refresh_ahead: float = 0.,
+        refresh_workers: int = 2,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        self._client = client
+        self._local_cache = local_cache
+        self._shared_cache = shared_cache
+        self._positive_ttl = positive_ttl
+        self._negative_ttl = negative_ttl
+        self._local_ttl = local_ttl
+        self._lock_timeout = lock_timeout
+        self._lock_wait = min(lock_wait, lock_timeout)
+        self._lock_poll_interval = lock_poll_interval
+        self._lookup_batch_size = lookup_batch_size
+        self._range_sync_interval = range_sync_interval
+        self._range_max_age = range_max_age
+        self._clock = clock
+        self._demo_key_filter = demo_key_filter
+        self._stale_ttl = stale_ttl
+        self._refresh_ahead = refresh_ahead
+        self._refresh_workers = refresh_workers
+        self._wall_clock = wall_clock
+        self._refreshing: set[str] = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor: None | ThreadPoolExecutor = None
+        self._refresh_executor_pid: None | int = None
+        self._single_flight = SingleFlight()
+        self._range_index: None | DemoKeyRangeIndex = None
+        self._ranges: frozenset[tuple[str, str]] = frozenset()
+        self._ranges_version: None | int = None
+        self._ranges_synced_at = 0.
+        self._range_refresh_lock = threading.Lock()
+        self._range_sync = ProcessThread(
+            target=self._sync_ranges, name='demo-key-range-sync'
+        )
+        self._stats = LicenseKeyCacheStats()
+        self._stats_lock = threading.Lock()
+
+    def is_demo_key(self, license_key: str) -> bool:
+        demo = self._classify_in_memory(license_key)
+        if demo is not None:
+            return demo
+        return self._classify_remote(license_key)
+
+    async def ais_demo_key(self, license_key: str) -> bool:
+        """Async `is_demo_key`
+
+        Keys classified in memory (filter, ranges, local cache) are served
+        in the event loop, shared cache and license manager service are
+        accessed in a thread, as their clients are synchronous
+        """
+        demo = self._classify_in_memory(license_key)
+        if demo is not None:
+            return demo
+        return await asyncio.to_thread(self._classify_remote, license_key)
+
+    def _classify_in_memory(self, license_key: str) -> None | bool:
+        """Classifies key without I/O, `None` is returned on miss"""
+        if self._filter_rejects(license_key):
+            return False
+        demo = self._range_lookup(license_key)
+        if demo is not None:
+            return demo
+        demo = self._local_cache.get(license_key)
+        if demo is not None:
+            self._count(local_hits=1)
+        return demo
+
+    def _classify_remote(self, license_key: str) -> bool:
+        entry = self._get_shared_entry(license_key)
+        if entry is not None:
+            return self._serve_shared(license_key, entry)
+        self._count(misses=1)
+        demo, shared = self._single_flight.do(
+            license_key, lambda: self._load(license_key)
+        )
+        if shared:
+            self._count(coalesced=1)
+        self._set_local(license_key, demo)
+        return demo
+
+    def is_demo_keys(self, license_keys: Iterable[str]) -> dict[str, bool]:
+        """Classifies several license keys at once
+
+        Cache hits are served locally, shared cache is read with a single
+        request and misses are looked up with batched license manager
+        requests of up to `lookup_batch_size` keys. Batched lookups are not
+        coalesced with concurrent lookups of the same keys
+        """
+        result = {}
+        missing = []
+        local_hits = 0
+        for license_key in dict.fromkeys(license_keys):
+            if self._filter_rejects(license_key):
+                result[license_key] = False
+                continue
+            demo = self._range_lookup(license_key)
+            if demo is None:
+                demo = self._local_cache.get(license_key)
+                local_hits += demo is not None
+            if demo is None:
+                missing.append(license_key)
+            else:
+                result[license_key] = demo
+        self._count(local_hits=local_hits)
+        if not missing:
+            return result
+
+        shared = self._get_shared_many(missing)
+        for license_key, entry in shared.items():
+            result[license_key] = self._serve_shared(license_key, entry)
+        missing = [key for key in missing if key not in shared]
+        if not missing:
+            return result
+
+        self._count(misses=len(missing))
+        looked_up = self._lookup_many(missing)
+        self._set_shared_many(looked_up)
+        for license_key, demo in looked_up.items():
+            self._set_local(license_key, demo)
+        result.update(looked_up)
+        return result
+
+    def refresh_demo_ranges(self) -> bool:
+        """Syncs demo key ranges with license manager service
+
+        Only ranges changed since the previous sync are fetched. Returns
+        `True` if range index has been rebuilt
+        """
+        if self._client is None:
+            return False
+        with self._range_refresh_lock:
+            changes = self._client.get_demo_ranges(since=self._ranges_version)
+            self._count(range_refreshes=1)
+            added = frozenset(tuple(r) for r in changes['added'])
+            if changes['full']:
+                ranges = added
+            else:
+                removed = frozenset(tuple(r) for r in changes['removed'])
+                ranges = (self._ranges - removed) | added
+            rebuilt = self._range_index is None or ranges != self._ranges
+            if rebuilt:
+                self._range_index = DemoKeyRangeIndex(ranges)
+                self._ranges = ranges
+            self._ranges_version = changes['version']
+            self._ranges_synced_at = self._clock()
+        return rebuilt
+
+    def build_demo_key_filter(
+        self,
+        path: Path,
+        fpr: float,
+        max_bytes: int,
+        page_size: int = 10000,
+    ) -> BloomFilter:
+        """Builds Bloom filter of valid demo keys listed by license manager
+        service and saves it to `path`
+
+        Filter is sized for `fpr` false positive rate, but takes at most
+        `max_bytes`. Processes pick saved filter up on their next file check
+        """
+        if self._client is None:
+            raise RuntimeError('License manager service is not configured')
+        page = self._client.list_demo_keys(after=None, limit=page_size)
+        bloom_filter = BloomFilter.create(
+            capacity=page['total'], fpr=fpr, max_bytes=max_bytes
+        )
+        while True:
+            for license_key in page['license_keys']:
+                bloom_filter.add(license_key)
+            if page['next'] is None:
+                break
+            page = self._client.list_demo_keys(
+                after=page['next'], limit=page_size
+            )
+        bloom_filter.save(path)
+        return bloom_filter
+
+    def invalidate(self, license_key: str) -> None:
+        """Drops cached classification of license key
+
+        Local caches of other processes keep it for up to `local_ttl`. Range
+        index is not affected
+        """
+        self._count(invalidations=1)
+        self._local_cache.delete(license_key)
+        if self._shared_cache is not None:
+            try:
+                self._shared_cache.delete(self._shared_key(license_key))
+            except Exception:
+                self._count(shared_errors=1)
+                logger.exception('Failed to invalidate license key')
+
+    def clear_local(self) -> None:
+        """Drops all classifications cached by this process"""
+        self._local_cache.clear()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            result = self._stats.as_dict()
+        result.update(local_entries=len(self._local_cache))
+        bloom_filter = self._get_demo_key_filter()
+        if bloom_filter is not None:
+            result.update(demo_key_filter=dict(
+                keys=bloom_filter.count,
+                bytes=bloom_filter.size,
+                fpr=round(bloom_filter.fpr, 6),
+            ))
+        if self._range_index is not None:
+            result.update(
+                demo_ranges=len(self._range_index),
+                demo_ranges_version=self._ranges_version,
+            )
+        if self._client is not None:
+            result.update(circuit=self._client.circuit_state)
+        return result
+
+    def _serve_shared(
+        self,
+        license_key: str,
+        entry: tuple[bool, float],
+    ) -> bool:
+        """Returns classification from shared entry, refreshing it if it is
+        stale or about to expire
+        """
+        demo, fresh_until = entry
+        now = self._wall_clock()
+        if now < fresh_until:
+            self._count(shared_hits=1)
+        else:
+            self._count(stale_hits=1)
+        if now < fresh_until - self._refresh_ahead:
+            self._set_local(license_key, demo, fresh_until - now)
+        else:
+            # Not cached locally, so the refreshed entry is picked up soon
+            self._schedule_refresh(license_key)
+        return demo
+
+    def _schedule_refresh(self, license_key: str) -> None:
+        with self._refresh_lock:
+            if license_key in self._refreshing:
+                return
+            self._refreshing.add(license_key)
+            executor = self._get_refresh_executor()
+        executor.submit(self._refresh, license_key)
+
+    def _get_refresh_executor(self) -> ThreadPoolExecutor:
+        """Returns executor of the current process, threads do not survive
+        fork
+        """
+        pid = os.getpid()
+        if self._refresh_executor_pid != pid:
+            self._refresh_executor = ThreadPoolExecutor(
+                max_workers=self._refresh_workers,
+                thread_name_prefix='license-key-refresh',
+            )
+            self._refresh_executor_pid = pid
+        return self._refresh_executor
+
+    def _refresh(self, license_key: str) -> None:
+        """Looks license key up again unless other process is doing it"""
+        try:
+            token = self._acquire_lock(license_key)
+            if token is None:
+                return
+            try:
+                self._count(background_refreshes=1, lookups=1)
+                demo = self._lookup(license_key)
+                self._set_shared(license_key, demo)
+                self._set_local(license_key, demo)
+            finally:
+                self._release_lock(license_key, token)
+        except Exception:
+            self._count(refresh_errors=1)
+            logger.exception('Failed to refresh license key classification')
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(license_key)
+
+    def _get_demo_key_filter(self) -> None | BloomFilter:
+        if self._demo_key_filter is None:
+            return None
+        return self._demo_key_filter.get()
+
+    def _filter_rejects(self, license_key: str) -> bool:
+        """Checks if license key is definitely not a valid demo key"""
+        bloom_filter = self._get_demo_key_filter()
+        if bloom_filter is None:
+            return False
+        if bloom_filter.might_contain(license_key) is False:
+            self._count(filter_rejects=1)
+            return True
+        return False
+
+    def _range_lookup(self, license_key: str) -> None | bool:
+        """Classifies license key with range index if it is fresh"""
+        self._ensure_range_sync()
+        index = self._range_index
+        if index is None:
+            return None
+        if self._clock() - self._ranges_synced_at > self._range_max_age:
+            return None
+        demo = index.contains(license_key)
+        if demo is not None:
+            self._count(range_hits=1)
+        return demo
+
+    def _ensure_range_sync(self) -> None:
+        if self._range_sync_interval and self._client is not None:
+            self._range_sync.ensure_started()
+
+    def _sync_ranges(self) -> None:
+        while True:
+            try:
+                self.refresh_demo_ranges()
+            except Exception:
+                self._count(range_refresh_errors=1)
+                logger.exception('Failed to refresh demo key ranges')
+            time.sleep(self._range_sync_interval)
+
+    def _lookup(self, license_key: str) -> bool:
+        """Classifies license key with license manager service"""
+        if self._client is None:
+            return True
+        try:
+            return bool(self._client.get_license_key(license_key)['demo'])
+        except LicenseKeyNotFoundError:
+            return False
+
+    def _lookup_many(self, license_keys: list[str]) -> dict[str, bool]:
+        """Classifies license keys with batched license manager requests"""
+        if self._client is None:
+            return dict.fromkeys(license_keys, True)
+        result = {}
+        for i in range(0, len(license_keys), self._lookup_batch_size):
+            batch = license_keys[i:i + self._lookup_batch_size]
+            self._count(lookups=1)
+            classified = self._client.classify_license_keys(batch)
+            for license_key in batch:
+                result[license_key] = classified.get(license_key, False)
+        return result
+
+    def _load(self, license_key: str) -> bool:
+        """Looks license key up once across processes holding shared lock
+
+        Process which failed to acquire the lock waits up to `lock_wait`
+        seconds for classification stored by the lock holder and looks it up
+        itself then, so request thread is not held for the whole lock timeout
+        """
+        token = self._acquire_lock(license_key)
+        if token is None:
+            demo = self._wait_shared(license_key)
+            if demo is not None:
+                self._count(lock_waits=1)
+                return demo
+        try:
+            if token is not None:
+                # Previous lock holder could have stored it after our miss
+                demo = self._get_shared(license_key)
+                if demo is not None:
+                    return demo
+            self._count(lookups=1)
+            demo = self._lookup(license_key)
+            self._set_shared(license_key, demo)
+        finally:
+            if token is not None:
+                self._release_lock(license_key, token)
+        return demo
+
+    def _acquire_lock(self, license_key: str) -> None | str:
+        """Returns token of acquired lock or `None` if other process holds it
+
+        Lookups are not coordinated without shared cache or if it fails, so
+        token is returned in these cases too
+        """
+        token = uuid.uuid4().hex
+        if self._shared_cache is None:
+            return token
+        try:
+            acquired = self._shared_cache.add(
+                self._lock_key(license_key),
+                token,
+                timeout=math.ceil(self._lock_timeout),
+            )
+        except Exception:
+            self._count(shared_errors=1)
+            logger.exception('Failed to acquire license key lock')
+            return token
+        return token if acquired else None
+
+    def _release_lock(self, license_key: str, token: str) -> None:
+        """Releases lock unless it has expired and been taken by other
+
+        Check and delete are not atomic, so lock taken in between can be
+        dropped too, at worst it causes one more lookup
+        """
+        if self._shared_cache is None:
+            return
+        lock_key = self._lock_key(license_key)
+        try:
+            if self._shared_cache.get(lock_key) == token:
+                self._shared_cache.delete(lock_key)
+        except Exception:
+            self._count(shared_errors=1)
+            logger.exception('Failed to release license key lock')
+
+    def _wait_shared(self, license_key: str) -> None | bool:
+        deadline = time.monotonic() + self._lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(self._lock_poll_interval)
+            demo = self._get_shared(license_key)
+            if demo is not None:
+                return demo
+        return None
+
+    def _ttl(self, demo: bool) -> float:
+        return self._positive_ttl if demo else self._negative_ttl
+
+    def _set_local(
+        self,
+        license_key: str,
+        demo: bool,
+        ttl: None | float = None,
+    ) -> None:
+        """Caches classification locally until it is due to refresh"""
+        if ttl is None:
+            ttl = self._ttl(demo)
+        ttl = min(ttl - self._refresh_ahead, self._local_ttl)
+        self._local_cache.set(license_key, demo, ttl=ttl)
+
+    def _get_shared(self, license_key: str) -> None | bool:
+        entry = self._get_shared_entry(license_key)
+        return None if entry is None else entry[0]
+
+    def _get_shared_entry(self, license_key: str) -> None | tuple[bool, float]:
+        """Returns classification and time it is fresh until"""
+        if self._shared_cache is None:
+            return None
+        try:
+            return self._shared_cache.get(self._shared_key(license_key))
+        except Exception:
+            self._count(shared_errors=1)
+            logger.exception('Failed to read license key from shared cache')
+            return None
+
+    def _set_shared(self, license_key: str, demo: bool) -> None:
+        if self._shared_cache is None:
+            return
+        try:
+            self._shared_cache.set(
+                self._shared_key(license_key),
+                self._shared_entry(demo),
+                timeout=self._ttl(demo) + self._stale_ttl,
+            )
+        except Exception:
+            self._count(shared_errors=1)
+            logger.exception('Failed to write license key to shared cache')
+
+    def _get_shared_many(
+        self,
+        license_keys: list[str],
+    ) -> dict[str, tuple[bool, float]]:
+        if self._shared_cache is None:
+            return {}
+        shared_keys = {
+            self._shared_key(license_key): license_key
+            for license_key in license_keys
+        }
+        try:
+            found = self._shared_cache.get_many(list(shared_keys))
+        except Exception:
+            self._count(shared_errors=1)
+            logger.exception('Failed to read license keys from shared cache')
+            return {}
+        return {
+            shared_keys[shared_key]: demo
+            for shared_key, demo in found.items()
+        }
+
+    def _set_shared_many(self, classified: dict[str, bool]) -> None:
+        if self._shared_cache is None:
+            return
+        for demo in (True, False):
+            data = {
+                self._shared_key(license_key): self._shared_entry(demo)
+                for license_key, value in classified.items()
+                if value is demo
+            }
+            if not data:
+                continue
+            try:
+                self._shared_cache.set_many(
+                    data, timeout=self._ttl(demo) + self._stale_ttl
+                )
+            except Exception:
+                self._count(shared_errors=1)
+                logger.exception(
+                    'Failed to write license keys to shared cache'
+                )
+
+    def _shared_entry(self, demo: bool) -> tuple[bool, float]:
+        return demo, self._wall_clock() + self._ttl(demo)
+
+    def _shared_key(self, license_key: str) -> str:
+        return f'{self._SHARED_KEY_PREFIX}{license_key}'
+
+    def _lock_key(self, license_key: str) -> str:
+        return f'{self._LOCK_KEY_PREFIX}{license_key}'
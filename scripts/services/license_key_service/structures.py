@@ -0,0 +1,41 @@
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class LicenseKeyCacheStats:
+    """License key classification cache counters"""
+    filter_rejects: int = 0
+    range_hits: int = 0
+    local_hits: int = 0
+    shared_hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    lookups: int = 0
+    coalesced: int = 0
+    lock_waits: int = 0
+    shared_errors: int = 0
+    invalidations: int = 0
+    background_refreshes: int = 0
+    refresh_errors: int = 0
+    range_refreshes: int = 0
+    range_refresh_errors: int = 0
+
+    @property
+    def hits(self) -> int:
+        return (
+            self.filter_rejects
+            + self.range_hits
+            + self.local_hits
+            + self.shared_hits
+            + self.stale_hits
+        )
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.
+
+    def as_dict(self) -> dict:
+        return dict(
+            asdict(self), hits=self.hits, hit_ratio=round(self.hit_ratio, 4)
+        )
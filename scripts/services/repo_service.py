@@ -1,4 +1,43 @@
+import hashlib
+from dataclasses import dataclass
+
+
+@dataclass
+class ScriptSource:
+    """Script sources of specific revision"""
+    script_id: str
+    revision: str
+    filename: str
+    data: bytes
+
+
+def source_revision(data: bytes) -> str:
+    """Returns revision of script sources derived from their content"""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
 class RepoService:
-    """Service for integrations with scripts repository"""
+    """Service for integrations with scripts repository
+
+    Scripts repository is not connected, every script is served with the
+    bundled placeholder source. Revision is derived from source content, so
+    cached templates and artifacts are invalidated once source changes
+    """
+
+    PLACEHOLDER_SOURCE = 'print("Hello World!")\n'.encode()
+
     def __init__(self):
         pass
+
+    def get_revision(self, script_id: str) -> str:
+        """Returns current revision of script sources"""
+        return self.get_source(script_id).revision
+
+    def get_source(self, script_id: str) -> ScriptSource:
+        """Returns script sources of current revision"""
+        return ScriptSource(
+            script_id=script_id,
+            revision=source_revision(self.PLACEHOLDER_SOURCE),
+            filename='script.py',
+            data=self.PLACEHOLDER_SOURCE,
+        )
@@ -1,5 +1,8 @@
-from .service import ScriptLicenseManagerService
+from .audit_writer import BufferedAuditWriter
+from .service import ArtifactNotModified, ScriptLicenseManagerService
 
 __all__ = [
-    'ScriptLicenseManagerService'
+    'ArtifactNotModified',
+    'BufferedAuditWriter',
+    'ScriptLicenseManagerService',
 ]
@@ -0,0 +1,125 @@
+import atexit
+import dataclasses
+import logging
+import threading
+from collections import deque
+from collections.abc import Callable
+
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from scripts.services.common import ProcessThread, StatsCounterMixin
+
+from .structures import AuditWriterStats, IssuedLicense
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedAuditWriter(StatsCounterMixin):
+    """Writes issued licenses behind requests
+
+    Records are queued in process and written with a single insert by a
+    background thread once `batch_size` records are queued, and at least
+    every `flush_interval` seconds. Record is written synchronously when
+    queue already holds `max_size` records, and strict records (the ones
+    other requests read, e.g. permanent grants checked by `update_issued`)
+    are always written synchronously. Queue is flushed at interpreter exit,
+    records of killed process are lost. Failed batches are logged and
+    dropped
+    """
+
+    def __init__(
+        self,
+        write: Callable[[list[IssuedLicense]], None],
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+    ):
+        self._write = write
+        self._max_size = max_size
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: deque[IssuedLicense] = deque()
+        self._queue_cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._flusher = ProcessThread(
+            target=self._run_flusher, name='issued-license-audit'
+        )
+        self._stats = AuditWriterStats()
+        self._stats_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def add(self, entity: IssuedLicense, strict: bool = False) -> None:
+        """Queues record, it is written at once if strict or queue is full"""
+        self.add_many([entity], strict=strict)
+
+    def add_many(
+        self,
+        entities: list[IssuedLicense],
+        strict: bool = False,
+    ) -> None:
+        if not strict:
+            entities = [e for e in entities if not self.offer(e)]
+        if entities:
+            self._count(sync_writes=len(entities))
+            self._write(entities)
+
+    def offer(self, entity: IssuedLicense) -> bool:
+        """Queues record if there is room for it, never blocks on I/O
+
+        Issue time is set when record is queued
+        """
+        if entity.issued_at is None:
+            entity = dataclasses.replace(entity, issued_at=timezone.now())
+        with self._queue_cond:
+            if len(self._queue) >= self._max_size:
+                return False
+            self._queue.append(entity)
+            if len(self._queue) >= self._batch_size:
+                self._queue_cond.notify()
+        self._count(queued=1)
+        self._flusher.ensure_started()
+        return True
+
+    def flush(self) -> None:
+        """Writes queued records in the calling thread"""
+        while self._write_batch():
+            pass
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = self._stats.as_dict()
+        return dict(stats, mode='buffered', pending=len(self._queue))
+
+    def _write_batch(self) -> int:
+        with self._write_lock:
+            with self._queue_cond:
+                batch = [
+                    self._queue.popleft()
+                    for _ in range(min(self._batch_size, len(self._queue)))
+                ]
+            if not batch:
+                return 0
+            try:
+                self._write(batch)
+            except Exception:
+                self._count(failed=len(batch))
+                logger.exception(
+                    'Failed to write %s issued licenses', len(batch)
+                )
+            else:
+                self._count(written=len(batch), batches=1)
+            return len(batch)
+
+    def _run_flusher(self) -> None:
+        while True:
+            with self._queue_cond:
+                self._queue_cond.wait_for(
+                    lambda: len(self._queue) >= self._batch_size,
+                    timeout=self._flush_interval,
+                )
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                connection.close()
@@ -1,8 +1,23 @@
+import asyncio
+import dataclasses
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 
+from asgiref.sync import sync_to_async
+
+from scripts import encoding
 from scripts.services.app_settings import AppSettings
+from scripts.services.artifact_cache import (
+    ArtifactCache,
+    CachedArtifact,
+    compress,
+)
+from scripts.services.encoding_service import ScriptEncodingService
 from scripts.services.license_key_service import LicenseKeyService
+from scripts.services.repo_service import RepoService
 
+from .audit_writer import BufferedAuditWriter
 from .storage_adapters import IssuedLicenseDAO
 from .structures import (
     ActionType,
@@ -13,57 +28,419 @@ from .structures import (
 )
 
 
+class ArtifactNotModified(Exception):
+    """Client already has artifact identified by `etag`"""
+
+    def __init__(self, etag: str):
+        super().__init__(f'Artifact {etag} has not been modified')
+        self.etag = etag
+
+
 class ScriptLicenseManagerService:
-    """Service processing app domain logic"""
+    """Service processing app domain logic
+
+    Issued licenses are written synchronously unless `audit_writer` is set,
+    which writes them behind requests
+    """
 
     def __init__(
         self,
         lk_service: LicenseKeyService,
+        repo_service: RepoService,
+        encoding_service: ScriptEncodingService,
+        artifact_cache: ArtifactCache,
         app_settings: AppSettings,
+        audit_writer: None | BufferedAuditWriter = None,
     ):
         self._lk_service = lk_service
+        self._repo_service = repo_service
+        self._encoding_service = encoding_service
+        self._artifact_cache = artifact_cache
         self._app_settings = app_settings
+        self._audit_writer = audit_writer
+        self._batch_executor = ThreadPoolExecutor(
+            max_workers=app_settings.batch_generation_workers,
+            thread_name_prefix='slm-batch',
+        )
+
+    @property
+    def artifact_cache(self) -> ArtifactCache:
+        return self._artifact_cache
+
+    @property
+    def audit_writer(self) -> None | BufferedAuditWriter:
+        return self._audit_writer
+
+    def audit_stats(self) -> dict:
+        if self._audit_writer is None:
+            return dict(mode='sync')
+        return self._audit_writer.stats()
 
     def generate_script(
         self,
         script: Script,
-        config: ScriptLicenseConfig
+        config: ScriptLicenseConfig,
+        if_none_match: None | list[str] = None,
+        accept_encodings: Sequence[str] = (),
+        on_generated: None | Callable[[GeneratedScript], None] = None,
     ) -> GeneratedScript:
+        """Generates script
+
+        Raises `ArtifactNotModified` if artifact etag matches one of
+        `if_none_match` etags without generating the script. Compressed
+        variant is returned if one of `accept_encodings` is available.
+        `on_generated` is called before issued license is recorded, license
+        is not issued if it raises
+        """
         demo = self._validate_expiration(config)
-        generated = self._generate_script(script, config)
+        key = self._artifact_key(script, config)
+        self._check_not_modified(
+            script, config, key, if_none_match,
+            action=ActionType.GENERATE, demo=demo,
+        )
+        generated = self._get_or_generate_script(
+            script, config, key, accept_encodings
+        )
+        if on_generated is not None:
+            on_generated(generated)
         self._finalize(script, config, action=ActionType.GENERATE, demo=demo)
         return generated
 
+    async def agenerate_script(
+        self,
+        script: Script,
+        config: ScriptLicenseConfig,
+        if_none_match: None | list[str] = None,
+        accept_encodings: Sequence[str] = (),
+    ) -> GeneratedScript:
+        """Async `generate_script`
+
+        License key lookup and encoding job are awaited without blocking the
+        event loop, issued license is stored with async ORM. Artifact cache
+        is accessed in a thread as its disk tier is synchronous
+        """
+        demo = await self._avalidate_expiration(config)
+        key = self._artifact_key(script, config)
+        etag = self._matching_etag(key, if_none_match)
+        if etag is not None:
+            if self._app_settings.audit_not_modified:
+                await self._afinalize(
+                    script, config, action=ActionType.GENERATE, demo=demo
+                )
+            raise ArtifactNotModified(etag)
+        generated = await self._aget_or_generate_script(
+            script, config, key, accept_encodings
+        )
+        await self._afinalize(
+            script, config, action=ActionType.GENERATE, demo=demo
+        )
+        return generated
+
+    def generate_scripts(
+        self,
+        scripts: list[Script],
+        config: ScriptLicenseConfig,
+        extra_params: None | dict[str, None | dict] = None,
+    ) -> list[GeneratedScript]:
+        """Generates several scripts with the same license config
+
+        License key is validated once for the whole batch, scripts are
+        generated in parallel and issued licenses are stored with a single
+        insert. `extra_params` maps script id to its extra params
+        """
+        extra_params = extra_params or {}
+        demo = self._validate_expiration(config)
+        configs = [
+            dataclasses.replace(
+                config, extra_params=extra_params.get(script.id)
+            )
+            for script in scripts
+        ]
+        generated = list(self._batch_executor.map(
+            self._get_or_generate_script, scripts, configs
+        ))
+        self._store_issued([
+            self._issued_license(
+                script, script_config, action=ActionType.GENERATE, demo=demo
+            )
+            for script, script_config in zip(scripts, configs)
+        ])
+        return generated
+
     def update_issued(
         self,
         script: Script,
-        config: ScriptLicenseConfig
+        config: ScriptLicenseConfig,
+        if_none_match: None | list[str] = None,
+        accept_encodings: Sequence[str] = (),
+        on_generated: None | Callable[[GeneratedScript], None] = None,
     ) -> GeneratedScript:
-        issued = IssuedLicenseDAO.find_existing_license(script, config)
-        if issued is None or not issued.is_permanent:
+        """Regenerates script permanently issued for license key
+
+        Raises `ArtifactNotModified` if artifact etag matches one of
+        `if_none_match` etags without generating the script. Compressed
+        variant is returned if one of `accept_encodings` is available.
+        `on_generated` is called as in `generate_script`
+        """
+        if not IssuedLicenseDAO.has_permanent_license(
+            script, config.license_key
+        ):
             raise PermissionError(
                 'Script has not been generated permanently for this key'
             )
         demo = self._validate_expiration(config)
-        generated = self._generate_script(script, config)
+        key = self._artifact_key(script, config)
+        self._check_not_modified(
+            script, config, key, if_none_match,
+            action=ActionType.UPDATE, demo=demo,
+        )
+        generated = self._get_or_generate_script(
+            script, config, key, accept_encodings
+        )
+        if on_generated is not None:
+            on_generated(generated)
         self._finalize(script, config, action=ActionType.UPDATE, demo=demo)
         return generated
 
-    def _generate_script(
+    def prewarm_script(self, script: Script) -> None:
+        """Builds license independent artifacts of script into caches
+
+        Encoding template, plain and encoded (without license key and
+        expiration) artifacts of current script revision are built if
+        they are not cached yet. No issued license is recorded
+        """
+        source = self._repo_service.get_source(script.id)
+        self._encoding_service.get_template(source)
+        for config in (
+            ScriptLicenseConfig(encode=False),
+            ScriptLicenseConfig(encode=True),
+        ):
+            self._get_or_generate_script(script, config)
+
+    def _check_not_modified(
         self,
         script: Script,
-        config: ScriptLicenseConfig
+        config: ScriptLicenseConfig,
+        key: str,
+        if_none_match: None | list[str],
+        action: ActionType,
+        demo: bool,
+    ) -> None:
+        """Raises `ArtifactNotModified` if client has actual artifact
+
+        Issued license is still recorded if `audit_not_modified` is set
+        """
+        etag = self._matching_etag(key, if_none_match)
+        if etag is not None:
+            if self._app_settings.audit_not_modified:
+                self._finalize(script, config, action=action, demo=demo)
+            raise ArtifactNotModified(etag)
+
+    def _matching_etag(
+        self,
+        key: str,
+        if_none_match: None | list[str],
+    ) -> None | str:
+        """Returns artifact etag client already has, if any
+
+        Artifacts are served for POST requests, where RFC 9110 13.1.2
+        expects 412 for a matching etag. Generate endpoints deliberately
+        answer 304 instead, as the request downloads the artifact the etag
+        identifies. `*` is ignored, so the script is always issued to a
+        client that has no copy of it yet
+        """
+        if not if_none_match:
+            return None
+        etags = [
+            self._etag(key, content_encoding)
+            for content_encoding in (
+                None, *self._app_settings.artifact_content_encodings
+            )
+        ]
+        client_etags = {e.removeprefix('W/') for e in if_none_match}
+        return next((e for e in etags if e in client_etags), None)
+
+    def _get_or_generate_script(
+        self,
+        script: Script,
+        config: ScriptLicenseConfig,
+        key: None | str = None,
+        accept_encodings: Sequence[str] = (),
     ) -> GeneratedScript:
+        """Serves artifact from cache and generates it on cache miss
+
+        Artifact is addressed by script revision and license config fields
+        affecting its content, so config should be already validated.
+        The first of `accept_encodings` the artifact has a cached variant for
+        is served, raw content is served otherwise
+        """
+        key = key or self._artifact_key(script, config)
+        artifact = self._artifact_cache.get(key)
+        if artifact is None:
+            artifact = self._cache_artifact(
+                key, self._generate_script(script, config)
+            )
+        return self._serve_artifact(key, artifact, accept_encodings)
+
+    async def _aget_or_generate_script(
+        self,
+        script: Script,
+        config: ScriptLicenseConfig,
+        key: str,
+        accept_encodings: Sequence[str] = (),
+    ) -> GeneratedScript:
+        """Async `_get_or_generate_script`"""
+        artifact = await asyncio.to_thread(self._artifact_cache.get, key)
+        if artifact is None:
+            generated = await self._agenerate_script(script, config)
+            artifact = await asyncio.to_thread(
+                self._cache_artifact, key, generated
+            )
+        return await asyncio.to_thread(
+            self._serve_artifact, key, artifact, accept_encodings
+        )
+
+    def _serve_artifact(
+        self,
+        key: str,
+        artifact: CachedArtifact,
+        accept_encodings: Sequence[str],
+    ) -> GeneratedScript:
+        """Picks cached variant of artifact accepted by client"""
+        filename = artifact.meta['filename']
+        available = artifact.meta.get('content_encodings', [])
+        for content_encoding in accept_encodings:
+            if content_encoding not in available:
+                continue
+            variant = self._artifact_cache.get(
+                self._variant_key(key, content_encoding)
+            )
+            if variant is not None:
+                artifact.close()
+                return GeneratedScript(
+                    data=variant.data,
+                    filename=filename,
+                    file=variant.file,
+                    etag=self._etag(key, content_encoding),
+                    content_encoding=content_encoding,
+                )
         return GeneratedScript(
-            data='print("Hello World!")\n'.encode(),
-            filename='script.py'
+            data=artifact.data,
+            filename=filename,
+            file=artifact.file,
+            etag=self._etag(key),
+        )
+
+    def _cache_artifact(
+        self,
+        key: str,
+        generated: GeneratedScript
+    ) -> CachedArtifact:
+        """Caches generated artifact together with its compressed variants
+
+        Variants are stored before raw artifact, so the raw one lists only
+        variants already available. Variants not smaller than raw content
+        are dropped
+        """
+        data = generated.data
+        content_encodings = []
+        if len(data) >= self._app_settings.artifact_compression_min_bytes:
+            for content_encoding in (
+                self._app_settings.artifact_content_encodings
+            ):
+                compressed = compress(data, content_encoding)
+                if len(compressed) >= len(data):
+                    continue
+                self._artifact_cache.put(
+                    self._variant_key(key, content_encoding),
+                    CachedArtifact(data=compressed),
+                )
+                content_encodings.append(content_encoding)
+        artifact = CachedArtifact(
+            data=data,
+            meta=dict(
+                filename=generated.filename,
+                content_encodings=content_encodings,
+            ),
+        )
+        self._artifact_cache.put(key, artifact)
+        return artifact
+
+    @staticmethod
+    def _variant_key(key: str, content_encoding: str) -> str:
+        return f'{key}-{content_encoding}'
+
+    @staticmethod
+    def _etag(key: str, content_encoding: None | str = None) -> str:
+        if content_encoding is None:
+            return f'"{key}"'
+        return f'"{key}-{content_encoding}"'
+
+    def _artifact_key(
+        self,
+        script: Script,
+        config: ScriptLicenseConfig
+    ) -> str:
+        return ArtifactCache.make_key(
+            'artifact',
+            encoding.ENCODER_VERSION,
+            script.id,
+            self._repo_service.get_revision(script.id),
+            config.encode_type.value,
+            config.license_key,
+            config.expires,
+            config.extra_params,
         )
 
+    def _generate_script(
+        self,
+        script: Script,
+        config: ScriptLicenseConfig
+    ) -> GeneratedScript:
+        source = self._repo_service.get_source(script.id)
+        data = source.data
+        if config.encode:
+            data = self._encoding_service.encode_script(
+                source=source,
+                license_key=config.license_key,
+                expires=config.expires,
+                extra_params=config.extra_params,
+            )
+        return GeneratedScript(data=data, filename=source.filename)
+
+    async def _agenerate_script(
+        self,
+        script: Script,
+        config: ScriptLicenseConfig
+    ) -> GeneratedScript:
+        source = self._repo_service.get_source(script.id)
+        data = source.data
+        if config.encode:
+            data = await self._encoding_service.aencode_script(
+                source=source,
+                license_key=config.license_key,
+                expires=config.expires,
+                extra_params=config.extra_params,
+            )
+        return GeneratedScript(data=data, filename=source.filename)
+
+    async def _avalidate_expiration(self, config: ScriptLicenseConfig) -> bool:
+        """Async `_validate_expiration`, license key is classified without
+        blocking the event loop
+        """
+        if config.license_key is not None and config.demo is None:
+            config.demo = await self._lk_service.ais_demo_key(
+                config.license_key
+            )
+        return self._validate_expiration(config)
+
     def _validate_expiration(self, config: ScriptLicenseConfig) -> bool:
         is_demo_key = False
         if config.license_key is not None:
             today = date.today()
-            is_demo_key = self._lk_service.is_demo_key(config.license_key)
+            if config.demo is None:
+                config.demo = self._lk_service.is_demo_key(config.license_key)
+            is_demo_key = config.demo
             if is_demo_key:
                 if config.expires is None:
                     config.expires = today + timedelta(
@@ -95,7 +472,50 @@ class ScriptLicenseManagerService:
         action: ActionType,
         demo: bool
     ) -> None:
-        IssuedLicenseDAO.add(IssuedLicense(
+        self._store_issued(
+            [self._issued_license(script, config, action=action, demo=demo)]
+        )
+
+    async def _afinalize(
+        self,
+        script: Script,
+        config: ScriptLicenseConfig,
+        action: ActionType,
+        demo: bool
+    ) -> None:
+        issued = self._issued_license(script, config, action=action, demo=demo)
+        writer = self._audit_writer
+        if writer is None:
+            await IssuedLicenseDAO.aadd(issued)
+        elif self._is_strict(issued) or not writer.offer(issued):
+            await sync_to_async(writer.add)(issued, strict=True)
+
+    def _store_issued(self, issued: list[IssuedLicense]) -> None:
+        if self._audit_writer is None:
+            IssuedLicenseDAO.add_many(issued)
+            return
+        strict = [entity for entity in issued if self._is_strict(entity)]
+        if strict:
+            self._audit_writer.add_many(strict, strict=True)
+        self._audit_writer.add_many(
+            [entity for entity in issued if not self._is_strict(entity)]
+        )
+
+    @staticmethod
+    def _is_strict(issued: IssuedLicense) -> bool:
+        """Permanent grants are read by `update_issued` of any process, so
+        they are written at once
+        """
+        return issued.license_key is not None and issued.is_permanent
+
+    @staticmethod
+    def _issued_license(
+        script: Script,
+        config: ScriptLicenseConfig,
+        action: ActionType,
+        demo: bool
+    ) -> IssuedLicense:
+        return IssuedLicense(
             issued_at=None,
             license_key=config.license_key,
             script_id=script.id,
@@ -105,4 +525,4 @@ class ScriptLicenseManagerService:
             demo_lk=demo,
             expires=config.expires,
             extra_params=config.extra_params,
-        ))
+        )
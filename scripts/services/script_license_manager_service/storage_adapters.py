@@ -1,23 +1,79 @@
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
 from django.utils import timezone
 
 from scripts.models import IssuedLicense as IssuedLicenseModel
+from scripts.models import PermanentLicense as PermanentLicenseModel
 
-from .structures import (
-    ActionType,
-    EncodeType,
-    IssuedLicense,
-    Script,
-    ScriptLicenseConfig,
-)
+from .structures import IssuedLicense, IssuedLicensePartition, Script
 
 
 class IssuedLicenseDAO:
-    """Data access object to connect with issued license storage"""
+    """Data access object to connect with issued license storage
+
+    Permanent licenses are registered in the same transaction as issued
+    license records
+    """
 
     @staticmethod
     def add(entity: IssuedLicense) -> None:
         """Adds record with issued script"""
-        IssuedLicenseModel.objects.create(
+        IssuedLicenseDAO.add_many([entity])
+
+    @staticmethod
+    async def aadd(entity: IssuedLicense) -> None:
+        """Async `add`, the insert is run in a thread"""
+        # Async ORM does not support transactions yet
+        await sync_to_async(IssuedLicenseDAO.add)(entity)
+
+    @staticmethod
+    def add_many(entities: list[IssuedLicense]) -> None:
+        """Adds records with issued scripts with a single insert"""
+        models = [IssuedLicenseDAO._to_model(entity) for entity in entities]
+        with transaction.atomic():
+            if len(models) == 1:
+                models[0].save()
+            else:
+                IssuedLicenseModel.objects.bulk_create(models)
+            IssuedLicenseDAO._register_permanent(models)
+
+    @staticmethod
+    def has_permanent_license(script: Script, license_key: str) -> bool:
+        """Checks if script has been issued permanently for license key"""
+        return PermanentLicenseModel.objects.filter(
+            script_id=script.id, license_key=license_key
+        ).exists()
+
+    @staticmethod
+    def _register_permanent(models: list[IssuedLicenseModel]) -> None:
+        """Upserts permanent licenses, the first grant time is kept"""
+        permanent = {
+            (model.script_id, model.license_key): PermanentLicenseModel(
+                script_id=model.script_id,
+                license_key=model.license_key,
+                granted_at=model.issued_at,
+                last_issued_at=model.issued_at,
+            )
+            for model in models
+            if model.license_key is not None and model.expires is None
+        }
+        if permanent:
+            PermanentLicenseModel.objects.bulk_create(
+                permanent.values(),
+                update_conflicts=True,
+                unique_fields=['script', 'license_key'],
+                update_fields=['last_issued_at'],
+            )
+
+    @staticmethod
+    def _to_model(entity: IssuedLicense) -> IssuedLicenseModel:
+        return IssuedLicenseModel(
             issued_at=entity.issued_at or timezone.now(),
             license_key=entity.license_key,
             script_id=entity.script_id,
@@ -29,28 +85,162 @@ class IssuedLicenseDAO:
             extra_params=entity.extra_params,
         )
 
+
+class IssuedLicensePartitionDAO:
+    """Data access object to manage monthly partitions of issued license
+    storage
+
+    Partitions are named `<table>_pYYYYMM` and hold records issued within
+    UTC month, records out of them are stored in default partition
+    """
+
+    TABLE = IssuedLicenseModel._meta.db_table
+    DEFAULT_PARTITION = f'{TABLE}_default'
+    _NAME_RE = re.compile(rf'^{TABLE}_p(\d{{4}})(\d{{2}})$')
+
+    @staticmethod
+    def partition_name(month: date) -> str:
+        return f'{IssuedLicensePartitionDAO.TABLE}_p{month:%Y%m}'
+
+    @staticmethod
+    def shift_month(month: date, months: int) -> date:
+        """Returns the first day of month `months` away from given one"""
+        index = month.year * 12 + month.month - 1 + months
+        return date(index // 12, index % 12 + 1, 1)
+
+    @staticmethod
+    def list_partitions() -> list[IssuedLicensePartition]:
+        """Lists monthly partitions, both attached and detached ones"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT relname, relispartition FROM pg_class '
+                "WHERE relkind = 'r' "
+                'AND relnamespace = to_regnamespace(current_schema()) '
+                'AND relname LIKE %s',
+                [f'{IssuedLicensePartitionDAO.TABLE}_p%'],
+            )
+            rows = cursor.fetchall()
+        partitions = []
+        for name, attached in rows:
+            if match := IssuedLicensePartitionDAO._NAME_RE.match(name):
+                year, month = map(int, match.groups())
+                partitions.append(IssuedLicensePartition(
+                    name=name, month=date(year, month, 1), attached=attached
+                ))
+        return sorted(partitions, key=lambda p: p.month)
+
     @staticmethod
-    def find_existing_license(
-        script: Script,
-        config: ScriptLicenseConfig
-    ) -> None | IssuedLicense:
-        """Searches for generated license for script + lk pair"""
-        result = None
-        issued: IssuedLicenseModel = IssuedLicenseModel.objects.filter(
-            script_id=script.id,
-            license_key=config.license_key,
-            expires=None
-        ).first()
-        if issued is not None:
-            result = IssuedLicense(
-                issued_at=issued.issued_at,
-                license_key=issued.license_key,
-                script_id=issued.script.id,
-                issued_by_id=issued.issued_by.id,
-                issue_type=EncodeType(issued.issue_type),
-                action=ActionType(issued.action),
-                demo_lk=issued.demo_lk,
-                expires=issued.expires,
-                extra_params=issued.extra_params,
-            )
-        return result
+    def default_partition_months() -> list[date]:
+        """Lists months of records stored in default partition"""
+        default = connection.ops.quote_name(
+            IssuedLicensePartitionDAO.DEFAULT_PARTITION
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT date_trunc('month', issued_at "
+                f"AT TIME ZONE 'UTC')::date FROM {default}"
+            )
+            return sorted(month for month, in cursor.fetchall())
+
+    @staticmethod
+    @contextmanager
+    def maintenance_lock() -> Iterator[bool]:
+        """Holds session advisory lock of partitions maintenance, `False` is
+        yielded at once if another session holds it
+        """
+        key = f'{IssuedLicensePartitionDAO.TABLE}_maintenance'
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(hashtext(%s))', [key])
+            locked = cursor.fetchone()[0]
+        try:
+            yield locked
+        finally:
+            if locked:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT pg_advisory_unlock(hashtext(%s))', [key]
+                    )
+
+    @staticmethod
+    def create_partition(month: date) -> int:
+        """Creates partition of month, returns number of records moved to it
+        from default partition
+
+        Default partition is locked until partition is attached. Partition
+        created meanwhile by another process is left as is
+        """
+        dao = IssuedLicensePartitionDAO
+        table, partition, default = map(connection.ops.quote_name, (
+            dao.TABLE, dao.partition_name(month), dao.DEFAULT_PARTITION
+        ))
+        bounds = dao._month_bounds(month)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {default} IN ACCESS EXCLUSIVE MODE')
+            cursor.execute(
+                'SELECT to_regclass(%s)', [dao.partition_name(month)]
+            )
+            if cursor.fetchone()[0] is not None:
+                return 0
+            cursor.execute(
+                f'CREATE TABLE {partition} (LIKE {table} INCLUDING DEFAULTS)'
+            )
+            moved = dao._move_default_records(cursor, partition, bounds)
+            cursor.execute(
+                f'ALTER TABLE {table} ATTACH PARTITION {partition} '
+                'FOR VALUES FROM (%s) TO (%s)',
+                bounds,
+            )
+        return moved
+
+    @staticmethod
+    def archive_default_records(month: date) -> int:
+        """Moves records of month from default partition to detached
+        partition of the month, returns number of moved records
+        """
+        dao = IssuedLicensePartitionDAO
+        partition = connection.ops.quote_name(dao.partition_name(month))
+        with transaction.atomic(), connection.cursor() as cursor:
+            return dao._move_default_records(
+                cursor, partition, dao._month_bounds(month)
+            )
+
+    @staticmethod
+    def detach_partition(name: str) -> None:
+        """Detaches partition, it is kept as a standalone archive table"""
+        table, partition = map(connection.ops.quote_name, (
+            IssuedLicensePartitionDAO.TABLE, name
+        ))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'ALTER TABLE {table} DETACH PARTITION {partition}'
+            )
+
+    @staticmethod
+    def drop_partition(name: str) -> None:
+        """Drops detached partition"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE {connection.ops.quote_name(name)}')
+
+    @staticmethod
+    def _month_bounds(month: date) -> list[datetime]:
+        return [
+            datetime(m.year, m.month, 1, tzinfo=dt_timezone.utc)
+            for m in (month, IssuedLicensePartitionDAO.shift_month(month, 1))
+        ]
+
+    @staticmethod
+    def _move_default_records(
+        cursor,
+        partition: str,
+        bounds: list[datetime],
+    ) -> int:
+        default = connection.ops.quote_name(
+            IssuedLicensePartitionDAO.DEFAULT_PARTITION
+        )
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {default} '
+            'WHERE issued_at >= %s AND issued_at < %s RETURNING *) '
+            f'INSERT INTO {partition} SELECT * FROM moved',
+            bounds,
+        )
+        return cursor.rowcount
@@ -1,6 +1,10 @@
 import enum
-from dataclasses import dataclass
+import io
+import os
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
 from datetime import date, datetime
+from typing import BinaryIO
 
 
 class EncodeType(enum.Enum):
@@ -18,11 +22,18 @@ class ActionType(enum.Enum):
 
 @dataclass
 class ScriptLicenseConfig:
+    """License config of generated script
+
+    `demo` holds license key classification if caller has already made it,
+    so the key is not classified twice within a request
+    """
+
     encode: bool
     user_id: None | int = None
     license_key: None | str = None
     expires: None | date = None
     extra_params: None | dict = None
+    demo: None | bool = None
 
     @property
     def encode_type(self) -> EncodeType:
@@ -59,6 +70,14 @@ class IssuedLicense:
         return self.expires is None
 
 
+@dataclass
+class IssuedLicensePartition:
+    """Monthly partition of issued licenses, detached ones are archives"""
+    name: str
+    month: date
+    attached: bool
+
+
 @dataclass
 class Script:
     id: str
@@ -66,5 +85,48 @@ class Script:
 
 @dataclass
 class GeneratedScript:
-    data: bytes
+    """Generated script artifact
+
+    Content is held either in memory (`data`) or in an open `file` which
+    can be read once, e.g. when artifact is served from disk cache. `etag`
+    fingerprints script revision and license config the artifact was
+    generated with.
+    `content_encoding` is set when content is a compressed variant of the
+    script (e.g. `gzip`)
+    """
+    data: None | bytes
     filename: str
+    file: None | BinaryIO = None
+    etag: None | str = None
+    content_encoding: None | str = None
+
+    @property
+    def size(self) -> int:
+        if self.data is not None:
+            return len(self.data)
+        return os.fstat(self.file.fileno()).st_size
+
+    def open(self) -> BinaryIO:
+        """Opens artifact content for reading"""
+        if self.data is not None:
+            return io.BytesIO(self.data)
+        return self.file
+
+    def iter_chunks(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Yields artifact content by chunks"""
+        with self.open() as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+
+@dataclass
+class AuditWriterStats:
+    """Buffered issued license writer counters"""
+    queued: int = 0
+    written: int = 0
+    batches: int = 0
+    sync_writes: int = 0
+    failed: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
@@ -0,0 +1,82 @@
+import tempfile
+import threading
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from scripts.lm_stub import StubLicenseManager, make_server
+from scripts.services import lk_service
+from scripts.services.license_key_service import (
+    CircuitBreaker,
+    LicenseManagerClient,
+    MappedBloomFilter,
+)
+
+
+class BuildDemoKeyFilterTests(SimpleTestCase):
+    def setUp(self):
+        self.stub = StubLicenseManager(demo_ranges=(
+            ('0x00001000', '0x00001fff'),
+            ('1234-0000-0000-0000', '1234-0000-0000-00ff'),
+        ))
+        server = make_server('127.0.0.1', 0, self.stub)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address[:2]
+        client = LicenseManagerClient(
+            base_url=f'http://{host}:{port}/',
+            connect_timeout=1,
+            read_timeout=1,
+            retries=0,
+            backoff=0,
+            backoff_max=0,
+            pool_maxsize=1,
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=5, reset_timeout=10
+            ),
+        )
+        patcher = mock.patch.object(lk_service, '_client', client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = Path(tmp_dir.name) / 'demo_keys.bloom'
+
+    def _call(self, *args) -> tuple[str, str]:
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'build_demo_key_filter',
+            '--path', str(self.path),
+            '--page-size', '1000',
+            *args,
+            stdout=stdout,
+            stderr=stderr,
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_build(self):
+        stdout, stderr = self._call('--fpr', '0.01')
+        self.assertIn('Demo key filter of 4352 keys', stdout)
+        self.assertEqual(stderr, '')
+        bloom_filter = MappedBloomFilter(
+            self.path, check_interval=10, max_age=60
+        ).get()
+        self.assertTrue(bloom_filter.might_contain('0x00001abc'))
+        self.assertTrue(bloom_filter.might_contain('1234-0000-0000-00ab'))
+        self.assertLess(bloom_filter.fpr, 0.011)
+
+    def test_memory_budget(self):
+        stdout, stderr = self._call('--fpr', '0.001', '--max-bytes', '1024')
+        self.assertIn('(1024 bytes', stdout)
+        self.assertIn('does not fit target false positive rate', stderr)
+
+    def test_no_license_manager(self):
+        with mock.patch.object(lk_service, '_client', None):
+            with self.assertRaisesMessage(CommandError, 'not configured'):
+                self._call()
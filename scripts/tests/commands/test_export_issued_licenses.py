@@ -0,0 +1,75 @@
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from scripts.tests.e2e.fixtures import (
+    get_default_issued,
+    get_default_script,
+    get_default_user,
+)
+
+
+class ExportIssuedLicensesTests(TestCase):
+    def setUp(self):
+        script = get_default_script()
+        user = get_default_user()
+        self.issued = [get_default_issued(script, user) for _ in range(3)]
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = Path(tmp_dir.name) / 'issued_licenses.ndjson.gz'
+
+    def _call(self, *args) -> str:
+        stderr = StringIO()
+        call_command(
+            'export_issued_licenses', str(self.path), *args, stderr=stderr
+        )
+        return stderr.getvalue()
+
+    def test_export(self):
+        stderr = self._call('--export-format', 'ndjson', '--gzip')
+        self.assertIn(f'to {self.path}', stderr)
+        records = [
+            json.loads(line)
+            for line in gzip.decompress(self.path.read_bytes()).splitlines()
+        ]
+        self.assertEqual(
+            sorted(record['id'] for record in records),
+            sorted(issued.id for issued in self.issued),
+        )
+
+    def test_filtered(self):
+        self._call('--filter', 'license_key=0x00000000')
+        # Header only
+        self.assertEqual(len(self.path.read_bytes().splitlines()), 1)
+
+    def test_invalid_filter(self):
+        with self.assertRaisesMessage(CommandError, 'NAME=VALUE'):
+            self._call('--filter', 'script')
+        with self.assertRaisesMessage(CommandError, 'Invalid filters'):
+            self._call('--filter', 'issue_type=UNKNOWN')
+
+
+class ExportIssuedLicensesTransactionTests(TransactionTestCase):
+    serialized_rollback = True
+
+    def test_cursor_is_declared_in_transaction(self):
+        get_default_issued(get_default_script(), get_default_user())
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with CaptureQueriesContext(connection) as queries:
+                call_command(
+                    'export_issued_licenses',
+                    str(Path(tmp_dir) / 'issued_licenses.csv'),
+                    stderr=StringIO(),
+                )
+        declare = next(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('DECLARE')
+        )
+        self.assertNotIn('WITH HOLD', declare)
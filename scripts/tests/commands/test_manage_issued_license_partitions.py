@@ -0,0 +1,213 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase
+from django.utils import timezone
+
+from scripts.models import IssuedLicense
+from scripts.services.script_license_manager_service.storage_adapters import (
+    IssuedLicensePartitionDAO,
+)
+from scripts.tests.e2e.fixtures import (
+    get_default_issued,
+    get_default_script,
+    get_default_user,
+)
+
+
+def month_start(months: int) -> datetime:
+    month = IssuedLicensePartitionDAO.shift_month(
+        timezone.now().date().replace(day=1), months
+    )
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+class ManageIssuedLicensePartitionsTests(TestCase):
+    def setUp(self):
+        self.script = get_default_script()
+        self.user = get_default_user()
+
+    def _call(self, *args) -> str:
+        stdout = StringIO()
+        call_command('manage_issued_license_partitions', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def _partitions(self) -> dict[str, bool]:
+        return {
+            p.name: p.attached
+            for p in IssuedLicensePartitionDAO.list_partitions()
+        }
+
+    def _partition_of(self, issued: IssuedLicense) -> str:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT tableoid::regclass::text FROM scripts_issued_license '
+                'WHERE id = %s',
+                [issued.pk],
+            )
+            return cursor.fetchone()[0]
+
+    def test_table_is_partitioned(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT partstrat FROM pg_partitioned_table '
+                "WHERE partrelid = 'scripts_issued_license'::regclass"
+            )
+            self.assertEqual(cursor.fetchone(), ('r',))
+        issued = get_default_issued(self.script, self.user)
+        self.assertEqual(
+            self._partition_of(issued),
+            IssuedLicensePartitionDAO.partition_name(month_start(0)),
+        )
+
+    def test_partitions_created_ahead(self):
+        name = IssuedLicensePartitionDAO.partition_name(month_start(5))
+        self.assertNotIn(name, self._partitions())
+        stdout = self._call('--ahead', '5', '--dry-run')
+        self.assertIn(f'Would create {name}', stdout)
+        self.assertNotIn(name, self._partitions())
+
+        stdout = self._call('--ahead', '5')
+        self.assertIn(f'Created {name}', stdout)
+        self.assertTrue(self._partitions()[name])
+        self.assertNotIn('Created', self._call('--ahead', '5'))
+
+    def test_records_moved_from_default_partition(self):
+        issued = get_default_issued(
+            self.script, self.user, issued_at=month_start(6)
+        )
+        self.assertEqual(
+            self._partition_of(issued),
+            IssuedLicensePartitionDAO.DEFAULT_PARTITION,
+        )
+        stdout = self._call('--ahead', '6')
+        name = IssuedLicensePartitionDAO.partition_name(month_start(6))
+        self.assertIn(f'Created {name}, 1 records moved', stdout)
+        self.assertEqual(self._partition_of(issued), name)
+
+    def test_retention(self):
+        IssuedLicensePartitionDAO.create_partition(month_start(-13).date())
+        IssuedLicensePartitionDAO.create_partition(month_start(-12).date())
+        expired = get_default_issued(
+            self.script, self.user, issued_at=month_start(-13)
+        )
+        kept = get_default_issued(
+            self.script,
+            self.user,
+            issued_at=month_start(-12) + timedelta(days=1),
+        )
+        expired_name = IssuedLicensePartitionDAO.partition_name(
+            month_start(-13)
+        )
+        kept_name = IssuedLicensePartitionDAO.partition_name(month_start(-12))
+        # Deferred foreign key checks of test transaction block dropping
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+        stdout = self._call('--retention-months', '12')
+        self.assertIn(f'Detached {expired_name}', stdout)
+        self.assertNotIn(kept_name, stdout)
+        self.assertFalse(self._partitions()[expired_name])
+        self.assertEqual(
+            list(IssuedLicense.objects.values_list('pk', flat=True)),
+            [kept.pk],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM {expired_name}')
+            self.assertEqual(cursor.fetchall(), [(expired.pk,)])
+
+        stdout = self._call('--retention-months', '12', '--drop')
+        self.assertIn(f'Dropped {expired_name}', stdout)
+        self.assertNotIn(expired_name, self._partitions())
+        self.assertTrue(self._partitions()[kept_name])
+
+    def test_past_records_moved_from_default_partition(self):
+        issued = get_default_issued(
+            self.script, self.user, issued_at=month_start(-20)
+        )
+        name = IssuedLicensePartitionDAO.partition_name(month_start(-20))
+        self.assertIn(f'Would create {name}', self._call('--dry-run'))
+        self.assertIn(f'Created {name}, 1 records moved', self._call())
+        self.assertEqual(self._partition_of(issued), name)
+
+    def test_retention_of_default_partition_records(self):
+        # Partition of the month has been detached already
+        IssuedLicensePartitionDAO.create_partition(month_start(-14).date())
+        archived_name = IssuedLicensePartitionDAO.partition_name(
+            month_start(-14)
+        )
+        IssuedLicensePartitionDAO.detach_partition(archived_name)
+        archived = get_default_issued(
+            self.script, self.user, issued_at=month_start(-14)
+        )
+        expired = get_default_issued(
+            self.script, self.user, issued_at=month_start(-13)
+        )
+        expired_name = IssuedLicensePartitionDAO.partition_name(
+            month_start(-13)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+        stdout = self._call('--retention-months', '12')
+        self.assertIn(
+            f'Moved 1 records from default partition to {archived_name}',
+            stdout,
+        )
+        self.assertIn(f'Created {expired_name}, 1 records moved', stdout)
+        self.assertIn(f'Detached {expired_name}', stdout)
+        self.assertFalse(IssuedLicense.objects.exists())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM {archived_name}')
+            self.assertEqual(cursor.fetchall(), [(archived.pk,)])
+            cursor.execute(f'SELECT id FROM {expired_name}')
+            self.assertEqual(cursor.fetchall(), [(expired.pk,)])
+
+        stdout = self._call('--retention-months', '12', '--drop')
+        self.assertIn(f'Dropped {archived_name}', stdout)
+        self.assertIn(f'Dropped {expired_name}', stdout)
+
+    def test_drop_requires_retention(self):
+        with self.assertRaisesMessage(CommandError, 'Retention is required'):
+            self._call('--drop')
+
+    def test_not_migrated(self):
+        partitions = self._partitions()
+        with mock.patch.object(
+            MigrationExecutor, 'migration_plan', return_value=[mock.Mock()]
+        ):
+            with self.assertRaisesRegex(CommandError, 'migrate'):
+                self._call('--ahead', '6')
+        self.assertEqual(self._partitions(), partitions)
+
+    def test_concurrent_run_skipped(self):
+        other = connections.create_connection('default')
+        self.addCleanup(other.close)
+        with other.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_lock(hashtext(%s))',
+                [f'{IssuedLicensePartitionDAO.TABLE}_maintenance'],
+            )
+        partitions = self._partitions()
+        self.assertIn('skipped', self._call('--ahead', '6'))
+        self.assertEqual(self._partitions(), partitions)
+        other.close()
+        self.assertIn('Created', self._call('--ahead', '6'))
+
+    def test_date_range_query_is_pruned(self):
+        plan = IssuedLicense.objects.filter(
+            issued_at__gte=month_start(1),
+            issued_at__lt=month_start(1) + timedelta(days=7),
+        ).explain()
+        self.assertIn(
+            IssuedLicensePartitionDAO.partition_name(month_start(1)), plan
+        )
+        self.assertNotIn(
+            IssuedLicensePartitionDAO.partition_name(month_start(0)), plan
+        )
+        self.assertNotIn(IssuedLicensePartitionDAO.DEFAULT_PARTITION, plan)
@@ -0,0 +1,58 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from scripts.models import IssuedLicense
+from scripts.services import (
+    script_encoding_service,
+    script_license_manager_service,
+)
+from scripts.services.script_license_manager_service.structures import (
+    Script,
+    ScriptLicenseConfig,
+)
+from scripts.tests.e2e.fixtures import get_default_script
+
+
+class PrewarmArtifactsTests(TestCase):
+    def setUp(self):
+        self.script = get_default_script()
+        self.disabled = get_default_script(id='disabled', enabled=False)
+        script_license_manager_service.artifact_cache.clear()
+        script_encoding_service.template_cache.clear()
+
+    def _call(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'prewarm_artifacts', *args, stdout=stdout, stderr=stderr
+        )
+        return stdout.getvalue()
+
+    def test_prewarm(self):
+        output = self._call()
+        self.assertIn('test_script: ', output)
+        self.assertNotIn('disabled', output)
+        self.assertIn('Pre-warmed 1 of 1 scripts', output)
+        self.assertFalse(IssuedLicense.objects.exists())
+        with mock.patch.object(
+            script_license_manager_service, '_generate_script'
+        ) as generate_script:
+            for encode in (False, True):
+                script_license_manager_service.generate_script(
+                    Script(id=self.script.id),
+                    ScriptLicenseConfig(encode=encode),
+                )
+            generate_script.assert_not_called()
+
+    def test_template_prewarmed(self):
+        self._call()
+        stats = script_encoding_service.template_cache.stats()
+        self.assertEqual(stats['memory_entries'], 1)
+
+    def test_selected_scripts(self):
+        get_default_script(id='other')
+        output = self._call('other')
+        self.assertIn('other: ', output)
+        self.assertNotIn('test_script', output)
@@ -1,7 +1,8 @@
 from django.contrib.auth.models import Permission, User
+from django.db.models import Max, Min
 from django.utils import timezone
 
-from scripts.models import IssuedLicense, Script
+from scripts.models import IssuedLicense, PermanentLicense, Script
 
 
 def get_default_user():
@@ -58,11 +59,31 @@ def get_default_issued(script: Script, user: User, **fields) -> IssuedLicense:
         extra_params=None
     )
     default_fields.update(fields)
-    return IssuedLicense.objects.create(**default_fields)
+    issued = IssuedLicense.objects.create(**default_fields)
+    sync_permanent_licenses(script)
+    return issued
 
 
 def update_issued(issued: IssuedLicense, **fields) -> None:
     IssuedLicense.objects.filter(pk=issued.pk).update(**fields)
+    sync_permanent_licenses(issued.script)
+
+
+def sync_permanent_licenses(script: Script) -> None:
+    """Rebuilds permanent licenses of script from issued ones, as backfill
+    migration does
+    """
+    PermanentLicense.objects.filter(script=script).delete()
+    PermanentLicense.objects.bulk_create(
+        PermanentLicense(script=script, **row)
+        for row in IssuedLicense.objects
+        .filter(script=script, expires=None, license_key__isnull=False)
+        .order_by()
+        .values('license_key')
+        .annotate(
+            granted_at=Min('issued_at'), last_issued_at=Max('issued_at')
+        )
+    )
 
 
 default_json_schema = dict(
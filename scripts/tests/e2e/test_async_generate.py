@@ -0,0 +1,159 @@
+from unittest import mock
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from scripts.models import IssuedLicense
+from scripts.services import lk_service, script_license_manager_service
+from scripts.services.encoding_service import EncodingUnavailableError
+from scripts.services.license_key_service import (
+    LicenseManagerUnavailableError,
+)
+
+from .fixtures import (
+    get_default_script,
+    get_default_user,
+    give_permission_to_user,
+    update_script,
+)
+
+
+class AsyncGenerateTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+        script_license_manager_service.artifact_cache.clear()
+        self.addCleanup(script_license_manager_service.artifact_cache.clear)
+
+    def _url(self, name: str, pk: None | str = None) -> str:
+        return reverse(
+            f'scripts:script-{name}-async',
+            kwargs=dict(pk=pk or self.script.id)
+        )
+
+    def test_generate_plain(self):
+        response = self.client.post(self._url('generate-plain'), dict())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/x-python')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(IssuedLicense.objects.count(), 1)
+
+        sync_response = self.client.post(
+            reverse(
+                'scripts:script-generate-plain',
+                kwargs=dict(pk=self.script.id)
+            ),
+            dict()
+        )
+        self.assertEqual(
+            response.content, b''.join(sync_response.streaming_content)
+        )
+        for header in ('ETag', 'Content-Disposition', '1C-Filename'):
+            self.assertEqual(response[header], sync_response[header])
+
+    def test_generate_encoded(self):
+        response = self.client.post(
+            self._url('generate-encoded'), dict(license_key='0x12345678')
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        issued = IssuedLicense.objects.get()
+        # Demo key gets default expiration
+        self.assertEqual(issued.issue_type, 'ENCODED_EXP_LK')
+        self.assertEqual(issued.issued_by_id, self.user.id)
+        self.assertTrue(issued.demo_lk)
+        self.assertIsNotNone(issued.expires)
+
+    def test_not_modified(self):
+        response = self.client.post(self._url('generate-plain'), dict())
+        response = self.client.post(
+            self._url('generate-plain'),
+            dict(),
+            headers={'If-None-Match': response['ETag']},
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_not_authorized_user(self):
+        self.client.logout()
+        response = self.client.post(self._url('generate-encoded'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_not_downloadable_script(self):
+        update_script(self.script, enabled=False)
+        response = self.client.post(self._url('generate-plain'), dict())
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(
+            response.json(),
+            dict(detail='Disabled or deleted script cannot be downloaded')
+        )
+
+    def test_force_perms(self):
+        update_script(self.script, allow_issue_plain=False)
+        response = self.client.post(self._url('generate-plain'), dict())
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        give_permission_to_user(self.user, 'force_issue_plain_script')
+        response = self.client.post(self._url('generate-plain'), dict())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_not_existing_script(self):
+        response = self.client.post(
+            self._url('generate-plain', pk='not_existing_script'), dict()
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_params(self):
+        response = self.client.post(
+            self._url('generate-encoded'),
+            dict(license_key='0x123456789')
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('license_key', response.json())
+
+    def test_not_demo_key(self):
+        with mock.patch.object(
+            lk_service, 'ais_demo_key', return_value=False
+        ):
+            response = self.client.post(
+                self._url('generate-demo-encoded'),
+                dict(license_key='0x12345678')
+            )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(IssuedLicense.objects.exists())
+
+    def test_services_unavailable(self):
+        with mock.patch.object(
+            lk_service,
+            'ais_demo_key',
+            side_effect=LicenseManagerUnavailableError('LM is down'),
+        ):
+            response = self.client.post(
+                self._url('generate-demo-encoded'),
+                dict(license_key='0x12345678')
+            )
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        with mock.patch.object(
+            script_license_manager_service,
+            'agenerate_script',
+            side_effect=EncodingUnavailableError('Encoding queue is full'),
+        ):
+            response = self.client.post(
+                self._url('generate-encoded'), dict()
+            )
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    async def test_async_client(self):
+        response = await self.async_client.post(
+            self._url('generate-demo-encoded'),
+            dict(license_key='0x12345678'),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        issued = await IssuedLicense.objects.aget()
+        self.assertIsNone(issued.issued_by_id)
+        self.assertTrue(issued.demo_lk)
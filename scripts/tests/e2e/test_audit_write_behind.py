@@ -0,0 +1,65 @@
+from unittest import mock
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from scripts.models import IssuedLicense, PermanentLicense
+from scripts.services import lk_service, script_license_manager_service
+from scripts.services.script_license_manager_service import (
+    BufferedAuditWriter,
+)
+from scripts.services.script_license_manager_service.storage_adapters import (
+    IssuedLicenseDAO,
+)
+
+from .fixtures import get_default_script, get_default_user, update_user
+
+
+class AuditWriteBehindTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+        self.writer = BufferedAuditWriter(
+            write=IssuedLicenseDAO.add_many,
+            max_size=100,
+            batch_size=100,
+            flush_interval=3600,
+        )
+        patcher = mock.patch.object(
+            script_license_manager_service, '_audit_writer', self.writer
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _generate(self, name: str = 'generate-encoded'):
+        response = self.client.post(
+            reverse(f'scripts:script-{name}', kwargs=dict(pk=self.script.pk)),
+            dict(license_key='0x12345678'),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_written_behind(self):
+        # Demo key gets expiration, so license is temporary
+        self._generate()
+        self.assertFalse(IssuedLicense.objects.exists())
+        self.writer.flush()
+        issued = IssuedLicense.objects.get()
+        self.assertEqual(issued.issue_type, 'ENCODED_EXP_LK')
+
+    def test_permanent_grant_written_at_once(self):
+        with mock.patch.object(lk_service, 'is_demo_key', return_value=False):
+            self._generate()
+            self.assertTrue(PermanentLicense.objects.exists())
+            self._generate('update-issued')
+        self.assertEqual(IssuedLicense.objects.count(), 2)
+        self.assertEqual(self.writer.stats()['pending'], 0)
+
+    def test_stats(self):
+        update_user(self.user, is_staff=True)
+        self._generate()
+        response = self.client.get(reverse('scripts:stats'))
+        self.assertEqual(response.data['audit']['mode'], 'buffered')
+        self.assertEqual(response.data['audit']['pending'], 1)
+        self.writer.flush()
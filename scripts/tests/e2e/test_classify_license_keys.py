@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from scripts.services import lk_service
+from scripts.services.license_key_service import (
+    LicenseManagerUnavailableError,
+)
+
+from .fixtures import get_default_user
+
+
+class ClassifyLicenseKeysTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.url = reverse('scripts:license_key-classify')
+
+    def test_not_authorized_user(self):
+        self.client.logout()
+        response = self.client.post(
+            self.url, dict(license_keys=['0x12345678']), format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_classification(self):
+        keys = ['0x12345678', '1234-1234-1234-1234']
+        with mock.patch.object(
+            lk_service,
+            'is_demo_keys',
+            return_value={'0x12345678': True, '1234-1234-1234-1234': False},
+        ) as is_demo_keys:
+            response = self.client.post(
+                self.url, dict(license_keys=keys), format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        is_demo_keys.assert_called_once_with(keys)
+        self.assertEqual(
+            response.data,
+            dict(demo={'0x12345678': True, '1234-1234-1234-1234': False})
+        )
+
+    def test_invalid_request(self):
+        too_many = [
+            f'0x{i:08x}'
+            for i in range(settings.LICENSE_KEY_CLASSIFY_MAX_KEYS + 1)
+        ]
+        for license_keys in [[], ['not_a_key'], too_many, '0x12345678']:
+            response = self.client.post(
+                self.url, dict(license_keys=license_keys), format='json'
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+    def test_license_manager_unavailable(self):
+        with mock.patch.object(
+            lk_service,
+            'is_demo_keys',
+            side_effect=LicenseManagerUnavailableError('LM is down'),
+        ):
+            response = self.client.post(
+                self.url, dict(license_keys=['0x12345678']), format='json'
+            )
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
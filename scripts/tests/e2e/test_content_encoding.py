@@ -0,0 +1,147 @@
+import gzip
+import tempfile
+import zlib
+from unittest import mock
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from scripts.services import repo_script_service, script_license_manager_service
+from scripts.services.artifact_cache import (
+    ArtifactCache,
+    DiskArtifactStorage,
+    MemoryArtifactStorage,
+)
+from scripts.services.repo_service import ScriptSource
+
+from .fixtures import get_default_script, get_default_user
+
+large_source = b''.join(
+    f'print("Line {i}")\n'.encode() for i in range(1000)
+)
+
+
+class ContentEncodingTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+        self.url = reverse(
+            'scripts:script-generate-plain', kwargs=dict(pk=self.script.pk)
+        )
+        script_license_manager_service.artifact_cache.clear()
+        self.addCleanup(script_license_manager_service.artifact_cache.clear)
+        patcher = mock.patch.object(
+            repo_script_service,
+            'get_source',
+            return_value=ScriptSource(
+                script_id=self.script.id,
+                revision='HEAD',
+                filename='script.py',
+                data=large_source,
+            ),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, accept_encoding=None):
+        headers = {}
+        if accept_encoding is not None:
+            headers['Accept-Encoding'] = accept_encoding
+        response = self.client.post(self.url, dict(), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content)
+
+    def test_identity(self):
+        response, content = self._post()
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(content, large_source)
+
+    def test_gzip(self):
+        response, content = self._post('gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/x-python')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertLess(len(content), len(large_source))
+        self.assertEqual(gzip.decompress(content), large_source)
+
+    def test_deflate(self):
+        response, content = self._post('gzip;q=0.5, deflate')
+        self.assertEqual(response['Content-Encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(content), large_source)
+
+    def test_not_acceptable_encodings(self):
+        for accept_encoding in ['br', 'gzip;q=0', 'identity', '*']:
+            response, content = self._post(accept_encoding)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(content, large_source)
+
+    def test_variants_built_once(self):
+        self._post()
+        with mock.patch(
+            'scripts.services.script_license_manager_service.service.compress'
+        ) as compress:
+            response, content = self._post('gzip')
+            compress.assert_not_called()
+        self.assertEqual(gzip.decompress(content), large_source)
+
+    def test_etag_per_encoding(self):
+        identity, _ = self._post()
+        gzipped, _ = self._post('gzip')
+        deflated, _ = self._post('deflate')
+        etags = {identity['ETag'], gzipped['ETag'], deflated['ETag']}
+        self.assertEqual(len(etags), 3)
+        response = self.client.post(
+            self.url,
+            dict(),
+            headers={
+                'Accept-Encoding': 'gzip',
+                'If-None-Match': gzipped['ETag'],
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], gzipped['ETag'])
+
+    def test_small_script_not_compressed(self):
+        repo_script_service.get_source.return_value = ScriptSource(
+            script_id=self.script.id,
+            revision='HEAD',
+            filename='script.py',
+            data=b'print("Hello World!")\n',
+        )
+        response, content = self._post('gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(content, b'print("Hello World!")\n')
+
+    def test_disk_tier_files_closed(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        cache = ArtifactCache(
+            memory=MemoryArtifactStorage(
+                max_entries=10, max_bytes=100, max_item_bytes=1
+            ),
+            disk=DiskArtifactStorage(tmp_dir.name, max_bytes=1024 * 1024),
+        )
+        files = []
+        disk_get = DiskArtifactStorage.get
+
+        def get(storage, key):
+            artifact = disk_get(storage, key)
+            if artifact is not None:
+                files.append(artifact.file)
+            return artifact
+
+        with mock.patch.object(
+            script_license_manager_service, '_artifact_cache', cache
+        ), mock.patch.object(DiskArtifactStorage, 'get', get):
+            self._post('gzip')
+            response, content = self._post('gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(content), large_source)
+        # Variant is read from disk by both requests, raw artifact is read
+        # by the second one only to find the variant
+        self.assertEqual(len(files), 3)
+        self.assertTrue(all(file.closed for file in files))
@@ -0,0 +1,202 @@
+import io
+import zipfile
+from datetime import date, timedelta
+from unittest import mock
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from scripts.models import IssuedLicense
+from scripts.services import lk_service
+
+from .fixtures import (
+    default_json_schema,
+    get_default_script,
+    get_default_user,
+    give_permission_to_user,
+    update_script,
+)
+
+
+class GenerateBatchPermissionsTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+        self.other_script = get_default_script(id='other_script')
+
+    def test_not_authorized_user(self):
+        self.client.logout()
+        response = self.client.post(
+            reverse('scripts:script-generate-batch'),
+            dict(scripts=[self.script.id]),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_not_downloadable_script(self):
+        give_permission_to_user(self.user, 'force_issue_encoded_script')
+        update_script(self.other_script, enabled=False)
+        response = self.client.post(
+            reverse('scripts:script-generate-batch'),
+            dict(scripts=[self.script.id, self.other_script.id]),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(IssuedLicense.objects.count(), 0)
+
+    def test_script_not_allowing_encoded_lk_issue_wo_force_perms(self):
+        update_script(self.other_script, allow_issue_encoded_lk=False)
+        response = self.client.post(
+            reverse('scripts:script-generate-batch'),
+            dict(
+                scripts=[self.script.id, self.other_script.id],
+                license_key='0x12345678'
+            ),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_script_not_allowing_encoded_lk_issue_w_force_perms(self):
+        give_permission_to_user(self.user, 'force_issue_encoded_script')
+        update_script(self.other_script, allow_issue_encoded_lk=False)
+        response = self.client.post(
+            reverse('scripts:script-generate-batch'),
+            dict(
+                scripts=[self.script.id, self.other_script.id],
+                license_key='0x12345678'
+            ),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class GenerateBatchValidationTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+
+    def test_empty_request(self):
+        response = self.client.post(
+            reverse('scripts:script-generate-batch'), dict(), format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_scripts(self):
+        invalid_scripts = [
+            [],
+            [self.script.id, self.script.id],
+            ['s'] * 1000,
+            'some_string',
+        ]
+        for scripts in invalid_scripts:
+            response = self.client.post(
+                reverse('scripts:script-generate-batch'),
+                dict(scripts=scripts),
+                format='json'
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+    def test_not_existing_script(self):
+        response = self.client.post(
+            reverse('scripts:script-generate-batch'),
+            dict(scripts=[self.script.id, 'not_existing_script']),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_extra_params(self):
+        update_script(self.script, extra_params_schema=default_json_schema)
+        invalid_extra_params = [
+            None,
+            {self.script.id: None},
+            {self.script.id: dict(a=55, b='b2')},
+            {'other_script': dict(a=1, b='b1')},
+        ]
+        for extra_params in invalid_extra_params:
+            response = self.client.post(
+                reverse('scripts:script-generate-batch'),
+                dict(scripts=[self.script.id], extra_params=extra_params),
+                format='json'
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+        response = self.client.post(
+            reverse('scripts:script-generate-batch'),
+            dict(
+                scripts=[self.script.id],
+                extra_params={self.script.id: dict(a=1, b='b1')}
+            ),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class GenerateBatchTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.scripts = [
+            get_default_script(id=f'test_script_{i}') for i in range(3)
+        ]
+
+    def test_valid_response(self):
+        script_ids = [script.id for script in self.scripts]
+        response = self.client.post(
+            reverse('scripts:script-generate-batch'),
+            dict(scripts=script_ids, license_key='0x12345678'),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        content = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(content))
+        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            self.assertEqual(
+                zf.namelist(),
+                [f'{script_id}/script.py' for script_id in script_ids]
+            )
+
+    def test_issued_records(self):
+        future_dt = date.today() + timedelta(days=10)
+        response = self.client.post(
+            reverse('scripts:script-generate-batch'),
+            dict(
+                scripts=[script.id for script in self.scripts],
+                license_key='0x12345678',
+                expires=future_dt.isoformat(),
+            ),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        issued = IssuedLicense.objects.order_by('script_id')
+        self.assertEqual(
+            [i.script_id for i in issued],
+            [script.id for script in self.scripts]
+        )
+        for record in issued:
+            self.assertEqual(record.license_key, '0x12345678')
+            self.assertEqual(record.issued_by, self.user)
+            self.assertEqual(record.issue_type, 'ENCODED_EXP_LK')
+            self.assertEqual(record.action, 'GENERATE')
+            self.assertEqual(record.expires, future_dt)
+
+    def test_single_license_key_check(self):
+        with mock.patch.object(
+            lk_service, 'is_demo_key', wraps=lk_service.is_demo_key
+        ) as is_demo_key:
+            response = self.client.post(
+                reverse('scripts:script-generate-batch'),
+                dict(
+                    scripts=[script.id for script in self.scripts],
+                    license_key='0x12345678'
+                ),
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(is_demo_key.call_count, 1)
@@ -1,11 +1,17 @@
 import json
 from datetime import date, timedelta
+from unittest import mock
 
 from django.conf import settings
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
+from scripts.services import lk_service
+from scripts.services.license_key_service import (
+    LicenseManagerUnavailableError,
+)
+
 from .fixtures import (
     default_json_schema,
     get_default_script,
@@ -337,6 +343,20 @@ class GenerateDemoEncodedTests(APITestCase):
         self.client.force_login(self.user)
         self.script = get_default_script()
 
+    def test_single_license_key_check(self):
+        with mock.patch.object(
+            lk_service, 'is_demo_key', wraps=lk_service.is_demo_key
+        ) as is_demo_key:
+            response = self.client.post(
+                reverse(
+                    'scripts:script-generate-demo-encoded',
+                    kwargs=dict(pk=self.script.pk)
+                ),
+                dict(license_key='0x12345678'),
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(is_demo_key.call_count, 1)
+
     def test_valid_response(self):
         response = self.client.post(
             reverse(
@@ -346,7 +366,7 @@ class GenerateDemoEncodedTests(APITestCase):
             dict(license_key='0x12345678'),
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.content_type, 'text/x-python')
+        self.assertEqual(response['Content-Type'], 'text/x-python')
 
     def test_issued_record(self):
         future_dt_str = (date.today() + timedelta(days=10)).isoformat()
@@ -418,3 +438,21 @@ class GenerateDemoEncodedTests(APITestCase):
         self.assertTrue(expires == date.today() + timedelta(
             days=settings.DEMO_KEY_MAX_EXPIRATION_DAYS
         ))
+
+    def test_license_manager_unavailable(self):
+        lk_service.invalidate('0x87654321')
+        with mock.patch.object(
+            lk_service,
+            '_lookup',
+            side_effect=LicenseManagerUnavailableError('LM is down'),
+        ):
+            response = self.client.post(
+                reverse(
+                    'scripts:script-generate-demo-encoded',
+                    kwargs=dict(pk=self.script.pk)
+                ),
+                dict(license_key='0x87654321'),
+            )
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
@@ -1,11 +1,14 @@
 import json
 from datetime import date, timedelta
+from unittest import mock
 
 from django.conf import settings
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
+from scripts.services import lk_service
+
 from .fixtures import (
     default_json_schema,
     get_default_script,
@@ -435,6 +438,20 @@ class GenerateEncodedTests(APITestCase):
         self.client.force_login(self.user)
         self.script = get_default_script()
 
+    def test_single_license_key_check(self):
+        with mock.patch.object(
+            lk_service, 'is_demo_key', wraps=lk_service.is_demo_key
+        ) as is_demo_key:
+            response = self.client.post(
+                reverse(
+                    'scripts:script-generate-encoded',
+                    kwargs=dict(pk=self.script.pk)
+                ),
+                dict(license_key='0x12345678'),
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(is_demo_key.call_count, 1)
+
     def test_valid_response(self):
         response = self.client.post(
             reverse(
@@ -444,7 +461,23 @@ class GenerateEncodedTests(APITestCase):
             dict(),
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.content_type, 'text/x-python')
+        self.assertEqual(response['Content-Type'], 'text/x-python')
+
+    def test_streaming_response(self):
+        response = self.client.post(
+            reverse(
+                'scripts:script-generate-encoded',
+                kwargs=dict(pk=self.script.pk)
+            ),
+            dict(license_key='0x12345678'),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertEqual(
+            response['Content-Disposition'], 'attachment; filename="script.py"'
+        )
 
     def test_issued_record(self):
         future_dt_str = (date.today() + timedelta(days=10)).isoformat()
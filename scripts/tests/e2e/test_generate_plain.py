@@ -4,6 +4,8 @@ from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
+from scripts.models import IssuedLicense
+
 from .fixtures import (
     default_json_schema,
     get_default_script,
@@ -185,7 +187,7 @@ class GeneratePlainTests(APITestCase):
             dict(),
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.content_type, 'text/x-python')
+        self.assertEqual(response['Content-Type'], 'text/x-python')
 
     def test_issued_record(self):
         response = self.client.post(
@@ -207,3 +209,15 @@ class GeneratePlainTests(APITestCase):
         self.assertEqual(issued['demo_lk'], False)
         self.assertEqual(issued['expires'], None)
         self.assertEqual(issued['extra_params'], None)
+
+    def test_any_etag_ignored(self):
+        response = self.client.post(
+            reverse(
+                'scripts:script-generate-plain',
+                kwargs=dict(pk=self.script.pk)
+            ),
+            dict(),
+            headers={'If-None-Match': '*'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(IssuedLicense.objects.count(), 1)
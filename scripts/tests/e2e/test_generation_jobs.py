@@ -0,0 +1,197 @@
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITransactionTestCase
+
+from scripts.models import GenerationJob, IssuedLicense
+from scripts.services import generation_job_service
+from scripts.services.artifact_cache import DiskArtifactStorage
+
+from .fixtures import get_default_issued, get_default_script, get_default_user
+
+
+class GenerationJobsTests(APITransactionTestCase):
+    serialized_rollback = True
+
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+
+    def wait_for_job(self, url: str) -> dict:
+        for _ in range(100):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            if response.data['status'] in ('SUCCEEDED', 'FAILED'):
+                return response.data
+            time.sleep(0.05)
+        self.fail('Job has not finished')
+
+    def test_sync_without_preference(self):
+        response = self.client.post(
+            reverse(
+                'scripts:script-generate-encoded',
+                kwargs=dict(pk=self.script.pk)
+            ),
+            dict(license_key='0x12345678'),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_generate_async(self):
+        response = self.client.post(
+            reverse(
+                'scripts:script-generate-encoded',
+                kwargs=dict(pk=self.script.pk)
+            ),
+            dict(license_key='0x12345678'),
+            headers={'Prefer': 'respond-async'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response['Preference-Applied'], 'respond-async')
+        job = self.wait_for_job(response['Location'])
+        self.assertEqual(job['status'], 'SUCCEEDED')
+        self.assertEqual(job['action'], 'GENERATE')
+        self.assertEqual(IssuedLicense.objects.count(), 1)
+
+        response = self.client.get(job['download'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/x-python')
+        self.assertIn(b'0x12345678', b''.join(response.streaming_content))
+
+    def test_failed_job_is_not_recorded(self):
+        response = self.client.post(
+            reverse(
+                'scripts:script-update-issued',
+                kwargs=dict(pk=self.script.pk)
+            ),
+            dict(license_key='0x12345678'),
+            headers={'Prefer': 'respond-async'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = self.wait_for_job(response['Location'])
+        self.assertEqual(job['status'], 'FAILED')
+        self.assertIsNotNone(job['error'])
+        self.assertIsNone(job['download'])
+        self.assertEqual(IssuedLicense.objects.count(), 0)
+
+        response = self.client.get(reverse(
+            'scripts:generation_job-download', kwargs=dict(pk=job['id'])
+        ))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_result_too_large(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        results = DiskArtifactStorage(tmp_dir.name, max_bytes=1)
+        with mock.patch.object(generation_job_service, '_results', results):
+            response = self.client.post(
+                reverse(
+                    'scripts:script-generate-encoded',
+                    kwargs=dict(pk=self.script.pk)
+                ),
+                dict(license_key='0x12345678'),
+                headers={'Prefer': 'respond-async'},
+            )
+            job = self.wait_for_job(response['Location'])
+        self.assertEqual(job['status'], 'FAILED')
+        self.assertIn('exceeds job results storage', job['error'])
+        # License is not issued for script which can not be downloaded
+        self.assertEqual(IssuedLicense.objects.count(), 0)
+
+    def test_update_async(self):
+        get_default_issued(self.script, self.user)
+        response = self.client.post(
+            reverse(
+                'scripts:script-update-issued',
+                kwargs=dict(pk=self.script.pk)
+            ),
+            dict(license_key='0x12345678'),
+            headers={'Prefer': 'respond-async'},
+        )
+        job = self.wait_for_job(response['Location'])
+        self.assertEqual(job['status'], 'SUCCEEDED')
+        self.assertEqual(job['action'], 'UPDATE')
+        self.assertEqual(IssuedLicense.objects.count(), 2)
+
+    def test_not_existing_job(self):
+        response = self.client.get(reverse(
+            'scripts:generation_job-detail',
+            kwargs=dict(pk='00000000-0000-0000-0000-000000000000')
+        ))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_job_of_other_user(self):
+        response = self.client.post(
+            reverse(
+                'scripts:script-generate-encoded',
+                kwargs=dict(pk=self.script.pk)
+            ),
+            dict(license_key='0x12345678'),
+            headers={'Prefer': 'respond-async'},
+        )
+        job = self.wait_for_job(response['Location'])
+        other_user = User.objects.create_user(username='other_user')
+        self.client.force_login(other_user)
+        for url in [response['Location'], job['download']]:
+            self.assertEqual(
+                self.client.get(url).status_code, status.HTTP_404_NOT_FOUND
+            )
+        self.client.logout()
+        self.assertEqual(
+            self.client.get(response['Location']).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_anonymous_demo_job(self):
+        self.client.logout()
+        response = self.client.post(
+            reverse(
+                'scripts:script-generate-demo-encoded',
+                kwargs=dict(pk=self.script.pk)
+            ),
+            dict(license_key='0x12345678'),
+            headers={'Prefer': 'respond-async'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = self.wait_for_job(response['Location'])
+        self.assertEqual(job['status'], 'SUCCEEDED')
+        self.assertTrue(GenerationJob.objects.get(pk=job['id']).demo)
+
+    def test_queue_is_full(self):
+        with mock.patch.object(
+            generation_job_service, '_slots', threading.BoundedSemaphore(1)
+        ) as slots:
+            slots.acquire()
+            response = self.client.post(
+                reverse(
+                    'scripts:script-generate-encoded',
+                    kwargs=dict(pk=self.script.pk)
+                ),
+                dict(license_key='0x12345678'),
+                headers={'Prefer': 'respond-async'},
+            )
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertFalse(GenerationJob.objects.exists())
+
+    def test_stale_job_is_failed(self):
+        job = GenerationJob.objects.create(
+            script=self.script,
+            issued_by=self.user,
+            action='GENERATE',
+            status=GenerationJob.Status.RUNNING,
+            created_at=timezone.now() - timedelta(days=1),
+        )
+        response = self.client.get(reverse(
+            'scripts:generation_job-detail', kwargs=dict(pk=job.pk)
+        ))
+        self.assertEqual(response.data['status'], 'FAILED')
+        self.assertIn('has not been finished', response.data['error'])
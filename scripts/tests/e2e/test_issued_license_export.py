@@ -0,0 +1,152 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date, timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from scripts.views import IssuedLicenseViewSet
+
+from .fixtures import get_default_issued, get_default_script, get_default_user
+
+
+class IssuedLicenseExportTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+        now = timezone.now()
+        self.issued = [
+            get_default_issued(
+                self.script, self.user, issued_at=now - timedelta(minutes=i)
+            )
+            for i in range(5)
+        ]
+        self.issued.append(get_default_issued(
+            self.script,
+            None,
+            issued_at=now - timedelta(minutes=5),
+            license_key=None,
+            issue_type='ENCODED_EXP',
+            demo_lk=False,
+            expires=date(2030, 1, 1),
+            extra_params={'param': 'value, "quoted"'},
+        ))
+
+    def _export(self, **params) -> tuple[bytes, dict]:
+        response = self.client.get(
+            reverse('scripts:issued_license-export'), params
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content), response.headers
+
+    def test_csv(self):
+        content, headers = self._export()
+        self.assertEqual(headers['Content-Type'], 'text/csv')
+        self.assertIn('issued_licenses.csv', headers['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(
+            [int(row['id']) for row in rows],
+            [issued.id for issued in self.issued],
+        )
+        self.assertEqual(rows[0], dict(
+            id=str(self.issued[0].id),
+            issued_at=self.issued[0].issued_at.isoformat(),
+            license_key='0x12345678',
+            script=self.script.id,
+            issued_by=self.user.username,
+            issue_type='ENCODED_LK',
+            action='GENERATE',
+            demo_lk='true',
+            expires='',
+            extra_params='',
+        ))
+        self.assertEqual(rows[-1]['license_key'], '')
+        self.assertEqual(rows[-1]['issued_by'], '')
+        self.assertEqual(rows[-1]['expires'], '2030-01-01')
+        self.assertEqual(
+            json.loads(rows[-1]['extra_params']),
+            {'param': 'value, "quoted"'},
+        )
+
+    def test_ndjson(self):
+        content, headers = self._export(export_format='ndjson')
+        self.assertEqual(headers['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(records), 6)
+        self.assertEqual(records[0]['demo_lk'], True)
+        self.assertEqual(records[0]['issued_by'], self.user.username)
+        self.assertEqual(
+            records[0]['issued_at'], self.issued[0].issued_at.isoformat()
+        )
+        self.assertEqual(records[-1]['extra_params'], {
+            'param': 'value, "quoted"'
+        })
+
+    def test_gzip(self):
+        content, headers = self._export(export_format='ndjson', gzip='true')
+        self.assertEqual(headers['Content-Type'], 'application/gzip')
+        self.assertIn(
+            'issued_licenses.ndjson.gz', headers['Content-Disposition']
+        )
+        self.assertEqual(
+            gzip.decompress(content),
+            self._export(export_format='ndjson')[0],
+        )
+
+    def test_single_query(self):
+        # Records are fetched by chunks from a single server-side cursor
+        with mock.patch.object(IssuedLicenseViewSet, 'export_chunk_size', 2):
+            with CaptureQueriesContext(connection) as queries:
+                content, _ = self._export()
+        self.assertEqual(len(content.splitlines()), 7)
+        export_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'scripts_issued_license' in query['sql']
+        ]
+        self.assertEqual(len(export_queries), 1)
+        self.assertTrue(export_queries[0].startswith('DECLARE'))
+
+    def test_invalid_format(self):
+        response = self.client.get(
+            reverse('scripts:issued_license-export'),
+            dict(export_format='xml'),
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_not_authenticated(self):
+        self.client.logout()
+        response = self.client.get(reverse('scripts:issued_license-export'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class IssuedLicenseExportTransactionTests(APITransactionTestCase):
+    serialized_rollback = True
+
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        script = get_default_script()
+        for _ in range(3):
+            get_default_issued(script, self.user)
+
+    def test_cursor_is_declared_in_transaction(self):
+        # Cursor declared outside transaction is materialized WITH HOLD
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('scripts:issued_license-export')
+            )
+            content = b''.join(response.streaming_content)
+        self.assertEqual(len(content.splitlines()), 4)
+        declare = next(
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('DECLARE')
+        )
+        self.assertNotIn('WITH HOLD', declare)
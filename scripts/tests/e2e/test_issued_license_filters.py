@@ -0,0 +1,151 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from scripts.filters import IssuedLicenseFilter
+from scripts.models import IssuedLicense
+
+from .fixtures import get_default_issued, get_default_script, get_default_user
+
+
+class IssuedLicenseFilterTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+        self.other_script = get_default_script(id='other_script')
+        now = timezone.now()
+        self.lk = get_default_issued(
+            self.script, self.user, issued_at=now - timedelta(days=3)
+        )
+        self.other_lk = get_default_issued(
+            self.other_script,
+            self.user,
+            issued_at=now - timedelta(days=2),
+            license_key='1234-0000-0000-0001',
+            demo_lk=False,
+            action='UPDATE',
+        )
+        self.expiring = get_default_issued(
+            self.script,
+            None,
+            issued_at=now - timedelta(days=1),
+            license_key=None,
+            issue_type='ENCODED_EXP',
+            demo_lk=False,
+            expires=date(2030, 1, 1),
+        )
+
+    def _list(self, **params) -> list[int]:
+        response = self.client.get(
+            reverse('scripts:issued_license-list'), params
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [issued['id'] for issued in response.data['results']]
+
+    def test_filters(self):
+        cases = [
+            (dict(script=self.other_script.id), [self.other_lk]),
+            (dict(license_key='0x12345678'), [self.lk]),
+            (dict(issue_type='ENCODED_EXP'), [self.expiring]),
+            (dict(action='UPDATE'), [self.other_lk]),
+            (dict(demo_lk='false'), [self.expiring, self.other_lk]),
+            (dict(issued_by=self.user.username), [self.other_lk, self.lk]),
+            (
+                dict(issued_at_after=self.other_lk.issued_at.isoformat()),
+                [self.expiring, self.other_lk],
+            ),
+            (
+                dict(issued_at_before=self.other_lk.issued_at.isoformat()),
+                [self.other_lk, self.lk],
+            ),
+            (
+                dict(expires_after='2029-12-31', expires_before='2030-01-01'),
+                [self.expiring],
+            ),
+            (dict(script=self.script.id, demo_lk='true'), [self.lk]),
+        ]
+        for params, expected in cases:
+            with self.subTest(**params):
+                self.assertEqual(
+                    self._list(**params), [issued.id for issued in expected]
+                )
+
+    def test_invalid_filter(self):
+        response = self.client.get(
+            reverse('scripts:issued_license-list'), dict(action='DELETE')
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_filtered(self):
+        response = self.client.get(
+            reverse('scripts:issued_license-export'),
+            dict(export_format='ndjson', license_key='0x12345678'),
+        )
+        content = b''.join(response.streaming_content)
+        self.assertEqual(len(content.splitlines()), 1)
+        self.assertIn(f'"id": {self.lk.id}'.encode(), content)
+
+
+class IssuedLicenseFilterPlanTests(APITestCase):
+    """Checks that common filters are served by indexes
+
+    Sequential scans are disabled, as planner prefers them for small test
+    tables. Partitions have own indexes named after indexed columns
+    """
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def _explain(self, **params) -> str:
+        queryset = IssuedLicenseFilter(
+            params, queryset=IssuedLicense.objects.all()
+        ).qs
+        return queryset.order_by('-issued_at', '-id')[:100].explain()
+
+    def test_license_key(self):
+        plan = self._explain(license_key='0x12345678')
+        self.assertIn('_license_key_issued_at_id_idx', plan)
+
+    def test_license_key_and_type(self):
+        plan = self._explain(license_key='0x12345678', issue_type='ENCODED')
+        self.assertIn('_license_key_issued_at_id_idx', plan)
+
+    def test_script(self):
+        plan = self._explain(script='test_script', action='GENERATE')
+        self.assertIn('_script_id_issued_at_id_idx', plan)
+
+    def test_script_single_column_index_dropped(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexdef FROM pg_indexes "
+                "WHERE tablename = 'scripts_issued_license'"
+            )
+            indexes = [row[0] for row in cursor.fetchall()]
+        script_indexes = [index for index in indexes if '(script_id' in index]
+        self.assertEqual(len(script_indexes), 1)
+        self.assertIn('(script_id, issued_at, id)', script_indexes[0])
+
+    def test_issued_at_range(self):
+        month = timezone.now().replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        plan = self._explain(
+            issued_at_after=month.isoformat(),
+            issued_at_before=(month + timedelta(days=7)).isoformat(),
+            demo_lk='true',
+        )
+        self.assertIn('_issued_at_id_idx', plan)
+        # Only partition of the month is scanned
+        self.assertEqual(plan.count('Index Scan'), 1)
+
+    def test_expires_range(self):
+        plan = self._explain(
+            expires_after='2030-01-01', expires_before='2030-12-31'
+        )
+        self.assertIn('_expires_idx', plan)
@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from scripts.models import IssuedLicense
+from scripts.pagination import estimate_count
+
+from .fixtures import get_default_issued, get_default_script, get_default_user
+
+
+class IssuedLicenseListTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+        now = timezone.now()
+        self.issued = [
+            get_default_issued(
+                self.script, self.user, issued_at=now - timedelta(minutes=i)
+            )
+            for i in range(5)
+        ]
+
+    def _get(self, url: None | str = None, **params):
+        response = self.client.get(
+            url or reverse('scripts:issued_license-list'), params
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def _page_through(self, **params) -> list[int]:
+        ids = []
+        data = self._get(**params)
+        while True:
+            ids.extend(issued['id'] for issued in data['results'])
+            if data['next'] is None:
+                return ids
+            data = self._get(data['next'])
+
+    def test_first_page(self):
+        data = self._get(limit=2)
+        self.assertNotIn('count', data)
+        self.assertIsNone(data['previous'])
+        self.assertIsNotNone(data['next'])
+        self.assertEqual(
+            [issued['id'] for issued in data['results']],
+            [self.issued[0].id, self.issued[1].id],
+        )
+        self.assertEqual(data['results'][0]['issued_by'], self.user.username)
+
+    def test_page_through(self):
+        self.assertEqual(
+            self._page_through(limit=2), [issued.id for issued in self.issued]
+        )
+
+    def test_issued_at_the_same_time(self):
+        issued_at = self.issued[2].issued_at
+        same_time = [
+            get_default_issued(self.script, self.user, issued_at=issued_at)
+            for _ in range(3)
+        ]
+        ids = self._page_through(limit=1)
+        self.assertEqual(len(ids), 8)
+        self.assertEqual(
+            ids[2:6],
+            sorted([self.issued[2].id] + [i.id for i in same_time])[::-1],
+        )
+
+    def test_previous_page(self):
+        first = self._get(limit=2)
+        second = self._get(first['next'])
+        third = self._get(second['next'])
+        self.assertIsNone(third['next'])
+        previous = self._get(third['previous'])
+        self.assertEqual(previous['results'], second['results'])
+        self.assertEqual(self._get(previous['next']), third)
+        previous = self._get(previous['previous'])
+        self.assertEqual(previous['results'], first['results'])
+        self.assertIsNone(previous['previous'])
+
+    def test_stable_under_inserts(self):
+        first = self._get(limit=2)
+        get_default_issued(self.script, self.user)
+        second = self._get(first['next'])
+        self.assertEqual(
+            [issued['id'] for issued in second['results']],
+            [self.issued[2].id, self.issued[3].id],
+        )
+
+    def test_approximate_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE scripts_issued_license')
+        data = self._get(limit=2, count='approximate')
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(
+            estimate_count(IssuedLicense.objects.filter(
+                issued_at__lt=timezone.now() - timedelta(days=365)
+            )),
+            1,
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            reverse('scripts:issued_license-list'), dict(cursor='invalid')
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_keyset_index_scan(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = IssuedLicense.objects.filter(
+            issued_at__lte=self.issued[2].issued_at
+        ).order_by('-issued_at', '-id')[:100].explain()
+        # Partitions have own indexes named after partitioned one columns
+        self.assertIn('Index Scan Backward using', plan)
+        self.assertIn('_issued_at_id_idx', plan)
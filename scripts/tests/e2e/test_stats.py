@@ -0,0 +1,65 @@
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from scripts.services import lk_service, script_license_manager_service
+
+from .fixtures import get_default_script, get_default_user, update_user
+
+
+class ServiceStatsTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+        script_license_manager_service.artifact_cache.clear()
+
+    def test_not_admin_user(self):
+        response = self.client.get(reverse('scripts:stats'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_artifact_cache_counters(self):
+        update_user(self.user, is_staff=True)
+        before = self.client.get(reverse('scripts:stats')).data
+        for _ in range(3):
+            response = self.client.post(
+                reverse(
+                    'scripts:script-generate-encoded',
+                    kwargs=dict(pk=self.script.pk)
+                ),
+                dict(license_key='0x12345678'),
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        after = self.client.get(reverse('scripts:stats')).data
+        self.assertEqual(
+            after['artifact_cache']['misses']
+            - before['artifact_cache']['misses'],
+            1
+        )
+        self.assertEqual(
+            after['artifact_cache']['hits'] - before['artifact_cache']['hits'],
+            2
+        )
+
+    def test_license_key_cache_counters(self):
+        update_user(self.user, is_staff=True)
+        lk_service.invalidate('0x12345678')
+        before = self.client.get(reverse('scripts:stats')).data
+        for _ in range(3):
+            response = self.client.post(
+                reverse(
+                    'scripts:script-generate-encoded',
+                    kwargs=dict(pk=self.script.pk)
+                ),
+                dict(license_key='0x12345678'),
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        after = self.client.get(reverse('scripts:stats')).data
+        self.assertEqual(
+            after['license_keys']['misses'] - before['license_keys']['misses'],
+            1
+        )
+        self.assertEqual(
+            after['license_keys']['hits'] - before['license_keys']['hits'],
+            2
+        )
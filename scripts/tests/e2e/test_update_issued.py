@@ -1,11 +1,19 @@
 import json
 from datetime import date, timedelta
+from unittest import mock
 
 from django.conf import settings
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
+from scripts.models import IssuedLicense, PermanentLicense
+from scripts.services import lk_service, script_license_manager_service
+from scripts.services.script_license_manager_service.storage_adapters import (
+    IssuedLicenseDAO,
+)
+from scripts.services.script_license_manager_service.structures import Script
+
 from .fixtures import (
     default_json_schema,
     get_default_issued,
@@ -343,6 +351,20 @@ class UpdateIssuedTests(APITestCase):
         self.script = get_default_script()
         self.issued = get_default_issued(self.script, self.user)
 
+    def test_single_license_key_check(self):
+        with mock.patch.object(
+            lk_service, 'is_demo_key', wraps=lk_service.is_demo_key
+        ) as is_demo_key:
+            response = self.client.post(
+                reverse(
+                    'scripts:script-update-issued',
+                    kwargs=dict(pk=self.script.pk)
+                ),
+                dict(license_key='0x12345678'),
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(is_demo_key.call_count, 1)
+
     def test_valid_response(self):
         response = self.client.post(
             reverse(
@@ -352,7 +374,7 @@ class UpdateIssuedTests(APITestCase):
             dict(license_key='0x12345678'),
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.content_type, 'text/x-python')
+        self.assertEqual(response['Content-Type'], 'text/x-python')
 
     def test_issued_record(self):
         future_dt_str = (date.today() + timedelta(days=10)).isoformat()
@@ -455,3 +477,172 @@ class UpdateIssuedTests(APITestCase):
             format='json'
         )
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class UpdateIssuedConditionalTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+        self.issued = get_default_issued(self.script, self.user)
+        self.url = reverse(
+            'scripts:script-update-issued', kwargs=dict(pk=self.script.pk)
+        )
+
+    def test_etag(self):
+        response = self.client.post(self.url, dict(license_key='0x12345678'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        response = self.client.post(self.url, dict(license_key='0x12345678'))
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.post(
+            self.url,
+            dict(
+                license_key='0x12345678',
+                expires=(date.today() + timedelta(days=10)).isoformat()
+            )
+        )
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_not_modified(self):
+        response = self.client.post(self.url, dict(license_key='0x12345678'))
+        etag = response['ETag']
+        with mock.patch.object(
+            script_license_manager_service, '_generate_script'
+        ) as generate_script:
+            for if_none_match in [etag, f'W/{etag}', f'"other", {etag}']:
+                response = self.client.post(
+                    self.url,
+                    dict(license_key='0x12345678'),
+                    headers={'If-None-Match': if_none_match},
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_304_NOT_MODIFIED
+                )
+                self.assertEqual(response['ETag'], etag)
+            generate_script.assert_not_called()
+
+    def test_modified(self):
+        response = self.client.post(
+            self.url,
+            dict(license_key='0x12345678'),
+            headers={'If-None-Match': '"outdated"'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_any_etag_ignored(self):
+        response = self.client.post(
+            self.url,
+            dict(license_key='0x12345678'),
+            headers={'If-None-Match': '*'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_not_modified_audit(self):
+        response = self.client.post(self.url, dict(license_key='0x12345678'))
+        etag = response['ETag']
+        for audit_not_modified, expected_count in [(True, 3), (False, 3)]:
+            with mock.patch.object(
+                script_license_manager_service._app_settings,
+                'audit_not_modified',
+                audit_not_modified
+            ):
+                response = self.client.post(
+                    self.url,
+                    dict(license_key='0x12345678'),
+                    headers={'If-None-Match': etag},
+                )
+            self.assertEqual(
+                response.status_code, status.HTTP_304_NOT_MODIFIED
+            )
+            self.assertEqual(IssuedLicense.objects.count(), expected_count)
+            updated = IssuedLicense.objects.first()
+            self.assertEqual(updated.action, 'UPDATE')
+
+    def test_not_permanent_license(self):
+        update_issued(self.issued, expires=date.today() + timedelta(days=10))
+        response = self.client.post(
+            self.url,
+            dict(license_key='0x12345678'),
+            headers={'If-None-Match': '*'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PermanentLicenseRegistryTests(APITestCase):
+    def setUp(self):
+        self.user = get_default_user()
+        self.client.force_login(self.user)
+        self.script = get_default_script()
+        patcher = mock.patch.object(
+            lk_service, 'is_demo_key', return_value=False
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _generate(self, **params):
+        response = self.client.post(
+            reverse(
+                'scripts:script-generate-encoded',
+                kwargs=dict(pk=self.script.pk)
+            ),
+            dict(license_key='0x12345678', **params),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def _update(self):
+        return self.client.post(
+            reverse(
+                'scripts:script-update-issued',
+                kwargs=dict(pk=self.script.pk)
+            ),
+            dict(license_key='0x12345678'),
+        )
+
+    def test_permanent_license_registered(self):
+        self._generate()
+        registered = PermanentLicense.objects.get()
+        self.assertEqual(registered.license_key, '0x12345678')
+        self.assertEqual(registered.granted_at, registered.last_issued_at)
+
+        response = self._update()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updated = PermanentLicense.objects.get()
+        self.assertEqual(updated.granted_at, registered.granted_at)
+        self.assertGreater(updated.last_issued_at, registered.last_issued_at)
+
+    def test_temporary_license_not_registered(self):
+        self._generate(
+            expires=(date.today() + timedelta(days=10)).isoformat()
+        )
+        self.assertFalse(PermanentLicense.objects.exists())
+        response = self._update()
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_issued_by_anonymous_user(self):
+        get_default_issued(self.script, None)
+        response = self._update()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_check_does_not_scan_history(self):
+        for _ in range(20):
+            get_default_issued(
+                self.script,
+                self.user,
+                expires=date.today() + timedelta(days=10),
+            )
+        get_default_issued(self.script, self.user)
+        with self.assertNumQueries(1):
+            self.assertTrue(IssuedLicenseDAO.has_permanent_license(
+                Script(id=self.script.id), '0x12345678'
+            ))
+
+    def test_registered_in_same_transaction(self):
+        with mock.patch.object(
+            IssuedLicenseDAO,
+            '_register_permanent',
+            side_effect=RuntimeError('Registry is unavailable'),
+        ):
+            with self.assertRaises(RuntimeError):
+                self._generate()
+        self.assertFalse(IssuedLicense.objects.exists())
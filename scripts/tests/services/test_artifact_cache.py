@@ -0,0 +1,152 @@
+import tempfile
+from datetime import date
+
+from django.test import SimpleTestCase
+
+from scripts.services.artifact_cache import (
+    ArtifactCache,
+    CachedArtifact,
+    DiskArtifactStorage,
+    MemoryArtifactStorage,
+)
+
+
+def make_artifact(size: int, **meta) -> CachedArtifact:
+    return CachedArtifact(data=b'x' * size, meta=meta)
+
+
+class ArtifactCacheKeyTests(SimpleTestCase):
+    def test_same_parts_same_key(self):
+        self.assertEqual(
+            ArtifactCache.make_key('s', date(2030, 1, 1), dict(a=1, b=2)),
+            ArtifactCache.make_key('s', date(2030, 1, 1), dict(b=2, a=1)),
+        )
+
+    def test_different_parts_different_key(self):
+        self.assertNotEqual(
+            ArtifactCache.make_key('s', '0x12345678', None),
+            ArtifactCache.make_key('s', '0x12345679', None),
+        )
+
+
+class MemoryArtifactStorageTests(SimpleTestCase):
+    def test_lru_eviction_by_entries(self):
+        storage = MemoryArtifactStorage(max_entries=2, max_bytes=1000)
+        storage.put('a', make_artifact(1))
+        storage.put('b', make_artifact(1))
+        storage.get('a')
+        evicted = storage.put('c', make_artifact(1))
+        self.assertEqual(evicted, 1)
+        self.assertIsNotNone(storage.get('a'))
+        self.assertIsNone(storage.get('b'))
+        self.assertIsNotNone(storage.get('c'))
+
+    def test_eviction_by_bytes(self):
+        storage = MemoryArtifactStorage(max_entries=10, max_bytes=10)
+        storage.put('a', make_artifact(6))
+        evicted = storage.put('b', make_artifact(6))
+        self.assertEqual(evicted, 1)
+        self.assertEqual(len(storage), 1)
+        self.assertEqual(storage.size, 6)
+
+    def test_large_item_is_not_stored(self):
+        storage = MemoryArtifactStorage(
+            max_entries=10, max_bytes=100, max_item_bytes=5
+        )
+        storage.put('a', make_artifact(6))
+        self.assertIsNone(storage.get('a'))
+
+
+class DiskArtifactStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_roundtrip(self):
+        storage = DiskArtifactStorage(self.tmp_dir.name, max_bytes=100)
+        storage.put('a', make_artifact(10, filename='script.py'))
+        artifact = storage.get('a')
+        self.assertEqual(artifact.read(), b'x' * 10)
+        self.assertEqual(artifact.meta, dict(filename='script.py'))
+
+    def test_hit_readable_after_eviction(self):
+        storage = DiskArtifactStorage(self.tmp_dir.name, max_bytes=100)
+        other = DiskArtifactStorage(self.tmp_dir.name, max_bytes=100)
+        storage.put('a', make_artifact(10))
+        artifact = storage.get('a')
+        other.clear()
+        self.assertIsNone(storage.get('a'))
+        self.assertEqual(artifact.size, 10)
+        self.assertEqual(artifact.read(), b'x' * 10)
+
+    def test_size_budget_eviction(self):
+        storage = DiskArtifactStorage(self.tmp_dir.name, max_bytes=25)
+        storage.put('a', make_artifact(10))
+        storage.put('b', make_artifact(10))
+        evicted = storage.put('c', make_artifact(10))
+        self.assertEqual(evicted, 1)
+        self.assertLessEqual(storage.size, 25)
+        self.assertIsNotNone(storage.get('c'))
+
+    def test_overwrite_is_not_counted_twice(self):
+        storage = DiskArtifactStorage(self.tmp_dir.name, max_bytes=100)
+        other = DiskArtifactStorage(self.tmp_dir.name, max_bytes=100)
+        storage.put('a', make_artifact(10))
+        other.put('a', make_artifact(10))
+        storage.put('a', make_artifact(8))
+        self.assertEqual(storage.size, 8)
+
+    def test_size_restored_on_init(self):
+        DiskArtifactStorage(self.tmp_dir.name, max_bytes=100).put(
+            'a', make_artifact(10)
+        )
+        storage = DiskArtifactStorage(self.tmp_dir.name, max_bytes=100)
+        self.assertEqual(storage.size, 10)
+
+
+class ArtifactCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ArtifactCache(
+            memory=MemoryArtifactStorage(max_entries=1, max_bytes=100),
+            disk=DiskArtifactStorage(self.tmp_dir.name, max_bytes=100),
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_counters(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.put('a', make_artifact(1))
+        self.cache.put('b', make_artifact(1))
+        self.assertIsNotNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('a'))
+        stats = self.cache.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['memory_hits'], 1)
+        self.assertEqual(stats['disk_hits'], 1)
+        self.assertEqual(stats['memory_evictions'], 2)
+        self.assertEqual(stats['disk_evictions'], 0)
+
+    def test_disk_hit_promoted_to_memory(self):
+        self.cache.put('a', make_artifact(1))
+        self.cache.put('b', make_artifact(1))
+        self.cache.get('a')
+        self.cache.get('a')
+        stats = self.cache.stats()
+        self.assertEqual(stats['disk_hits'], 1)
+        self.assertEqual(stats['memory_hits'], 1)
+
+    def test_large_disk_hit_served_by_file(self):
+        cache = ArtifactCache(
+            memory=MemoryArtifactStorage(
+                max_entries=10, max_bytes=100, max_item_bytes=5
+            ),
+            disk=DiskArtifactStorage(self.tmp_dir.name, max_bytes=100),
+        )
+        cache.put('a', make_artifact(10))
+        artifact = cache.get('a')
+        self.assertIsNone(artifact.data)
+        self.assertEqual(artifact.read(), b'x' * 10)
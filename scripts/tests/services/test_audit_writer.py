@@ -0,0 +1,111 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from scripts.services.script_license_manager_service import (
+    BufferedAuditWriter,
+)
+from scripts.services.script_license_manager_service.structures import (
+    ActionType,
+    EncodeType,
+    IssuedLicense,
+)
+
+
+def make_issued(license_key: str) -> IssuedLicense:
+    return IssuedLicense(
+        issued_at=None,
+        license_key=license_key,
+        script_id='test_script',
+        issued_by_id=None,
+        issue_type=EncodeType.ENCODED_LK,
+        action=ActionType.GENERATE,
+        demo_lk=True,
+        expires=None,
+        extra_params=None,
+    )
+
+
+class BufferedAuditWriterTests(SimpleTestCase):
+    def setUp(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def _write(self, entities: list[IssuedLicense]) -> None:
+        with self.lock:
+            self.batches.append([e.license_key for e in entities])
+
+    def _make_writer(self, **params) -> BufferedAuditWriter:
+        params = dict(max_size=100, batch_size=100, flush_interval=60) | params
+        writer = BufferedAuditWriter(write=self._write, **params)
+        self.addCleanup(writer.flush)
+        return writer
+
+    def _wait_written(self, writer: BufferedAuditWriter, count: int) -> None:
+        deadline = time.monotonic() + 5
+        while writer.stats()['written'] < count:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(.01)
+
+    def test_flushed_by_size(self):
+        writer = self._make_writer(batch_size=2)
+        for license_key in ['0x00000001', '0x00000002']:
+            writer.add(make_issued(license_key))
+        self._wait_written(writer, 2)
+        self.assertEqual(self.batches, [['0x00000001', '0x00000002']])
+        writer.add(make_issued('0x00000003'))
+        writer.flush()
+        self.assertEqual(self.batches[1:], [['0x00000003']])
+        stats = writer.stats()
+        self.assertEqual(stats['queued'], 3)
+        self.assertEqual(stats['batches'], 2)
+        self.assertEqual(stats['pending'], 0)
+
+    def test_flushed_by_time(self):
+        writer = self._make_writer(flush_interval=.05)
+        writer.add(make_issued('0x00000001'))
+        self._wait_written(writer, 1)
+        self.assertEqual(self.batches, [['0x00000001']])
+
+    def test_sync_write_when_queue_is_full(self):
+        writer = self._make_writer(max_size=2)
+        for license_key in ['0x00000001', '0x00000002', '0x00000003']:
+            writer.add(make_issued(license_key))
+        self.assertEqual(self.batches, [['0x00000003']])
+        writer.flush()
+        self.assertEqual(self.batches[1:], [['0x00000001', '0x00000002']])
+        self.assertEqual(writer.stats()['sync_writes'], 1)
+
+    def test_strict(self):
+        writer = self._make_writer()
+        writer.add(make_issued('0x00000001'))
+        writer.add(make_issued('0x00000002'), strict=True)
+        self.assertEqual(self.batches, [['0x00000002']])
+        self.assertEqual(writer.stats()['pending'], 1)
+
+    def test_issue_time_set_when_queued(self):
+        written = []
+        writer = BufferedAuditWriter(
+            write=written.extend, max_size=10, batch_size=10, flush_interval=60
+        )
+        writer.add(make_issued('0x00000001'))
+        time.sleep(.01)
+        writer.flush()
+        self.assertIsNotNone(written[0].issued_at)
+
+    def test_failed_batch(self):
+        def write(entities):
+            raise RuntimeError('Database is unavailable')
+
+        writer = BufferedAuditWriter(
+            write=write, max_size=10, batch_size=10, flush_interval=60
+        )
+        writer.add(make_issued('0x00000001'))
+        with self.assertLogs(
+            'scripts.services.script_license_manager_service.audit_writer'
+        ):
+            writer.flush()
+        stats = writer.stats()
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(stats['pending'], 0)
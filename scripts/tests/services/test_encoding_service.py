@@ -0,0 +1,171 @@
+import asyncio
+import dataclasses
+import multiprocessing
+import os
+import threading
+import time
+from datetime import date
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from scripts import encoding
+from scripts.services.artifact_cache import ArtifactCache, MemoryArtifactStorage
+from scripts.services.encoding_service import (
+    EncodingUnavailableError,
+    InlineEncodingExecutor,
+    ProcessPoolEncodingExecutor,
+    ScriptEncodingService,
+)
+from scripts.services.repo_service import ScriptSource
+
+
+class ScriptEncodingServiceTests(SimpleTestCase):
+    def setUp(self):
+        self.service = ScriptEncodingService(
+            executor=InlineEncodingExecutor(),
+            template_cache=ArtifactCache(
+                memory=MemoryArtifactStorage(max_entries=10, max_bytes=1000)
+            ),
+            timeout=1,
+        )
+        self.source = ScriptSource(
+            script_id='test_script',
+            revision='1',
+            filename='script.py',
+            data=b'print(1)\n',
+        )
+
+    def test_encode_script(self):
+        encoded = self.service.encode_script(
+            source=self.source,
+            license_key='0x12345678',
+            expires=date(2030, 1, 1),
+            extra_params=dict(a=1),
+        )
+        self.assertEqual(encoded, encoding.encode(
+            self.source.data, '0x12345678', date(2030, 1, 1), dict(a=1)
+        ))
+
+    def test_template_built_once_per_revision(self):
+        with mock.patch.object(
+            encoding, 'build_template', wraps=encoding.build_template
+        ) as build_template:
+            for license_key in ['0x00000001', '0x00000002', '0x00000003']:
+                encoded = self.service.encode_script(
+                    source=self.source,
+                    license_key=license_key,
+                    expires=None,
+                    extra_params=None,
+                )
+                self.assertIn(license_key.encode(), encoded)
+            self.assertEqual(build_template.call_count, 1)
+            self.service.encode_script(
+                source=dataclasses.replace(self.source, revision='2'),
+                license_key='0x00000001',
+                expires=None,
+                extra_params=None,
+            )
+            self.assertEqual(build_template.call_count, 2)
+
+    def test_template_rebuilt_for_new_encoder_version(self):
+        with mock.patch.object(
+            encoding, 'build_template', wraps=encoding.build_template
+        ) as build_template:
+            self.service.encode_script(
+                source=self.source,
+                license_key='0x00000001',
+                expires=None,
+                extra_params=None,
+            )
+            with mock.patch.object(encoding, 'ENCODER_VERSION', 'next'):
+                self.service.encode_script(
+                    source=self.source,
+                    license_key='0x00000001',
+                    expires=None,
+                    extra_params=None,
+                )
+            self.assertEqual(build_template.call_count, 2)
+
+
+class ProcessPoolEncodingExecutorTests(SimpleTestCase):
+    def setUp(self):
+        self.executor = ProcessPoolEncodingExecutor(
+            workers=1, max_pending=1, max_jobs_per_worker=2
+        )
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_run(self):
+        args = (b'print(1)\n', '0x12345678', None, None)
+        result = self.executor.run(encoding.encode, *args, timeout=30)
+        self.assertEqual(result, encoding.encode(*args))
+        self.assertEqual(self.executor.stats()['completed'], 1)
+
+    async def test_arun(self):
+        args = (b'print(1)\n', '0x12345678', None, None)
+        # The only slot is taken by the first job, the second one waits
+        result, _ = await asyncio.gather(
+            self.executor.arun(encoding.encode, *args, timeout=30),
+            self.executor.arun(time.sleep, 0, timeout=30),
+        )
+        self.assertEqual(result, encoding.encode(*args))
+        with self.assertRaises(EncodingUnavailableError):
+            await self.executor.arun(time.sleep, 5, timeout=0.1)
+        stats = self.executor.stats()
+        self.assertEqual(stats['completed'], 2)
+        self.assertEqual(stats['timeouts'], 1)
+
+    def test_timeout(self):
+        worker_pid = self.executor.run(os.getpid, timeout=30)
+        with self.assertRaises(EncodingUnavailableError):
+            self.executor.run(time.sleep, 30, timeout=0.1)
+        stats = self.executor.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['recycles'], 1)
+        # Stuck worker is terminated and its slot is given back at once
+        for _ in range(50):
+            alive = [p.pid for p in multiprocessing.active_children()]
+            if worker_pid not in alive:
+                break
+            time.sleep(0.1)
+        self.assertNotIn(worker_pid, alive)
+        self.assertNotEqual(
+            self.executor.run(os.getpid, timeout=30), worker_pid
+        )
+
+    def test_timeout_includes_queue_wait(self):
+        self.executor.run(time.sleep, 0, timeout=30)
+        thread = threading.Thread(
+            target=self.executor.run, args=(time.sleep, 1), kwargs=dict(
+                timeout=30
+            )
+        )
+        thread.start()
+        time.sleep(0.1)
+        started = time.monotonic()
+        with self.assertRaises(EncodingUnavailableError):
+            self.executor.run(time.sleep, 2, timeout=1.5)
+        self.assertLess(time.monotonic() - started, 2.2)
+        thread.join()
+        self.assertEqual(self.executor.stats()['timeouts'], 1)
+
+    def test_queue_is_full(self):
+        self.executor.run(time.sleep, 0, timeout=30)
+        thread = threading.Thread(
+            target=self.executor.run, args=(time.sleep, 1), kwargs=dict(
+                timeout=30
+            )
+        )
+        thread.start()
+        time.sleep(0.1)
+        with self.assertRaises(EncodingUnavailableError):
+            self.executor.run(time.sleep, 0, timeout=0.1)
+        thread.join()
+        self.assertEqual(self.executor.stats()['rejected'], 1)
+
+    def test_workers_recycling(self):
+        for _ in range(5):
+            self.executor.run(time.sleep, 0, timeout=30)
+        self.assertEqual(self.executor.stats()['recycles'], 2)
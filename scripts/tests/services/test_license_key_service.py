@@ -0,0 +1,653 @@
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from scripts.services.license_key_service import (
+    BloomFilter,
+    DemoKeyRangeIndex,
+    LicenseKeyService,
+    LicenseManagerClient,
+    LicenseManagerUnavailableError,
+    LocalTTLCache,
+    MappedBloomFilter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class LocalTTLCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = LocalTTLCache(max_entries=2, clock=self.clock)
+
+    def test_expiration(self):
+        self.cache.set('a', True, ttl=10)
+        self.clock.now = 9.9
+        self.assertTrue(self.cache.get('a'))
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        self.cache.set('a', 1, ttl=10)
+        self.cache.set('b', 2, ttl=10)
+        self.cache.get('a')
+        self.cache.set('c', 3, ttl=10)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get('c'), 3)
+
+    def test_not_positive_ttl(self):
+        self.cache.set('a', 1, ttl=0)
+        self.assertIsNone(self.cache.get('a'))
+
+
+class LicenseKeyServiceTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.shared = LocMemCache('license_key_service_tests', {})
+        self.shared.clear()
+        self.service = self._make_service()
+        patcher = mock.patch.object(
+            LicenseKeyService, '_lookup', side_effect=self._lookup
+        )
+        self.lookup = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _make_service(self) -> LicenseKeyService:
+        return LicenseKeyService(
+            client=None,
+            local_cache=LocalTTLCache(max_entries=100, clock=self.clock),
+            shared_cache=self.shared,
+            positive_ttl=3600,
+            negative_ttl=60,
+            local_ttl=30,
+            lock_timeout=2,
+            lock_poll_interval=.01,
+        )
+
+    @staticmethod
+    def _lookup(license_key: str) -> bool:
+        return license_key.startswith('0x')
+
+    def test_cached_lookup(self):
+        for _ in range(20):
+            self.assertTrue(self.service.is_demo_key('0x12345678'))
+            self.assertFalse(self.service.is_demo_key('1234-1234-1234-1234'))
+        self.assertEqual(self.lookup.call_count, 2)
+        stats = self.service.stats()
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['local_hits'], 38)
+        self.assertEqual(stats['hit_ratio'], 0.95)
+
+    def test_shared_tier(self):
+        self.service.is_demo_key('0x12345678')
+        other_process = self._make_service()
+        self.assertTrue(other_process.is_demo_key('0x12345678'))
+        self.assertEqual(self.lookup.call_count, 1)
+        self.assertEqual(other_process.stats()['shared_hits'], 1)
+
+    def test_positive_and_negative_ttl(self):
+        with mock.patch.object(
+            self.shared, 'set', wraps=self.shared.set
+        ) as shared_set:
+            self.service.is_demo_key('0x12345678')
+            self.service.is_demo_key('1234-1234-1234-1234')
+        self.assertEqual(
+            [c.kwargs['timeout'] for c in shared_set.call_args_list],
+            [3600, 60]
+        )
+
+    def test_local_ttl(self):
+        self.service.is_demo_key('0x12345678')
+        self.shared.clear()
+        self.clock.now = 29
+        self.service.is_demo_key('0x12345678')
+        self.assertEqual(self.lookup.call_count, 1)
+        self.clock.now = 30
+        self.service.is_demo_key('0x12345678')
+        self.assertEqual(self.lookup.call_count, 2)
+
+    def test_invalidate(self):
+        self.service.is_demo_key('0x12345678')
+        self.service.invalidate('0x12345678')
+        self.service.is_demo_key('0x12345678')
+        self.assertEqual(self.lookup.call_count, 2)
+        self.assertEqual(self.service.stats()['invalidations'], 1)
+
+    def test_shared_cache_failure(self):
+        with mock.patch.object(
+            self.shared, 'get', side_effect=ConnectionError
+        ), mock.patch.object(
+            self.shared, 'set', side_effect=ConnectionError
+        ), self.assertLogs(
+            'scripts.services.license_key_service.service', 'ERROR'
+        ) as logs:
+            self.assertTrue(self.service.is_demo_key('0x12345678'))
+        self.assertEqual(
+            self.service.stats()['shared_errors'], len(logs.records)
+        )
+        self.assertTrue(self.service.is_demo_key('0x12345678'))
+        self.assertEqual(self.lookup.call_count, 1)
+
+
+class LicenseKeyServiceCoalescingTests(SimpleTestCase):
+    def setUp(self):
+        self.shared = LocMemCache('license_key_service_coalescing_tests', {})
+        self.shared.clear()
+        self.release = threading.Event()
+        patcher = mock.patch.object(
+            LicenseKeyService, '_lookup', side_effect=self._lookup
+        )
+        self.lookup = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _make_service(self, lock_wait: float = 2) -> LicenseKeyService:
+        return LicenseKeyService(
+            client=None,
+            local_cache=LocalTTLCache(max_entries=100),
+            shared_cache=self.shared,
+            positive_ttl=3600,
+            negative_ttl=60,
+            local_ttl=30,
+            lock_timeout=2,
+            lock_wait=lock_wait,
+            lock_poll_interval=.01,
+        )
+
+    def _lookup(self, license_key: str) -> bool:
+        self.release.wait(timeout=5)
+        return True
+
+    def test_in_process_coalescing(self):
+        service = self._make_service()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [
+                executor.submit(service.is_demo_key, '0x12345678')
+                for _ in range(8)
+            ]
+            time.sleep(.1)
+            self.release.set()
+            self.assertTrue(all(f.result() for f in futures))
+        self.assertEqual(self.lookup.call_count, 1)
+        stats = service.stats()
+        self.assertEqual(stats['lookups'], 1)
+        self.assertEqual(stats['coalesced'], 7)
+
+    def test_lookup_error_shared_with_waiters(self):
+        service = self._make_service()
+        self.lookup.side_effect = lambda key: self.release.wait(5) and 1 / 0
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(service.is_demo_key, '0x12345678')
+                for _ in range(4)
+            ]
+            time.sleep(.1)
+            self.release.set()
+            for future in futures:
+                self.assertRaises(ZeroDivisionError, future.result)
+        self.assertEqual(self.lookup.call_count, 1)
+
+    def test_cross_process_coalescing(self):
+        first, second = self._make_service(), self._make_service()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first_result = executor.submit(first.is_demo_key, '0x12345678')
+            time.sleep(.1)
+            second_result = executor.submit(second.is_demo_key, '0x12345678')
+            time.sleep(.1)
+            self.release.set()
+            self.assertTrue(first_result.result())
+            self.assertTrue(second_result.result())
+        self.assertEqual(self.lookup.call_count, 1)
+        self.assertEqual(second.stats()['lock_waits'], 1)
+
+    def test_lock_wait_timeout(self):
+        # Lock holder has died without storing classification
+        self.shared.add('slm:lk:lock:0x12345678', 'other', timeout=60)
+        self.release.set()
+        service = self._make_service(lock_wait=.1)
+        started = time.monotonic()
+        self.assertTrue(service.is_demo_key('0x12345678'))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.lookup.call_count, 1)
+        self.assertEqual(service.stats()['lock_waits'], 0)
+
+
+class LicenseKeyServiceBatchTests(SimpleTestCase):
+    def setUp(self):
+        self.shared = LocMemCache('license_key_service_batch_tests', {})
+        self.shared.clear()
+        self.client = mock.Mock(spec=LicenseManagerClient)
+        self.client.classify_license_keys.side_effect = lambda keys: {
+            key: key.startswith('0x') for key in keys if key != '0xdeadbeef'
+        }
+        self.service = self._make_service()
+
+    def _make_service(self) -> LicenseKeyService:
+        return LicenseKeyService(
+            client=self.client,
+            local_cache=LocalTTLCache(max_entries=100),
+            shared_cache=self.shared,
+            positive_ttl=3600,
+            negative_ttl=60,
+            local_ttl=30,
+            lookup_batch_size=2,
+        )
+
+    def test_classification(self):
+        keys = [
+            '0x00000001', '0000-0000-0000-0001', '0xdeadbeef', '0x00000001'
+        ]
+        self.assertEqual(self.service.is_demo_keys(keys), {
+            '0x00000001': True,
+            '0000-0000-0000-0001': False,
+            '0xdeadbeef': False,
+        })
+        self.assertEqual(
+            [c.args[0] for c in self.client.classify_license_keys.mock_calls],
+            [['0x00000001', '0000-0000-0000-0001'], ['0xdeadbeef']]
+        )
+
+    def test_only_misses_looked_up(self):
+        self.service.is_demo_keys(['0x00000001'])
+        self._make_service().is_demo_keys(['0x00000002'])
+        self.client.classify_license_keys.reset_mock()
+        result = self.service.is_demo_keys(
+            ['0x00000001', '0x00000002', '0x00000003']
+        )
+        self.assertEqual(result, dict.fromkeys(
+            ['0x00000001', '0x00000002', '0x00000003'], True
+        ))
+        self.client.classify_license_keys.assert_called_once_with(
+            ['0x00000003']
+        )
+        stats = self.service.stats()
+        self.assertEqual(stats['local_hits'], 1)
+        self.assertEqual(stats['shared_hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+
+    def test_cached_for_single_lookups(self):
+        self.service.is_demo_keys(['0x00000001', '0000-0000-0000-0001'])
+        self.assertTrue(self.service.is_demo_key('0x00000001'))
+        self.assertFalse(self.service.is_demo_key('0000-0000-0000-0001'))
+        self.client.get_license_key.assert_not_called()
+
+    async def test_async_lookup(self):
+        self.client.get_license_key.return_value = dict(
+            license_key='0x00000001', demo=True
+        )
+        self.assertTrue(await self.service.ais_demo_key('0x00000001'))
+        with mock.patch('asyncio.to_thread') as to_thread:
+            # Local cache hit is served in the event loop
+            self.assertTrue(await self.service.ais_demo_key('0x00000001'))
+        to_thread.assert_not_called()
+        self.client.get_license_key.assert_called_once_with('0x00000001')
+
+
+class DemoKeyRangeIndexTests(SimpleTestCase):
+    def test_contains(self):
+        index = DemoKeyRangeIndex([
+            ('0x00000010', '0x0000001f'),
+            ('0x00000020', '0x0000002f'),
+            ('0x00000028', '0x00000040'),
+            ('0x000000a0', '0x000000a0'),
+            ('0000-0000-0001-0000', '0000-0000-0001-ffff'),
+        ])
+        self.assertEqual(len(index), 3)
+        for license_key, demo in [
+            ('0x0000000f', False),
+            ('0x00000010', True),
+            ('0x00000030', True),
+            ('0x00000040', True),
+            ('0x00000041', False),
+            ('0x000000a0', True),
+            ('000000A0', True),
+            ('0xffffffff', False),
+            ('0000-0000-0001-ABCD', True),
+            ('0000-0000-0002-0000', False),
+            ('0000-0000-0000-0010', False),
+        ]:
+            with self.subTest(license_key=license_key):
+                self.assertIs(index.contains(license_key), demo)
+
+    def test_unexpected_keys(self):
+        index = DemoKeyRangeIndex([('0x00000000', '0xffffffff')])
+        for license_key in ['', '0x1234', '0x1234567g', '0000_0000_0000_0000']:
+            self.assertIsNone(index.contains(license_key))
+
+    def test_invalid_ranges(self):
+        for demo_range in [
+            ('0x00000002', '0x00000001'),
+            ('0x00000000', '0000-0000-0000-0000'),
+            ('0x00000000', 'not_a_key'),
+        ]:
+            with self.assertRaises(ValueError):
+                DemoKeyRangeIndex([demo_range])
+
+
+class LicenseKeyServiceRangeTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.client = mock.Mock(spec=LicenseManagerClient)
+        self.client.get_demo_ranges.return_value = dict(
+            version=1,
+            full=True,
+            added=[['0x00000000', '0x0000ffff']],
+            removed=[],
+        )
+        self.client.get_license_key.side_effect = lambda key: dict(demo=True)
+        self.service = LicenseKeyService(
+            client=self.client,
+            local_cache=LocalTTLCache(max_entries=100, clock=self.clock),
+            shared_cache=None,
+            positive_ttl=3600,
+            negative_ttl=60,
+            local_ttl=30,
+            range_max_age=100,
+            clock=self.clock,
+        )
+
+    def test_range_lookup(self):
+        self.assertTrue(self.service.refresh_demo_ranges())
+        self.assertTrue(self.service.is_demo_key('0x00001234'))
+        self.assertFalse(self.service.is_demo_key('0x00012345'))
+        self.assertEqual(
+            self.service.is_demo_keys(['0x00001234', '0x00012345']),
+            {'0x00001234': True, '0x00012345': False}
+        )
+        self.client.get_license_key.assert_not_called()
+        self.client.classify_license_keys.assert_not_called()
+        stats = self.service.stats()
+        self.assertEqual(stats['range_hits'], 4)
+        self.assertEqual(stats['demo_ranges'], 1)
+        self.assertEqual(stats['demo_ranges_version'], 1)
+
+    def test_incremental_refresh(self):
+        self.service.refresh_demo_ranges()
+        self.client.get_demo_ranges.return_value = dict(
+            version=3,
+            full=False,
+            added=[['0x00010000', '0x0001ffff']],
+            removed=[['0x00000000', '0x0000ffff']],
+        )
+        self.assertTrue(self.service.refresh_demo_ranges())
+        self.client.get_demo_ranges.assert_called_with(since=1)
+        self.assertFalse(self.service.is_demo_key('0x00001234'))
+        self.assertTrue(self.service.is_demo_key('0x00012345'))
+
+        self.client.get_demo_ranges.return_value = dict(
+            version=3, full=False, added=[], removed=[]
+        )
+        self.assertFalse(self.service.refresh_demo_ranges())
+        self.client.get_demo_ranges.assert_called_with(since=3)
+
+    def test_stale_index_not_used(self):
+        self.service.refresh_demo_ranges()
+        self.clock.now = 101
+        self.assertTrue(self.service.is_demo_key('0x00012345'))
+        self.client.get_license_key.assert_called_once_with('0x00012345')
+
+    def test_unsynced_index_not_used(self):
+        self.assertTrue(self.service.is_demo_key('0x00012345'))
+        self.client.get_license_key.assert_called_once_with('0x00012345')
+        self.assertNotIn('demo_ranges', self.service.stats())
+
+    def test_background_sync(self):
+        synced = threading.Event()
+        self.client.get_demo_ranges.side_effect = lambda since: (
+            synced.set() or self.client.get_demo_ranges.return_value
+        )
+        service = LicenseKeyService(
+            client=self.client,
+            local_cache=LocalTTLCache(max_entries=100),
+            shared_cache=None,
+            positive_ttl=3600,
+            negative_ttl=60,
+            local_ttl=30,
+            range_sync_interval=60,
+        )
+        service.is_demo_key('0x00012345')
+        self.assertTrue(synced.wait(timeout=5))
+        service.is_demo_key('0x00012345')
+        self.assertEqual(self.client.get_demo_ranges.call_count, 1)
+
+
+class BloomFilterTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = Path(tmp_dir.name) / 'demo_keys.bloom'
+
+    @staticmethod
+    def _build(license_keys: list[str], **kwargs) -> BloomFilter:
+        params = dict(capacity=len(license_keys), fpr=.01, max_bytes=1 << 20)
+        params.update(kwargs)
+        bloom_filter = BloomFilter.create(**params)
+        for license_key in license_keys:
+            bloom_filter.add(license_key)
+        return bloom_filter
+
+    def test_false_positive_rate(self):
+        bloom_filter = self._build([f'0x{i:08x}' for i in range(10000)])
+        self.assertTrue(all(
+            bloom_filter.might_contain(f'0x{i:08x}') for i in range(10000)
+        ))
+        false_positives = sum(
+            bool(bloom_filter.might_contain(f'0x{i:08x}'))
+            for i in range(10000, 30000)
+        )
+        self.assertLess(false_positives / 20000, .02)
+        self.assertAlmostEqual(bloom_filter.fpr, .01, delta=.002)
+
+    def test_key_spellings(self):
+        bloom_filter = self._build(['0x0000abcd', '1234-ABCD-0000-0000'])
+        self.assertTrue(bloom_filter.might_contain('0000ABCD'))
+        self.assertTrue(bloom_filter.might_contain('1234-abcd-0000-0000'))
+        self.assertIsNone(bloom_filter.might_contain('not_a_key'))
+        with self.assertRaises(ValueError):
+            bloom_filter.add('not_a_key')
+
+    def test_memory_budget(self):
+        bloom_filter = self._build(
+            [f'0x{i:08x}' for i in range(10000)], fpr=.001, max_bytes=1024
+        )
+        self.assertEqual(bloom_filter.size, 1024)
+        self.assertGreater(bloom_filter.fpr, .001)
+
+    def test_mapped_filter(self):
+        clock, wall_clock = FakeClock(), FakeClock()
+        mapped = MappedBloomFilter(
+            self.path,
+            check_interval=10,
+            max_age=100,
+            clock=clock,
+            wall_clock=wall_clock,
+        )
+        self.assertIsNone(mapped.get())
+
+        bloom_filter = self._build(['0x00000001'])
+        bloom_filter.built_at = 0
+        bloom_filter.save(self.path)
+        self.assertIsNone(mapped.get())
+        clock.now = 10
+        self.assertTrue(mapped.get().might_contain('0x00000001'))
+
+        replacement = self._build(['0x00000002'])
+        replacement.built_at = 50
+        replacement.save(self.path)
+        clock.now = 20
+        self.assertTrue(mapped.get().might_contain('0x00000002'))
+        self.assertFalse(mapped.get().might_contain('0x00000001'))
+
+        wall_clock.now = 151
+        self.assertIsNone(mapped.get())
+
+    def test_invalid_file(self):
+        self.path.write_bytes(b'not a filter')
+        mapped = MappedBloomFilter(self.path, check_interval=10, max_age=100)
+        with self.assertLogs(
+            'scripts.services.license_key_service.bloom', 'ERROR'
+        ):
+            self.assertIsNone(mapped.get())
+
+
+class LicenseKeyServiceFilterTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = Path(tmp_dir.name) / 'demo_keys.bloom'
+        bloom_filter = BloomFilter.create(capacity=2, fpr=.001, max_bytes=64)
+        bloom_filter.add('0x00000001')
+        bloom_filter.add('0x00000002')
+        bloom_filter.save(path)
+        self.client = mock.Mock(spec=LicenseManagerClient)
+        self.client.get_license_key.side_effect = lambda key: dict(demo=True)
+        self.client.classify_license_keys.side_effect = (
+            lambda keys: dict.fromkeys(keys, True)
+        )
+        self.service = LicenseKeyService(
+            client=self.client,
+            local_cache=LocalTTLCache(max_entries=100),
+            shared_cache=None,
+            positive_ttl=3600,
+            negative_ttl=60,
+            local_ttl=30,
+            demo_key_filter=MappedBloomFilter(
+                path, check_interval=10, max_age=60
+            ),
+        )
+
+    def test_rejected_without_lookup(self):
+        self.assertFalse(self.service.is_demo_key('0x00000003'))
+        self.assertEqual(
+            self.service.is_demo_keys(['0x00000003', '0x00000001']),
+            {'0x00000003': False, '0x00000001': True}
+        )
+        self.client.get_license_key.assert_not_called()
+        self.client.classify_license_keys.assert_called_once_with(
+            ['0x00000001']
+        )
+        stats = self.service.stats()
+        self.assertEqual(stats['filter_rejects'], 2)
+        self.assertEqual(stats['demo_key_filter']['keys'], 2)
+
+    def test_passed_keys_looked_up(self):
+        self.assertTrue(self.service.is_demo_key('0x00000001'))
+        self.client.get_license_key.assert_called_once_with('0x00000001')
+
+
+class LicenseKeyServiceRefreshTests(SimpleTestCase):
+    def setUp(self):
+        self.wall_clock = FakeClock()
+        self.shared = LocMemCache('license_key_service_refresh_tests', {})
+        self.shared.clear()
+        self.release = threading.Event()
+        self.release.set()
+        self.demo = True
+        patcher = mock.patch.object(
+            LicenseKeyService, '_lookup', side_effect=self._lookup
+        )
+        self.lookup = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = self._make_service()
+        self.addCleanup(self._wait_refreshes)
+        self.service.is_demo_key('0x12345678')
+        self.service.clear_local()
+        self.lookup.reset_mock()
+
+    def _make_service(self) -> LicenseKeyService:
+        return LicenseKeyService(
+            client=None,
+            local_cache=LocalTTLCache(max_entries=100),
+            shared_cache=self.shared,
+            positive_ttl=3600,
+            negative_ttl=60,
+            local_ttl=30,
+            stale_ttl=600,
+            refresh_ahead=60,
+            wall_clock=self.wall_clock,
+        )
+
+    def _lookup(self, license_key: str) -> bool:
+        self.release.wait(timeout=5)
+        if isinstance(self.demo, Exception):
+            raise self.demo
+        return self.demo
+
+    def _wait_refreshes(self):
+        deadline = time.monotonic() + 5
+        while self.service._refreshing and time.monotonic() < deadline:
+            time.sleep(.01)
+
+    def test_shared_entry_timeout(self):
+        with mock.patch.object(
+            self.shared, 'set', wraps=self.shared.set
+        ) as shared_set:
+            self.service.invalidate('0x12345678')
+            self.service.is_demo_key('0x12345678')
+        self.assertEqual(shared_set.call_args.kwargs['timeout'], 4200)
+
+    def test_stale_served_while_refreshed(self):
+        self.release.clear()
+        self.demo = False
+        self.wall_clock.now = 3700
+        self.assertTrue(self.service.is_demo_key('0x12345678'))
+        self.assertTrue(self.service.is_demo_key('0x12345678'))
+        self.release.set()
+        self._wait_refreshes()
+        self.assertEqual(self.lookup.call_count, 1)
+        self.assertFalse(self.service.is_demo_key('0x12345678'))
+        stats = self.service.stats()
+        self.assertEqual(stats['stale_hits'], 2)
+        self.assertEqual(stats['background_refreshes'], 1)
+        self.assertEqual(stats['refresh_errors'], 0)
+
+    def test_refresh_ahead(self):
+        self.wall_clock.now = 3560
+        self.assertTrue(self.service.is_demo_key('0x12345678'))
+        self._wait_refreshes()
+        self.assertEqual(self.lookup.call_count, 1)
+        stats = self.service.stats()
+        self.assertEqual(stats['shared_hits'], 1)
+        self.assertEqual(stats['stale_hits'], 0)
+        self.assertEqual(stats['background_refreshes'], 1)
+        self.wall_clock.now = 3700
+        self.assertTrue(self.service.is_demo_key('0x12345678'))
+        self.assertEqual(self.lookup.call_count, 1)
+
+    def test_fresh_entry_not_refreshed(self):
+        self.wall_clock.now = 3000
+        self.assertTrue(self.service.is_demo_key('0x12345678'))
+        self.assertTrue(self.service.is_demo_key('0x12345678'))
+        self.assertEqual(self.lookup.call_count, 0)
+        self.assertEqual(self.service.stats()['local_hits'], 1)
+
+    def test_stale_served_while_upstream_is_down(self):
+        self.demo = LicenseManagerUnavailableError('LM is down')
+        self.wall_clock.now = 3700
+        with self.assertLogs(
+            'scripts.services.license_key_service.service', 'ERROR'
+        ):
+            self.assertTrue(self.service.is_demo_key('0x12345678'))
+            self._wait_refreshes()
+        self.assertTrue(self.service.is_demo_key('0x12345678'))
+        self.assertEqual(self.service.stats()['refresh_errors'], 1)
+
+    def test_refresh_by_other_process_is_not_repeated(self):
+        self.shared.add('slm:lk:lock:0x12345678', 'other', timeout=60)
+        self.wall_clock.now = 3700
+        self.assertTrue(self.service.is_demo_key('0x12345678'))
+        self._wait_refreshes()
+        self.assertEqual(self.lookup.call_count, 0)
@@ -0,0 +1,221 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from scripts.lm_stub import StubLicenseManager, make_server
+from scripts.services.license_key_service import (
+    CircuitBreaker,
+    LicenseKeyNotFoundError,
+    LicenseKeyService,
+    LicenseManagerClient,
+    LicenseManagerUnavailableError,
+    LocalTTLCache,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            failure_threshold=2, reset_timeout=10, clock=self.clock
+        )
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_trial(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.clock.now = 20
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.allow())
+
+
+class LicenseManagerClientTests(SimpleTestCase):
+    def setUp(self):
+        self.stub = StubLicenseManager(unknown_keys=frozenset(['0xdeadbeef']))
+        self.server = make_server('127.0.0.1', 0, self.stub)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.clock = FakeClock()
+        self.client = self._make_client()
+
+    def _make_client(self, **kwargs) -> LicenseManagerClient:
+        host, port = self.server.server_address[:2]
+        params = dict(
+            base_url=f'http://{host}:{port}/',
+            connect_timeout=1,
+            read_timeout=1,
+            retries=2,
+            backoff=0,
+            backoff_max=0,
+            pool_maxsize=2,
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=5, reset_timeout=10, clock=self.clock
+            ),
+        )
+        params.update(kwargs)
+        return LicenseManagerClient(**params)
+
+    def test_get_license_key(self):
+        self.assertTrue(self.client.get_license_key('0x12345678')['demo'])
+        self.assertFalse(
+            self.client.get_license_key('1234-1234-1234-1234')['demo']
+        )
+        with self.assertRaises(LicenseKeyNotFoundError):
+            self.client.get_license_key('0xdeadbeef')
+
+    def test_classify_license_keys(self):
+        self.assertEqual(
+            self.client.classify_license_keys(
+                ['0x12345678', '1234-1234-1234-1234', '0xdeadbeef']
+            ),
+            {'0x12345678': True, '1234-1234-1234-1234': False}
+        )
+        self.assertEqual(self.stub.requests, 1)
+
+    def test_request_headers(self):
+        with mock.patch.object(
+            self.client._pool, 'urlopen', wraps=self.client._pool.urlopen
+        ) as urlopen:
+            self.client.get_license_key('0x12345678')
+            self.client.classify_license_keys(['0x12345678'])
+        self.assertEqual(
+            urlopen.call_args_list[0].kwargs['headers'],
+            {'Accept': 'application/json'},
+        )
+        self.assertEqual(urlopen.call_args_list[1].kwargs['headers'], {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+        })
+
+    def test_demo_ranges_sync(self):
+        service = LicenseKeyService(
+            client=self.client,
+            local_cache=LocalTTLCache(max_entries=10),
+            shared_cache=None,
+            positive_ttl=60,
+            negative_ttl=60,
+            local_ttl=60,
+        )
+        self.assertTrue(service.refresh_demo_ranges())
+        self.stub.add_demo_range('1234-0000-0000-0000', '1234-ffff-ffff-ffff')
+        self.stub.remove_demo_range('0x00000000', '0xffffffff')
+        self.stub.add_demo_range('0x00000000', '0x0fffffff')
+        self.assertEqual(self.client.get_demo_ranges(since=1), dict(
+            version=3,
+            full=False,
+            added=[['0x00000000', '0x0fffffff']],
+            removed=[['0x00000000', '0xffffffff']],
+        ))
+        self.assertTrue(service.refresh_demo_ranges())
+        requests = self.stub.requests
+        for license_key, demo in [
+            ('0x01234567', True),
+            ('0x12345678', False),
+            ('1234-1234-1234-1234', True),
+            ('4321-1234-1234-1234', False),
+        ]:
+            self.assertIs(service.is_demo_key(license_key), demo)
+            self.assertIs(self.stub.is_demo_key(license_key), demo)
+        self.assertEqual(self.stub.requests, requests)
+        self.assertEqual(service.stats()['demo_ranges_version'], 3)
+
+    def test_keep_alive(self):
+        for _ in range(5):
+            self.client.get_license_key('0x12345678')
+        pool = self.client._pool.connection_from_url(
+            f'http://{self.server.server_address[0]}:'
+            f'{self.server.server_address[1]}/'
+        )
+        self.assertEqual(pool.num_connections, 1)
+
+    def test_retries(self):
+        self.stub.error_rate = 1
+        with self.assertRaises(LicenseManagerUnavailableError):
+            self.client.get_license_key('0x12345678')
+        self.assertEqual(self.stub.requests, 3)
+
+    def test_read_timeout(self):
+        self.stub.latency = .3
+        client = self._make_client(read_timeout=.05, retries=0)
+        with self.assertRaises(LicenseManagerUnavailableError):
+            client.get_license_key('0x12345678')
+
+    def test_circuit_breaker(self):
+        client = self._make_client(circuit_breaker=CircuitBreaker(
+            failure_threshold=2, reset_timeout=10, clock=self.clock
+        ))
+        self.stub.error_rate = 1
+        with self.assertRaisesRegex(LicenseManagerUnavailableError, 'open'):
+            client.get_license_key('0x12345678')
+        self.assertEqual(self.stub.requests, 2)
+        with self.assertRaisesRegex(LicenseManagerUnavailableError, 'open'):
+            client.get_license_key('0x12345678')
+        self.assertEqual(self.stub.requests, 2)
+        self.assertEqual(client.circuit_state, CircuitBreaker.OPEN)
+
+        self.stub.error_rate = 0
+        self.clock.now = 10
+        self.assertTrue(client.get_license_key('0x12345678')['demo'])
+        self.assertEqual(client.circuit_state, CircuitBreaker.CLOSED)
+
+    def test_unexpected_error_ends_trial(self):
+        client = self._make_client(retries=0, circuit_breaker=CircuitBreaker(
+            failure_threshold=1, reset_timeout=10, clock=self.clock
+        ))
+        self.stub.error_rate = 1
+        with self.assertRaises(LicenseManagerUnavailableError):
+            client.get_license_key('0x12345678')
+        self.stub.error_rate = 0
+        self.clock.now = 10
+        with mock.patch.object(
+            client._pool, 'request', side_effect=RuntimeError('unexpected')
+        ):
+            with self.assertRaisesRegex(RuntimeError, 'unexpected'):
+                client.get_license_key('0x12345678')
+        self.assertEqual(client.circuit_state, CircuitBreaker.OPEN)
+        self.clock.now = 20
+        self.assertTrue(client.get_license_key('0x12345678')['demo'])
+        self.assertEqual(client.circuit_state, CircuitBreaker.CLOSED)
+
+    def test_license_key_service(self):
+        service = LicenseKeyService(
+            client=self.client,
+            local_cache=LocalTTLCache(max_entries=10),
+            shared_cache=None,
+            positive_ttl=60,
+            negative_ttl=60,
+            local_ttl=60,
+        )
+        self.assertTrue(service.is_demo_key('0x12345678'))
+        self.assertFalse(service.is_demo_key('1234-1234-1234-1234'))
+        self.assertFalse(service.is_demo_key('0xdeadbeef'))
+        self.assertEqual(service.stats()['circuit'], CircuitBreaker.CLOSED)
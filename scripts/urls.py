@@ -4,7 +4,18 @@ from drf_yasg.views import get_schema_view
 from rest_framework.permissions import AllowAny
 from rest_framework.routers import DefaultRouter
 
-from .views import IssuedLicenseViewSet, ScriptViewSet
+from .async_views import (
+    AsyncGenerateDemoEncodedView,
+    AsyncGenerateEncodedView,
+    AsyncGeneratePlainView,
+)
+from .views import (
+    GenerationJobViewSet,
+    IssuedLicenseViewSet,
+    LicenseKeyClassifyView,
+    ScriptViewSet,
+    ServiceStatsView,
+)
 
 app_name = 'scripts'
 
@@ -23,9 +34,31 @@ router.register('scripts', ScriptViewSet, basename='script')
 router.register(
     'issued_licenses', IssuedLicenseViewSet, basename='issued_license'
 )
+router.register('jobs', GenerationJobViewSet, basename='generation_job')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path(
+        'license_keys/classify/',
+        LicenseKeyClassifyView.as_view(),
+        name='license_key-classify'
+    ),
+    path('stats/', ServiceStatsView.as_view(), name='stats'),
+    path(
+        'async/scripts/<str:pk>/generate_plain/',
+        AsyncGeneratePlainView.as_view(),
+        name='script-generate-plain-async'
+    ),
+    path(
+        'async/scripts/<str:pk>/generate_encoded/',
+        AsyncGenerateEncodedView.as_view(),
+        name='script-generate-encoded-async'
+    ),
+    path(
+        'async/scripts/<str:pk>/generate_demo_encoded/',
+        AsyncGenerateDemoEncodedView.as_view(),
+        name='script-generate-demo-encoded-async'
+    ),
     path(
         'swagger<format>/',
         schema_view.without_ui(cache_timeout=0),
@@ -1,16 +1,28 @@
+import tempfile
+import zipfile
+
+from django.db.models import Q, QuerySet
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from django.utils.decorators import method_decorator
+from django.utils.http import content_disposition_header, parse_etags
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import LimitOffsetPagination
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
 
-from .filters import ScriptFilter
+from .export import EXPORT_CONTENT_TYPES, export_issued_licenses, gzip_chunks
+from .filters import IssuedLicenseFilter, ScriptFilter
+from .models import GenerationJob as GenerationJobModel
 from .models import IssuedLicense
 from .models import Script as ScriptModel
+from .pagination import IssuedLicensePagination
 from .permissions import (
     CanForceIssueEncodedScript,
     CanForceIssuePlainScript,
@@ -19,15 +31,31 @@ from .permissions import (
     IsDownloadableScript,
 )
 from .serializers import (
+    ClassifyLicenseKeysRequestSerializer,
+    ExportIssuedLicensesRequestSerializer,
+    GenerateBatchRequestSerializer,
     GenerateDemoEncodedRequestSerializer,
     GenerateEncodedRequestSerializer,
     GeneratePlainRequestSerializer,
+    GenerationJobSerializer,
     IssuedLicenseSerializer,
     ScriptSerializer,
     UpdateIssuedRequestSerializer,
+    validate_extra_params,
+)
+from .services import (
+    generation_job_service,
+    lk_service,
+    script_encoding_service,
+    script_license_manager_service,
 )
-from .services import lk_service, script_license_manager_service
+from .services.encoding_service import EncodingUnavailableError
+from .services.generation_job_service import GenerationJobsUnavailableError
+from .services.generation_job_service.structures import JobStatus
+from .services.license_key_service import LicenseManagerUnavailableError
+from .services.script_license_manager_service import ArtifactNotModified
 from .services.script_license_manager_service.structures import (
+    ActionType,
     GeneratedScript,
     Script,
     ScriptLicenseConfig,
@@ -39,9 +67,68 @@ script_response = openapi.Response(
 )
 
 
+class ScriptFileResponseMixin:
+    """Prepares responses with generated script files"""
+
+    download_block_size = 64 * 1024
+
+    def _prepare_python_file_response(
+        self,
+        generated: GeneratedScript
+    ) -> FileResponse:
+        """Streams generated script by chunks with known Content-Length
+
+        Compressed variant is sent as is with corresponding Content-Encoding
+        """
+        file_response = FileResponse(
+            generated.open(),
+            as_attachment=True,
+            filename=generated.filename,
+            content_type='text/x-python',
+            headers=self._python_file_headers(generated),
+        )
+        patch_vary_headers(file_response, ('Accept-Encoding',))
+        file_response.block_size = self.download_block_size
+        return file_response
+
+    @staticmethod
+    def _python_file_headers(generated: GeneratedScript) -> dict[str, str]:
+        headers = {
+            '1C-Filename':
+                generated.filename.replace(' ', '_').replace('.py', ''),
+        }
+        if generated.etag is not None:
+            headers['ETag'] = generated.etag
+        if generated.content_encoding is not None:
+            headers['Content-Encoding'] = generated.content_encoding
+        return headers
+
+    @staticmethod
+    def _get_accept_encodings(request: Request) -> list[str]:
+        """Lists content codings accepted by client, most preferred first"""
+        accepted = []
+        for item in request.headers.get('Accept-Encoding', '').split(','):
+            coding, *params = item.split(';')
+            coding = coding.strip().lower()
+            if not coding or coding == '*':
+                continue
+            quality = 1.
+            for param in params:
+                name, _, value = param.partition('=')
+                if name.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.
+            if quality > 0:
+                accepted.append((quality, coding))
+        accepted.sort(key=lambda item: item[0], reverse=True)
+        return [coding for _, coding in accepted]
+
+
 @method_decorator(name='list', decorator=swagger_auto_schema(security=[]))
 @method_decorator(name='retrieve', decorator=swagger_auto_schema(security=[]))
-class ScriptViewSet(viewsets.ReadOnlyModelViewSet):
+class ScriptViewSet(ScriptFileResponseMixin, viewsets.ReadOnlyModelViewSet):
     """Set of views responsible for `script` resource
 
     Endpoints:
@@ -52,12 +139,21 @@ class ScriptViewSet(viewsets.ReadOnlyModelViewSet):
      - per script `generate_encoded`
      - per script `generate_demo_encoded`
      - per script `update_issued`
+     - `generate_batch` for several scripts at once
+
+    Per script generate endpoints respond with `ETag` fingerprinting script
+    revision and license params and honour `If-None-Match` with 304 response
+    (deliberately, instead of 412 RFC 9110 sets for POST, `*` is ignored).
+    Pre-compressed script is sent if client accepts its `Content-Encoding`.
+    With `Prefer: respond-async` header they respond with 202 and a generation
+    job to poll instead
     """
 
     queryset = ScriptModel.objects.all()
     serializer_class = ScriptSerializer
     filterset_class = ScriptFilter
     permission_classes = [AllowAny]
+    zip_spool_max_size = 8 * 1024 * 1024
 
     @swagger_auto_schema(
         method='post',
@@ -65,10 +161,14 @@ class ScriptViewSet(viewsets.ReadOnlyModelViewSet):
         request_body=GeneratePlainRequestSerializer,
         responses={
             status.HTTP_200_OK: script_response,
+            status.HTTP_304_NOT_MODIFIED: 'Script matching `If-None-Match`',
             status.HTTP_400_BAD_REQUEST: 'Invalid request params',
             status.HTTP_401_UNAUTHORIZED: 'No credentials provided',
             status.HTTP_403_FORBIDDEN: 'Not authorised',
-            status.HTTP_404_NOT_FOUND: 'Script not found'
+            status.HTTP_404_NOT_FOUND: 'Script not found',
+            status.HTTP_503_SERVICE_UNAVAILABLE: (
+                'Generation jobs queue is full'
+            ),
         },
         produces='text/x-python',
     )
@@ -87,19 +187,16 @@ class ScriptViewSet(viewsets.ReadOnlyModelViewSet):
             data=request.data, context=script
         )
         if serializer.is_valid():
-            try:
-                user_id = None if request.user is None else request.user.id
-                generated = script_license_manager_service.generate_script(
-                    script=Script(id=script.id),
-                    config=ScriptLicenseConfig(
-                        encode=False,
-                        user_id=user_id,
-                        **serializer.validated_data,
-                    )
-                )
-            except PermissionError as e:
-                return Response(str(e), status=status.HTTP_403_FORBIDDEN)
-            return self._prepare_python_file_response(generated)
+            return self._issue_script(
+                request,
+                script=Script(id=script.id),
+                config=ScriptLicenseConfig(
+                    encode=False,
+                    user_id=self._get_user_id(request),
+                    **serializer.validated_data,
+                ),
+                action=ActionType.GENERATE,
+            )
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
@@ -111,10 +208,14 @@ class ScriptViewSet(viewsets.ReadOnlyModelViewSet):
         request_body=GenerateEncodedRequestSerializer,
         responses={
             status.HTTP_200_OK: script_response,
+            status.HTTP_304_NOT_MODIFIED: 'Script matching `If-None-Match`',
             status.HTTP_400_BAD_REQUEST: 'Invalid request params',
             status.HTTP_401_UNAUTHORIZED: 'No credentials provided',
             status.HTTP_403_FORBIDDEN: 'Not authorised',
-            status.HTTP_404_NOT_FOUND: 'Script not found'
+            status.HTTP_404_NOT_FOUND: 'Script not found',
+            status.HTTP_503_SERVICE_UNAVAILABLE: (
+                'Encoding or license manager service is unavailable'
+            ),
         },
         produces='text/x-python',
     )
@@ -133,19 +234,16 @@ class ScriptViewSet(viewsets.ReadOnlyModelViewSet):
             data=request.data, context=script
         )
         if serializer.is_valid():
-            try:
-                user_id = None if request.user is None else request.user.id
-                generated = script_license_manager_service.generate_script(
-                    script=Script(id=script.id),
-                    config=ScriptLicenseConfig(
-                        encode=True,
-                        user_id=user_id,
-                        **serializer.validated_data,
-                    )
-                )
-            except PermissionError as e:
-                return Response(str(e), status=status.HTTP_403_FORBIDDEN)
-            return self._prepare_python_file_response(generated)
+            return self._issue_script(
+                request,
+                script=Script(id=script.id),
+                config=ScriptLicenseConfig(
+                    encode=True,
+                    user_id=self._get_user_id(request),
+                    **serializer.validated_data,
+                ),
+                action=ActionType.GENERATE,
+            )
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
@@ -157,9 +255,13 @@ class ScriptViewSet(viewsets.ReadOnlyModelViewSet):
         request_body=GenerateDemoEncodedRequestSerializer,
         responses={
             status.HTTP_200_OK: script_response,
+            status.HTTP_304_NOT_MODIFIED: 'Script matching `If-None-Match`',
             status.HTTP_400_BAD_REQUEST: 'Invalid request params',
             status.HTTP_403_FORBIDDEN: 'Cannot issue license for not demo key',
-            status.HTTP_404_NOT_FOUND: 'Script not found'
+            status.HTTP_404_NOT_FOUND: 'Script not found',
+            status.HTTP_503_SERVICE_UNAVAILABLE: (
+                'Encoding or license manager service is unavailable'
+            ),
         },
         produces='text/x-python',
         security=[]
@@ -179,27 +281,30 @@ class ScriptViewSet(viewsets.ReadOnlyModelViewSet):
             data=request.data, context=script
         )
         if serializer.is_valid():
-            demo = lk_service.is_demo_key(
-                serializer.validated_data['license_key']
-            )
+            try:
+                demo = lk_service.is_demo_key(
+                    serializer.validated_data['license_key']
+                )
+            except LicenseManagerUnavailableError as e:
+                return Response(
+                    str(e), status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
             if not demo:
                 return Response(
                     'Cannot issue license for not demo key',
                     status=status.HTTP_403_FORBIDDEN
                 )
-            try:
-                user_id = None if request.user is None else request.user.id
-                generated = script_license_manager_service.generate_script(
-                    script=Script(id=script.id),
-                    config=ScriptLicenseConfig(
-                        encode=True,
-                        user_id=user_id,
-                        **serializer.validated_data,
-                    )
-                )
-            except PermissionError as e:
-                return Response(str(e), status=status.HTTP_403_FORBIDDEN)
-            return self._prepare_python_file_response(generated)
+            return self._issue_script(
+                request,
+                script=Script(id=script.id),
+                config=ScriptLicenseConfig(
+                    encode=True,
+                    user_id=self._get_user_id(request),
+                    demo=demo,
+                    **serializer.validated_data,
+                ),
+                action=ActionType.GENERATE,
+            )
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
@@ -211,11 +316,15 @@ class ScriptViewSet(viewsets.ReadOnlyModelViewSet):
         request_body=UpdateIssuedRequestSerializer,
         responses={
             status.HTTP_200_OK: script_response,
+            status.HTTP_304_NOT_MODIFIED: 'Script matching `If-None-Match`',
             status.HTTP_400_BAD_REQUEST: 'Invalid request params',
             status.HTTP_403_FORBIDDEN: (
                 'Script has not been generated permanently for this key'
             ),
             status.HTTP_404_NOT_FOUND: 'Script not found',
+            status.HTTP_503_SERVICE_UNAVAILABLE: (
+                'Encoding or license manager service is unavailable'
+            ),
         },
         produces='text/x-python',
         security=[],
@@ -235,54 +344,416 @@ class ScriptViewSet(viewsets.ReadOnlyModelViewSet):
             data=request.data, context=script
         )
         if serializer.is_valid():
-            try:
-                user_id = None if request.user is None else request.user.id
-                generated = script_license_manager_service.update_issued(
-                    script=Script(id=script.id),
-                    config=ScriptLicenseConfig(
-                        encode=True,
-                        user_id=user_id,
-                        **serializer.validated_data
-                    ))
-            except PermissionError as e:
-                return Response(str(e), status=status.HTTP_403_FORBIDDEN)
-            return self._prepare_python_file_response(generated)
+            return self._issue_script(
+                request,
+                script=Script(id=script.id),
+                config=ScriptLicenseConfig(
+                    encode=True,
+                    user_id=self._get_user_id(request),
+                    **serializer.validated_data,
+                ),
+                action=ActionType.UPDATE,
+            )
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    def _prepare_python_file_response(
+    @swagger_auto_schema(
+        method='post',
+        operation_description=(
+            'Generates several encoded scripts with the same license params '
+            'packed into one zip archive'
+        ),
+        request_body=GenerateBatchRequestSerializer,
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                'Zip archive with scripts to download',
+                schema=openapi.Schema(type=openapi.TYPE_FILE),
+            ),
+            status.HTTP_400_BAD_REQUEST: 'Invalid request params',
+            status.HTTP_401_UNAUTHORIZED: 'No credentials provided',
+            status.HTTP_403_FORBIDDEN: 'Not authorised',
+            status.HTTP_404_NOT_FOUND: 'Script not found',
+            status.HTTP_503_SERVICE_UNAVAILABLE: (
+                'Encoding or license manager service is unavailable'
+            ),
+        },
+        produces='application/zip',
+    )
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[
+            IsAuthenticated,
+            IsDownloadableScript,
+            CanForceIssueEncodedScript | CanIssueEncodedScript
+        ],
+    )
+    def generate_batch(self, request: Request, *args, **kwargs):
+        serializer = GenerateBatchRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        script_ids = serializer.validated_data['scripts']
+        requested_extra_params = (
+            serializer.validated_data.get('extra_params') or {}
+        )
+        scripts = {
+            script.id: script
+            for script in self.get_queryset().filter(pk__in=script_ids)
+        }
+        not_found = [i for i in script_ids if i not in scripts]
+        if not_found:
+            return Response(
+                f'Scripts not found: {not_found}',
+                status=status.HTTP_404_NOT_FOUND
+            )
+        extra_params = {}
+        errors = {}
+        for script_id in script_ids:
+            self.check_object_permissions(request, scripts[script_id])
+            extra_params[script_id] = requested_extra_params.get(script_id)
+            try:
+                validate_extra_params(
+                    scripts[script_id], extra_params[script_id]
+                )
+            except ValidationError as e:
+                errors[script_id] = e.detail
+        if errors:
+            return Response(
+                dict(extra_params=errors),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            generated = script_license_manager_service.generate_scripts(
+                scripts=[Script(id=script_id) for script_id in script_ids],
+                config=ScriptLicenseConfig(
+                    encode=True,
+                    user_id=self._get_user_id(request),
+                    license_key=serializer.validated_data.get('license_key'),
+                    expires=serializer.validated_data.get('expires'),
+                ),
+                extra_params=extra_params,
+            )
+        except PermissionError as e:
+            return Response(str(e), status=status.HTTP_403_FORBIDDEN)
+        except (
+            EncodingUnavailableError, LicenseManagerUnavailableError
+        ) as e:
+            return Response(
+                str(e), status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return self._prepare_zip_file_response(
+            dict(zip(script_ids, generated))
+        )
+
+    def _issue_script(
         self,
-        generated: GeneratedScript
-    ) -> Response:
-        file_response = Response(
-            headers={
-                'Content-Disposition':
-                    f'attachment; filename="{generated.filename}"',
-                '1C-Filename':
-                    generated.filename.replace(' ', '_').replace('.py', ''),
-            },
-            content_type='text/x-python',
+        request: Request,
+        script: Script,
+        config: ScriptLicenseConfig,
+        action: ActionType,
+    ) -> Response | FileResponse:
+        """Issues script license and responds with generated script
+
+        If client prefers asynchronous processing (`Prefer: respond-async`)
+        and generation jobs are enabled, responds with 202 and a job to poll.
+        Anonymous users can poll only demo jobs, so other requests of theirs
+        are processed synchronously
+        """
+        if (
+            self._prefers_async(request)
+            and generation_job_service.enabled
+            and (request.user.is_authenticated or config.demo)
+        ):
+            try:
+                job = generation_job_service.submit(script, config, action)
+            except GenerationJobsUnavailableError as e:
+                return Response(
+                    str(e), status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            serializer = GenerationJobSerializer(
+                GenerationJobModel.objects.get(pk=job.id),
+                context=dict(request=request),
+            )
+            location = reverse(
+                'scripts:generation_job-detail',
+                kwargs=dict(pk=job.id),
+                request=request,
+            )
+            return Response(
+                serializer.data,
+                status=status.HTTP_202_ACCEPTED,
+                headers={
+                    'Location': location,
+                    'Preference-Applied': 'respond-async',
+                },
+            )
+        if action == ActionType.UPDATE:
+            issue = script_license_manager_service.update_issued
+        else:
+            issue = script_license_manager_service.generate_script
+        try:
+            generated = issue(
+                script=script,
+                config=config,
+                if_none_match=self._get_if_none_match(request),
+                accept_encodings=self._get_accept_encodings(request),
+            )
+        except ArtifactNotModified as e:
+            return self._prepare_not_modified_response(e.etag)
+        except PermissionError as e:
+            return Response(str(e), status=status.HTTP_403_FORBIDDEN)
+        except (
+            EncodingUnavailableError, LicenseManagerUnavailableError
+        ) as e:
+            return Response(
+                str(e), status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return self._prepare_python_file_response(generated)
+
+    @staticmethod
+    def _get_user_id(request: Request) -> None | int:
+        return None if request.user is None else request.user.id
+
+    @staticmethod
+    def _prefers_async(request: Request) -> bool:
+        preferences = request.headers.get('Prefer', '').split(',')
+        return any(
+            preference.split(';')[0].strip().lower() == 'respond-async'
+            for preference in preferences
         )
-        file_response.content = generated.data
+
+    @staticmethod
+    def _get_if_none_match(request: Request) -> list[str]:
+        return parse_etags(request.headers.get('If-None-Match', ''))
+
+    @staticmethod
+    def _prepare_not_modified_response(etag: str) -> Response:
+        return Response(
+            status=status.HTTP_304_NOT_MODIFIED,
+            headers={'ETag': etag, 'Vary': 'Accept-Encoding'},
+        )
+
+    def _prepare_zip_file_response(
+        self,
+        generated: dict[str, GeneratedScript]
+    ) -> FileResponse:
+        """Packs generated scripts into zip archive and streams it
+
+        Archive is spooled to a temporary file once it grows large, every
+        script is placed into directory named after script id
+        """
+        archive = tempfile.SpooledTemporaryFile(
+            max_size=self.zip_spool_max_size
+        )
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for script_id, script in generated.items():
+                with zf.open(f'{script_id}/{script.filename}', 'w') as f:
+                    for chunk in script.iter_chunks():
+                        f.write(chunk)
+        archive.seek(0)
+        file_response = FileResponse(
+            archive,
+            as_attachment=True,
+            filename='scripts.zip',
+            content_type='application/zip',
+        )
+        file_response.block_size = self.download_block_size
         return file_response
 
 
-class IssuedLicensePagination(LimitOffsetPagination):
-    default_limit = 100
-    max_limit = 1000
+class GenerationJobViewSet(
+    ScriptFileResponseMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Set of views responsible for `generation_job` resource
+
+    Endpoints:
+     - job status
+     - generated script download once job has succeeded
+
+    Users see their own jobs, demo jobs of anonymous users are available to
+    anyone knowing job id
+    """
+
+    queryset = GenerationJobModel.objects.all()
+    serializer_class = GenerationJobSerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self) -> QuerySet:
+        visible = Q(issued_by__isnull=True, demo=True)
+        if self.request.user.is_authenticated:
+            visible |= Q(issued_by=self.request.user)
+        return super().get_queryset().filter(visible)
+
+    def get_object(self) -> GenerationJobModel:
+        job = super().get_object()
+        unfinished = (
+            GenerationJobModel.Status.PENDING, GenerationJobModel.Status.RUNNING
+        )
+        # Job left by a dead worker is reported as failed
+        if job.status in unfinished and generation_job_service.fail_if_stale(
+            job.pk
+        ):
+            job.refresh_from_db()
+        return job
+
+    @swagger_auto_schema(
+        method='get',
+        operation_description='Downloads script generated by job',
+        responses={
+            status.HTTP_200_OK: script_response,
+            status.HTTP_404_NOT_FOUND: 'Job not found',
+            status.HTTP_409_CONFLICT: 'Job has not succeeded',
+            status.HTTP_410_GONE: 'Job result has expired',
+        },
+        produces='text/x-python',
+        security=[],
+    )
+    @action(detail=True, methods=['get'])
+    def download(self, request: Request, *args, **kwargs):
+        job = generation_job_service.get(self.get_object().id)
+        generated = generation_job_service.get_result(job)
+        if generated is None:
+            if job.status != JobStatus.SUCCEEDED:
+                return Response(
+                    f'Job has not succeeded: {job.status.name}',
+                    status=status.HTTP_409_CONFLICT
+                )
+            return Response(
+                'Job result has expired',
+                status=status.HTTP_410_GONE
+            )
+        return self._prepare_python_file_response(generated)
 
 
 class IssuedLicenseViewSet(viewsets.ReadOnlyModelViewSet):
     """Set of views responsible for `issued_license` resource
 
     Endpoints:
-     - issued licensed list with pagination
+     - issued licensed list with keyset pagination and filters
      - issued license details
+     - issued licenses export
     """
 
-    queryset = IssuedLicense.objects.all()
+    queryset = IssuedLicense.objects.select_related('issued_by')
     serializer_class = IssuedLicenseSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = IssuedLicensePagination
+    filterset_class = IssuedLicenseFilter
+    # Number of records fetched from server-side cursor at once by export
+    export_chunk_size = 2000
+
+    @swagger_auto_schema(
+        method='get',
+        operation_description=(
+            'Streams issued licenses matching list filters as CSV or NDJSON, '
+            'optionally gzip compressed'
+        ),
+        query_serializer=ExportIssuedLicensesRequestSerializer,
+        responses={
+            status.HTTP_200_OK: 'CSV, NDJSON or gzip compressed file',
+            status.HTTP_400_BAD_REQUEST: 'Invalid request params',
+            status.HTTP_403_FORBIDDEN: 'Not authorised',
+        },
+        produces=['text/csv', 'application/x-ndjson', 'application/gzip'],
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def export(self, request: Request, *args, **kwargs):
+        serializer = ExportIssuedLicensesRequestSerializer(
+            data=request.query_params
+        )
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        export_format = serializer.validated_data['export_format']
+        chunks = export_issued_licenses(
+            self.filter_queryset(self.get_queryset()),
+            export_format,
+            chunk_size=self.export_chunk_size,
+        )
+        filename = f'issued_licenses.{export_format}'
+        content_type = EXPORT_CONTENT_TYPES[export_format]
+        if serializer.validated_data['gzip']:
+            chunks = gzip_chunks(chunks)
+            filename += '.gz'
+            content_type = 'application/gzip'
+        return StreamingHttpResponse(
+            chunks,
+            content_type=content_type,
+            headers={
+                'Content-Disposition': content_disposition_header(
+                    as_attachment=True, filename=filename
+                ),
+            },
+        )
+
+
+class LicenseKeyClassifyView(APIView):
+    """Classifies several license keys as demo or not demo at once"""
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description=(
+            'Classifies license keys, responds with `demo` flag per key'
+        ),
+        request_body=ClassifyLicenseKeysRequestSerializer,
+        responses={
+            status.HTTP_200_OK: 'Demo flag per license key',
+            status.HTTP_400_BAD_REQUEST: 'Invalid request params',
+            status.HTTP_403_FORBIDDEN: 'Not authorised',
+            status.HTTP_503_SERVICE_UNAVAILABLE: (
+                'License manager service is unavailable'
+            ),
+        },
+    )
+    def post(self, request: Request, *args, **kwargs):
+        serializer = ClassifyLicenseKeysRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            demo = lk_service.is_demo_keys(
+                serializer.validated_data['license_keys']
+            )
+        except LicenseManagerUnavailableError as e:
+            return Response(
+                str(e), status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return Response(dict(demo=demo))
+
+
+class ServiceStatsView(APIView):
+    """Runtime counters of app services
+
+    Counters are collected per worker process, so each request shows stats of
+    the process that served it
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_description='Returns runtime counters of app services',
+        responses={
+            status.HTTP_200_OK: 'Service counters',
+            status.HTTP_403_FORBIDDEN: 'Not authorised',
+        },
+    )
+    def get(self, request: Request, *args, **kwargs):
+        slm_service = script_license_manager_service
+        return Response(dict(
+            artifact_cache=slm_service.artifact_cache.stats(),
+            audit=slm_service.audit_stats(),
+            encoding=script_encoding_service.stats(),
+            license_keys=lk_service.stats(),
+        ))